@@ -0,0 +1,126 @@
+"""
+Prometheus metrics for the API, served at `/metrics/prometheus`.
+
+- `api_request_duration_seconds{endpoint, method, status}`: whole request,
+  timed by `PrometheusMiddleware` (a plain ASGI middleware, a few
+  microseconds per request).
+- `api_stage_duration_seconds{endpoint, stage}`: where that time goes --
+  `validation` (body read + JSON parse + pydantic, up to the handler),
+  `dataframe`, `preprocessing`, `predict_proba`, `shap`, ... -- timed with
+  `with stage("/predict", "dataframe"):`.
+- `api_batch_rows{endpoint}`: rows per request, or per page for NocoDB reads.
+
+Under serve.py each worker records into PROMETHEUS_MULTIPROC_DIR and a
+scrape on any worker adds them all up. Values that are the same in every
+worker (active model version, ...) are read at scrape time by callbacks
+registered with `collect_on_scrape`.
+"""
+import os
+import time
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+STAGE_BUCKETS = (.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 10)
+ROW_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000)
+
+REQUEST_SECONDS = Histogram("api_request_duration_seconds", "Request latency by endpoint.",
+                            ["endpoint", "method", "status"], buckets=LATENCY_BUCKETS)
+STAGE_SECONDS = Histogram("api_stage_duration_seconds", "Time spent per processing stage.",
+                          ["endpoint", "stage"], buckets=STAGE_BUCKETS)
+BATCH_ROWS = Histogram("api_batch_rows", "Rows per request (per page for paged NocoDB reads).", ["endpoint"],
+                       buckets=ROW_BUCKETS)
+
+_request_start = ContextVar("request_start", default=None)
+_scrape_callbacks = []
+_children = {}
+
+
+def child(metric, *labels):
+    """`metric.labels(*labels)`, memoized: skips the lock and key building on the hot path."""
+    key = (metric, labels)
+    found = _children.get(key)
+    if found is None:
+        found = _children[key] = metric.labels(*labels)
+    return found
+
+
+class stage:
+    """`with stage("/predict", "dataframe"):` times one stage of a request."""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, endpoint, name):
+        self.histogram = child(STAGE_SECONDS, endpoint, name)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+def observe_validation(endpoint):
+    """Call first thing in a handler: records the time since the request arrived."""
+    start = _request_start.get()
+    if start is not None:
+        child(STAGE_SECONDS, endpoint, "validation").observe(time.perf_counter() - start)
+
+
+def observe_rows(endpoint, n_rows):
+    child(BATCH_ROWS, endpoint).observe(n_rows)
+
+
+class PrometheusMiddleware:
+    """Times every HTTP request, labelled by route template (not raw path) and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        _request_start.set(start)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            endpoint = route.path if route is not None else "unmatched"
+            child(REQUEST_SECONDS, endpoint, scope["method"], status).observe(time.perf_counter() - start)
+
+
+class _Callback:
+    def __init__(self, collect):
+        self.collect = collect
+
+
+def collect_on_scrape(collect):
+    """Register a function yielding metric families (e.g. `GaugeMetricFamily`) at scrape time."""
+    _scrape_callbacks.append(_Callback(collect))
+    return collect
+
+
+def exposition():
+    """`(body, content_type)` of all metrics in the Prometheus text format."""
+    registry = CollectorRegistry(auto_describe=False)
+    if MULTIPROCESS:
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry.register(REGISTRY)
+    for callback in _scrape_callbacks:
+        registry.register(callback)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,18 @@
+"""
+Column bookkeeping for fitted sklearn `ColumnTransformer`s, shared by the
+compiled scorer (ml_api/fast_scorer.py) and the linear SHAP explainer
+(ml_api_extended/linear_explainer.py), so both read a preprocessor the same way.
+"""
+import numpy as np
+
+
+def is_passthrough(transformer):
+    """A fitted ColumnTransformer stores "passthrough" as an identity FunctionTransformer."""
+    if isinstance(transformer, str):
+        return transformer == "passthrough"
+    return type(transformer).__name__ == "FunctionTransformer" and transformer.func is None
+
+
+def column_names(preprocessor, columns):
+    """`transformers_` may list the remainder by column index; map those to input names."""
+    return [preprocessor.feature_names_in_[c] if isinstance(c, (int, np.integer)) else c for c in columns]
@@ -0,0 +1,196 @@
+"""
+Multi-worker server with the app preloaded before fork.
+
+The master imports the app once -- models, feature engineer, SHAP
+background, ... -- freezes those objects out of the garbage collector and
+then forks the workers, so their memory is shared copy-on-write instead of
+being loaded N times. All workers accept connections on one socket bound by
+the master. Crashed workers are replaced.
+
+Shared by ml_api and ml_api_extended: the Docker images copy api_common/
+next to the service's app.py. Locally, run it from the service directory
+(or point `--app-dir` at it).
+
+Usage:
+    python ../api_common/serve.py           # WEB_CONCURRENCY workers, else one per available core
+    python ../api_common/serve.py --workers 4 --port 7860
+    python api_common/serve.py --app-dir ml_api_extended
+
+Signals to the master process:
+    TERM / INT  graceful shutdown: workers finish in-flight requests first
+    HUP         rolling restart, one worker at a time, without dropping traffic
+
+Per-worker state is reported by `/health` (see worker_health.py), metrics of
+all workers together by `/metrics/prometheus` (see api_metrics.py).
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+from worker_health import POOL_FILE
+
+
+def default_workers():
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.environ["WEB_CONCURRENCY"])
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+
+
+class Master:
+    """Forks, supervises and restarts the worker processes."""
+
+    def __init__(self, app, sock, n_workers, status_dir, graceful_timeout=30, log_level="info"):
+        self.app = app
+        self.sock = sock
+        self.n_workers = n_workers
+        self.status_dir = Path(status_dir)
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.workers = {}  # pid -> worker id
+        self.retiring = set()
+        self._stopping = False
+        self._restart = False
+
+    def spawn(self, worker_id):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            os.environ["WORKER_ID"] = str(worker_id)
+            config = uvicorn.Config(self.app, log_level=self.log_level,
+                                    timeout_graceful_shutdown=self.graceful_timeout)
+            try:
+                uvicorn.Server(config).run(sockets=[self.sock])
+            finally:
+                os._exit(0)
+        self.workers[pid] = worker_id
+        print(f"[DEBUG] Started worker {worker_id} (pid {pid})")
+        return pid
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_hup)
+        for worker_id in range(self.n_workers):
+            self.spawn(worker_id)
+        while not self._stopping:
+            self._reap()
+            if self._restart:
+                self._restart = False
+                self.rolling_restart()
+            time.sleep(0.2)
+        self.shutdown()
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _on_hup(self, signum, frame):
+        self._restart = True
+
+    def _reap(self):
+        """Collect exited workers and replace the ones that weren't asked to stop."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker_id = self.workers.pop(pid, None)
+            (self.status_dir / f"worker-{pid}.json").unlink(missing_ok=True)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            elif worker_id is not None and not self._stopping:
+                print(f"[WARN] Worker {worker_id} (pid {pid}) exited with status {status}; restarting it")
+                self.spawn(worker_id)
+
+    def rolling_restart(self):
+        """Replace workers one by one; each old one is stopped only once its replacement is up."""
+        print("[DEBUG] Rolling restart")
+        for old_pid, worker_id in list(self.workers.items()):
+            new_pid = self.spawn(worker_id)
+            deadline = time.monotonic() + self.graceful_timeout
+            while not (self.status_dir / f"worker-{new_pid}.json").exists():
+                if self._stopping or time.monotonic() > deadline or new_pid not in self.workers:
+                    print(f"[WARN] Replacement for worker {worker_id} did not come up; keeping pid {old_pid}")
+                    break
+                time.sleep(0.05)
+                self._reap()
+            else:
+                self.retiring.add(old_pid)
+                os.kill(old_pid, signal.SIGTERM)
+
+    def shutdown(self):
+        print("[DEBUG] Shutting down workers")
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            print(f"[WARN] Worker pid {pid} did not stop in time; killing it")
+            os.kill(pid, signal.SIGKILL)
+        shutil.rmtree(self.status_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API with several preloaded worker processes.")
+    parser.add_argument("app", nargs="?", default="app:app")
+    parser.add_argument("--app-dir", default=".", help="directory the app is imported from, as uvicorn's --app-dir")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=7860)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--graceful-timeout", type=float, default=30,
+                        help="seconds a stopping worker gets to finish its in-flight requests")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    status_dir = tempfile.mkdtemp(prefix="api-workers-")
+    os.environ["WORKER_STATUS_DIR"] = status_dir
+    Path(status_dir, POOL_FILE).write_text(json.dumps({"master_pid": os.getpid(), "workers": args.workers}))
+    # Workers write their Prometheus metrics here, and a scrape of any worker
+    # adds them all up. Must be set before the app imports prometheus_client.
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = status_dir
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Accepted connections inherit this; without it small responses from a
+    # pre-bound socket wait on Nagle + delayed ACK (half the throughput)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Preload: everything the app loads at import time -- plus what its
+    # `app.state.warm_up()` loads lazily -- is shared by the workers.
+    # gc.freeze() keeps the collector from touching (and so un-sharing) those pages.
+    sys.path.insert(0, os.path.abspath(args.app_dir))
+    app = import_from_string(args.app)
+    warm_up = getattr(app.state, "warm_up", None)
+    if warm_up is not None:
+        warm_up()
+    gc.collect()
+    gc.freeze()
+
+    print(f"[DEBUG] Serving {args.app} on {args.host}:{args.port} with {args.workers} workers")
+    Master(app, sock, args.workers, status_dir, args.graceful_timeout, args.log_level).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Per-worker health for multi-process serving (see serve.py).
+
+Each worker writes a small JSON heartbeat to WORKER_STATUS_DIR every
+HEARTBEAT_INTERVAL seconds and `/health` on any worker reads them all, so a
+single probe sees the whole pool. Under a plain `uvicorn app:app` (no
+WORKER_STATUS_DIR) only the answering process is reported.
+"""
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "2"))
+POOL_FILE = "pool.json"
+
+
+class WorkerHealth:
+    """Heartbeat of this process plus the pool-wide view for `/health`."""
+
+    def __init__(self, details=None):
+        # Callable returning extra per-worker fields (model version, cache size, ...)
+        self.details = details or dict
+        self.started = time.time()
+        self.status_dir = None
+        self._task = None
+
+    def info(self):
+        return {
+            "pid": os.getpid(),
+            "worker": os.getenv("WORKER_ID"),
+            "started": self.started,
+            "heartbeat": time.time(),
+            **self.details(),
+        }
+
+    async def start(self):
+        """Called from the app lifespan, i.e. in the worker after the fork."""
+        self.started = time.time()
+        self.status_dir = os.getenv("WORKER_STATUS_DIR")
+        if self.status_dir:
+            self._write()
+            self._task = asyncio.create_task(self._beat())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.status_dir:
+            Path(self.status_dir, f"worker-{os.getpid()}.json").unlink(missing_ok=True)
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                self._write()
+            except Exception as e:
+                print(f"[WARN] Heartbeat not written: {e}")
+
+    def _write(self):
+        path = Path(self.status_dir, f"worker-{os.getpid()}.json")
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.info()))
+        os.replace(tmp, path)
+
+    def report(self):
+        """`{"status": "ok" | "degraded", "worker": <this one>, "workers": [...]}`."""
+        me = self.info()
+        if not self.status_dir:
+            return {"status": "ok", "worker": me, "workers": [me]}
+
+        now = time.time()
+        workers = []
+        for path in sorted(Path(self.status_dir).glob("worker-*.json")):
+            try:
+                info = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # removed or being replaced right now
+            if info["pid"] == me["pid"]:
+                info = me
+            info["status"] = "ok" if now - info["heartbeat"] <= 3 * HEARTBEAT_INTERVAL else "stale"
+            workers.append(info)
+
+        try:
+            expected = json.loads(Path(self.status_dir, POOL_FILE).read_text())["workers"]
+        except (OSError, ValueError, KeyError):
+            expected = len(workers)
+        healthy = sum(w["status"] == "ok" for w in workers)
+        return {
+            "status": "ok" if healthy >= expected else "degraded",
+            "expected_workers": expected,
+            "healthy_workers": healthy,
+            "worker": me,
+            "workers": workers,
+        }
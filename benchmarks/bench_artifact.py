@@ -0,0 +1,76 @@
+"""
+Cold start and equivalence of the model artifact formats: joblib.load of the
+pickled pipeline vs CompiledScorer.load of the pickle-free export in
+ml_api/models/<version>/compiled/.
+
+Each load runs in a fresh interpreter, so the timings include the imports a
+container pays at startup. The export is then checked against the pickle on
+test_data.csv (predictions identical, probabilities within --atol).
+
+Usage:
+    python benchmarks/bench_artifact.py [--version logreg-1mvp] [--repeat 5]
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "ml_api"))
+
+from fast_scorer import CompiledScorer  # noqa: E402
+
+LOAD_PICKLE = "import joblib; joblib.load({path!r})"
+LOAD_COMPILED = "from fast_scorer import CompiledScorer; CompiledScorer.load({path!r})"
+
+
+def cold_start(code, repeat):
+    """Best wall time of `repeat` fresh interpreters running `code`."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT / "ml_api", check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def size(path):
+    path = Path(path)
+    return sum(p.stat().st_size for p in path.iterdir()) if path.is_dir() else path.stat().st_size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--version", default="logreg-1mvp")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--atol", type=float, default=1e-12)
+    args = parser.parse_args()
+
+    directory = ROOT / "ml_api" / "models" / args.version
+    pickle_path, compiled_path = directory / "model.pkl", directory / "compiled"
+
+    t_python = cold_start("pass", args.repeat)
+    t_pickle = cold_start(LOAD_PICKLE.format(path=str(pickle_path)), args.repeat)
+    t_compiled = cold_start(LOAD_COMPILED.format(path=str(compiled_path)), args.repeat)
+
+    pipeline = joblib.load(pickle_path)
+    scorer = CompiledScorer.load(compiled_path)
+    X = pd.read_csv(ROOT / "test_data.csv")[list(pipeline.feature_names_in_)]
+    preds, probs = scorer.score(X)
+    max_diff = float(np.max(np.abs(probs - pipeline.predict_proba(X)[:, 1])))
+    if max_diff > args.atol or not np.array_equal(preds, pipeline.predict(X)):
+        raise SystemExit(f"Export disagrees with the pickle (max |dp| = {max_diff:.3g})")
+
+    print(f"interpreter alone {t_python:.2f} s")
+    print(f"pickle   {size(pickle_path) / 1024:6.1f} KB | cold start {t_pickle:.2f} s")
+    print(f"compiled {size(compiled_path) / 1024:6.1f} KB | cold start {t_compiled:.2f} s")
+    print(f"{len(X):,} test rows | predictions identical | max |dp| {max_diff:.2g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Year inference and temporal split: the notebook's Python loop +
+pd.to_datetime(dict(...)) + boolean-mask copies vs campaign_dates, on a
+synthetic chronological extract with the bank-full.csv month/day layout.
+
+Usage:
+    python benchmarks/bench_dates.py [--rows 5000000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from campaign_dates import MONTHS, add_dates, time_split  # noqa: E402
+
+
+def chronological_frame(n, seed=0):
+    """Rows spread over May 2008 - Nov 2010, sorted by date."""
+    rng = np.random.default_rng(seed)
+    dates = np.sort(rng.integers(np.datetime64("2008-05-05").astype(int),
+                                 np.datetime64("2010-11-20").astype(int), n)).astype("datetime64[D]")
+    ts = pd.DatetimeIndex(dates)
+    return pd.DataFrame({
+        "day": ts.day.to_numpy(),
+        "month": np.array(MONTHS, dtype=object)[ts.month.to_numpy() - 1],
+        "balance": rng.normal(1000, 300, n),
+    })
+
+
+def notebook_dates(df):
+    month_map = {name: i + 1 for i, name in enumerate(MONTHS)}
+    df = df.copy()
+    df['month_num'] = df['month'].map(month_map)
+    year = 2008
+    years = []
+    prev_month = df['month_num'].iloc[0]
+    for m in df['month_num']:
+        if m < prev_month:
+            year += 1
+        years.append(year)
+        prev_month = m
+    df['year'] = years
+    df['date'] = pd.to_datetime(dict(year=df['year'], month=df['month_num'], day=df['day']))
+    df['year_month'] = pd.to_datetime(dict(year=df['year'], month=df['month_num'], day="01"))
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    args = parser.parse_args()
+    df = chronological_frame(args.rows)
+
+    start = time.perf_counter()
+    expected = notebook_dates(df)
+    train = expected[expected["year_month"] <= "2009-02-01"]
+    validation = expected[(expected["year_month"] > "2009-02-01") & (expected["year_month"] < "2009-05-01")]
+    test = expected[expected["year_month"] >= "2009-05-01"]
+    t_notebook = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = add_dates(df)
+    split = time_split(got["year_month"])
+    t_vectorized = time.perf_counter() - start
+
+    for col in ["month_num", "year", "date", "year_month"]:
+        if not np.array_equal(expected[col].to_numpy(), got[col].to_numpy()):
+            raise SystemExit(f"Mismatch in column {col!r}")
+    for part, rows in zip(split, (train, validation, test)):
+        if not got.iloc[part].index.equals(rows.index):
+            raise SystemExit("Split mismatch")
+
+    print(f"{args.rows:,} rows | notebook {t_notebook:.2f} s | campaign_dates {t_vectorized:.2f} s | "
+          f"split {[len(got.iloc[p]) for p in split]} | identical")
+
+
+if __name__ == "__main__":
+    main()
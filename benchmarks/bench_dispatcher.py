@@ -0,0 +1,117 @@
+"""
+Throughput of the call dispatcher (call_dispatcher.py).
+
+With `--customers` scored customers queued (expected-bonus keys):
+- fill: `extend` (heapify) vs one `push` per customer;
+- assign + complete by one agent until the queue is empty;
+- the same with `--agents` threads pulling from one shared dispatcher,
+  checking that every customer was handed out exactly once;
+- a steady state of interleaved pushes and assigns, against the page's old
+  structure (a Python list kept in order, popped from the front).
+
+Usage:
+    python benchmarks/bench_dispatcher.py [--customers 100000] [--agents 1 8 64]
+"""
+import argparse
+import bisect
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from call_dispatcher import CallDispatcher, expected_bonus  # noqa: E402
+
+
+def scored_customers(n, seed=0):
+    probabilities = np.random.default_rng(seed).beta(1.5, 8, n)
+    values = expected_bonus(probabilities, 10.0)
+    return [(i, v, {"probability": p}) for i, (p, v) in enumerate(zip(probabilities.tolist(), values.tolist()))]
+
+
+def drain(dispatcher, agents):
+    """Agents pull and complete until the queue is empty; returns (seconds, ids handed out)."""
+    handed_out = [[] for _ in range(agents)]
+
+    def agent(k):
+        mine = handed_out[k]
+        while True:
+            call = dispatcher.assign(k)
+            if call is None:
+                return
+            mine.append(call.customer_id)
+            dispatcher.complete(call.customer_id)
+
+    threads = [threading.Thread(target=agent, args=(k,)) for k in range(agents)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, [cid for ids in handed_out for cid in ids]
+
+
+def steady_state(items, ops):
+    """Half the queue pre-filled, then `ops` rounds of one push + one assign/complete."""
+    half = len(items) // 2
+    dispatcher = CallDispatcher()
+    dispatcher.extend(items[:half])
+    start = time.perf_counter()
+    for i in range(ops):
+        cid, value, payload = items[half + i % (len(items) - half)]
+        dispatcher.push((cid, i), value, payload)
+        dispatcher.complete(dispatcher.assign(0).customer_id)
+    heap_s = time.perf_counter() - start
+
+    ordered = sorted(((-v, cid) for cid, v, _ in items[:half]))
+    start = time.perf_counter()
+    for i in range(ops):
+        cid, value, _ = items[half + i % (len(items) - half)]
+        bisect.insort(ordered, (-value, (cid, i)))
+        ordered.pop(0)
+    list_s = time.perf_counter() - start
+    return heap_s, list_s
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--agents", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--ops", type=int, default=100_000)
+    args = parser.parse_args()
+
+    items = scored_customers(args.customers)
+    n = len(items)
+
+    dispatcher = CallDispatcher()
+    start = time.perf_counter()
+    dispatcher.extend(items)
+    extend_s = time.perf_counter() - start
+    one_by_one = CallDispatcher()
+    start = time.perf_counter()
+    for cid, value, payload in items:
+        one_by_one.push(cid, value, payload)
+    push_s = time.perf_counter() - start
+    print(f"{n} customers")
+    print(f"fill: extend {extend_s * 1e3:.0f} ms, push one by one {push_s * 1e3:.0f} ms "
+          f"({n / push_s:,.0f} pushes/s)")
+
+    for agents in args.agents:
+        dispatcher = CallDispatcher()
+        dispatcher.extend(items)
+        seconds, ids = drain(dispatcher, agents)
+        if len(ids) != n or len(set(ids)) != n:
+            raise SystemExit(f"{agents} agents: {len(ids)} assignments for {len(set(ids))} customers of {n}")
+        print(f"{agents:>3} agents: {n / seconds:>10,.0f} assign+complete/s, each customer assigned once")
+
+    heap_s, list_s = steady_state(items, args.ops)
+    print(f"steady state, {n // 2} waiting: heap {args.ops / heap_s:,.0f} push+assign/s, "
+          f"ordered list {args.ops / list_s:,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
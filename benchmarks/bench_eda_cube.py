@@ -0,0 +1,75 @@
+"""
+EDA page charts: raw rows vs the pre-aggregated cube (eda_cube.py).
+
+For synthetic bank-full.csv data of growing size, measures what the
+page's default charts (age and balance histograms, job and education
+imbalance plots) hand to Altair -- the JSON records Altair embeds in the
+chart spec -- and the server-side time to prepare them: the old page
+serialized the whole frame per chart and merged the proportions onto every
+row, the new one serializes the cube tables, built once per process.
+
+Usage:
+    python benchmarks/bench_eda_cube.py [--rows 45211 452110]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_features import raw_frame  # noqa: E402
+from eda_cube import build_cube  # noqa: E402
+
+HISTOGRAMS = ["age", "balance"]
+CATEGORIES = ["job", "education"]
+
+
+def bank_frame(n):
+    df = raw_frame(n)
+    df["y"] = np.where(np.random.default_rng(1).random(n) < 0.117, "yes", "no")
+    return df.astype({col: "category" for col in ["job", "marital", "education", "contact", "month", "poutcome", "y"]})
+
+
+def raw_payload(df):
+    """Bytes the old page sent: the full frame per histogram, frame + proportions per imbalance plot."""
+    size = 0
+    for _ in HISTOGRAMS:
+        size += len(df.to_json(orient="records"))
+    for var in CATEGORIES:
+        prop_df = df.groupby(var, observed=True)["y"].value_counts(normalize=True).rename("proportion").reset_index()
+        size += len(pd.merge(df, prop_df, on=[var, "y"], how="left").to_json(orient="records"))
+    return size
+
+
+def cube_payload(cube):
+    tables = [cube["histograms"][var] for var in HISTOGRAMS] + [cube["categories"][var] for var in CATEGORIES]
+    return sum(len(table.to_json(orient="records")) for table in tables)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[45211, 452110])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'raw MB':>8} {'raw s':>7} {'cube KB':>8} {'build s':>8} {'render s':>9}")
+    for n in args.rows:
+        df = bank_frame(n)
+        raw_bytes, raw_s = timed(raw_payload, df)
+        cube, build_s = timed(build_cube, df)
+        cube_bytes, render_s = timed(cube_payload, cube)
+        print(f"{n:>9} {raw_bytes / 1e6:>8.1f} {raw_s:>7.2f} {cube_bytes / 1e3:>8.1f} {build_s:>8.2f} {render_s:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
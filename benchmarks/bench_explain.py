@@ -0,0 +1,57 @@
+"""
+Latency of /explain's SHAP step: per-request shap.Explainer vs the cached
+closed-form LinearShapExplainer, for 100 to 100k rows of test_data.csv.
+
+Usage:
+    python benchmarks/bench_explain.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import shap
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "ml_api_extended"))
+
+from linear_explainer import LinearShapExplainer  # noqa: E402
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    model = joblib.load(ROOT / "ml_api" / "models" / "logreg-1mvp" / "model.pkl")
+    preprocessor = model.named_steps["preprocessor"]
+    classifier = model.named_steps["classifier"]
+    explainer = LinearShapExplainer.from_file(model, ROOT / "ml_api_extended" / "shap_background_v1.csv")
+
+    data = pd.read_csv(ROOT / "test_data.csv").drop(columns=["y"])
+    data = pd.concat([data] * 13, ignore_index=True)
+
+    print(f"{'rows':>8} {'shap.Explainer':>15} {'closed form':>12} {'max |diff|':>11}")
+    for n in (100, 1_000, 10_000, 100_000):
+        X = data.head(n)
+
+        def per_request():
+            X_t = preprocessor.transform(X)
+            return shap.Explainer(classifier, X_t)(X_t).values
+
+        t_shap, reference = timed(per_request)
+        t_fast, (_, values) = timed(lambda: explainer.explain(X, background="batch"))
+        # shap subsamples backgrounds above 100 rows, so only compare where it doesn't
+        diff = f"{np.abs(values - reference).max():.1e}" if n <= 100 else "n/a"
+        print(f"{n:>8} {t_shap * 1e3:>12.1f} ms {t_fast * 1e3:>9.1f} ms {diff:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Feature engineering on raw bank-marketing rows: the notebook cells vs
+BankFeatureEngineer, on 1M synthetic rows with the bank-full.csv schema.
+
+Usage:
+    python benchmarks/bench_features.py [--rows 1000000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "ml_api"))
+
+from feature_engineering import MODEL_FEATURES, BankFeatureEngineer  # noqa: E402
+
+
+def raw_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    contacted = rng.random(n) < 0.18
+    return pd.DataFrame({
+        "age": rng.integers(18, 95, n),
+        "job": rng.choice(["admin.", "blue-collar", "management", "retired", "student", "unknown"], n),
+        "marital": rng.choice(["married", "single", "divorced"], n),
+        "education": rng.choice(["primary", "secondary", "tertiary", "unknown"], n),
+        "default": rng.choice(["yes", "no"], n),
+        "balance": rng.lognormal(6, 1.5, n).round() - 500,
+        "housing": rng.choice(["yes", "no"], n),
+        "loan": rng.choice(["yes", "no"], n),
+        "contact": rng.choice(["cellular", "telephone", "unknown"], n),
+        "day": rng.integers(1, 32, n),
+        "month": rng.choice(["may", "jun", "jul"], n),
+        "duration": rng.integers(0, 3000, n),
+        "campaign": rng.integers(1, 40, n),
+        "pdays": np.where(contacted, rng.integers(1, 872, n), -1),
+        "previous": np.where(contacted, rng.integers(1, 40, n), 0),
+        "poutcome": rng.choice(["unknown", "failure", "success", "other"], n),
+    })
+
+
+def notebook_features(df):
+    """The training notebook's cells, in order."""
+    df = df.copy()
+    upper_bound = df['balance'].quantile(0.99)
+    df['balance'] = df['balance'].clip(upper=upper_bound)
+    df['months_since_previous_contact'] = pd.cut(
+        df['pdays'],
+        bins=[-2, -1, 150, 230, 310, 380, 1000],
+        labels=["No contact", "0 - 5 months", "5 - 8 months", "8 - 11 months", "Around a year", "More than a year"]
+    )
+    df['n_previous_contacts'] = pd.cut(
+        df['previous'],
+        bins=[-1, 0, 1, 2, 3, 4, 5, 6, 300],
+        labels=["No contact", "1", "2", "3", "4", "5", "6", "More than 6"]
+    )
+    df["had_contact"] = df["months_since_previous_contact"] != "No contact"
+    df["is_single"] = df["marital"] == "single"
+    df["uknown_contact"] = df["contact"] == "unknown"
+    return df[MODEL_FEATURES]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = raw_frame(args.rows)
+
+    start = time.perf_counter()
+    expected = notebook_features(df)
+    t_notebook = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engineer = BankFeatureEngineer().fit(df)
+    t_fit = time.perf_counter() - start
+    start = time.perf_counter()
+    got = engineer.transform(df)
+    t_transform = time.perf_counter() - start
+
+    for col in MODEL_FEATURES:
+        a = expected[col].astype(object).to_numpy()
+        b = got[col].astype(object).to_numpy()
+        if not np.array_equal(a, b):
+            raise SystemExit(f"Mismatch in column {col!r}")
+
+    print(f"{args.rows:,} rows | notebook cells {t_notebook * 1e3:.0f} ms | "
+          f"BankFeatureEngineer fit {t_fit * 1e3:.0f} ms + transform {t_transform * 1e3:.0f} ms | "
+          f"outputs identical")
+
+
+if __name__ == "__main__":
+    main()
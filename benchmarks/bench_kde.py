@@ -0,0 +1,53 @@
+"""
+KDE mode of the EDA page: scipy's gaussian_kde (what `sns.kdeplot`
+evaluates) vs the binned/FFT KDE of density.py, for all seven distribution
+variables and both `y` classes, on synthetic data 10x bank-full.csv.
+
+Usage:
+    python benchmarks/bench_kde.py [--rows 452110] [--skip-exact]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_eda_cube import bank_frame  # noqa: E402
+from density import GRIDSIZE, binned_kde  # noqa: E402
+from eda_cube import DISTRIBUTION_VARIABLES  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=452110)
+    parser.add_argument("--skip-exact", action="store_true", help="don't run the O(n * grid) scipy KDE")
+    args = parser.parse_args()
+
+    from scipy.stats import gaussian_kde
+
+    df = bank_frame(args.rows)
+    subsets = [(var, label, df.loc[df["y"] == label, var].to_numpy(dtype=float))
+               for var in DISTRIBUTION_VARIABLES for label in ("yes", "no")]
+
+    start = time.perf_counter()
+    curves = [binned_kde(x) for _, _, x in subsets]
+    binned_s = time.perf_counter() - start
+    print(f"{args.rows} rows, {len(subsets)} curves of {GRIDSIZE} points")
+    print(f"binned/FFT KDE: {binned_s:.3f} s")
+
+    if not args.skip_exact:
+        start = time.perf_counter()
+        worst = 0.0
+        for (var, label, x), (grid, density) in zip(subsets, curves):
+            exact = gaussian_kde(x)(grid)
+            worst = max(worst, np.abs(density - exact).max() / exact.max())
+        print(f"scipy gaussian_kde: {time.perf_counter() - start:.3f} s")
+        print(f"largest difference: {worst:.1e} of the curve's peak")
+
+
+if __name__ == "__main__":
+    main()
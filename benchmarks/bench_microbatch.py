@@ -0,0 +1,123 @@
+"""
+Throughput vs latency of 1-row /predict calls with and without micro-batching.
+
+For each MICRO_BATCH_WAIT_MS setting an ml_api server is started with
+uvicorn (result cache off, so every row is scored), then `--concurrency`
+async clients send single-row requests for `--seconds`, each sending its
+next request as soon as the previous one returns. The clients write raw
+HTTP/1.1 on keep-alive connections, so the load generator takes as little
+of the CPU as possible away from the server.
+
+Usage:
+    python benchmarks/bench_microbatch.py [--concurrency 64] [--seconds 10] [--wait-ms 0 1 2 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+FEATURES = ["age", "job", "education", "default", "balance", "housing", "loan", "day", "campaign",
+            "months_since_previous_contact", "n_previous_contacts", "poutcome",
+            "had_contact", "is_single", "uknown_contact"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, wait_ms, max_rows):
+    env = {**os.environ, "PREDICTION_CACHE_SIZE": "0",
+           "MICRO_BATCH_WAIT_MS": str(wait_ms), "MICRO_BATCH_MAX_ROWS": str(max_rows)}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT / "ml_api", env=env,
+    )
+    for _ in range(200):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise SystemExit("Server did not start")
+
+
+def encode_requests(rows, port):
+    """One pre-encoded `POST /predict` per row."""
+    requests = []
+    for row in rows:
+        body = json.dumps({"data": [row]}).encode()
+        head = (f"POST /predict HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        requests.append(head.encode() + body)
+    return requests
+
+
+async def client(port, requests, deadline, latencies, offset):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(requests[i % len(requests)])
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+            body = await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if b'"error"' in body:
+                raise RuntimeError(body.decode())
+            i += 1
+    finally:
+        writer.close()
+
+
+async def load(port, rows, concurrency, seconds):
+    requests = encode_requests(rows, port)
+    await client(port, requests, time.perf_counter() + 0.5, [], 0)  # warm up
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + seconds
+    await asyncio.gather(*(client(port, requests, deadline, latencies, k * 97) for k in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stats = httpx.get(f"http://127.0.0.1:{port}/cache/stats").json()["micro_batching"]
+    return len(latencies) / elapsed, np.array(latencies) * 1e3, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--wait-ms", type=float, nargs="+", default=[0, 1, 2, 5])
+    parser.add_argument("--max-rows", type=int, default=256)
+    args = parser.parse_args()
+
+    rows = json.loads(pd.read_csv(ROOT / "test_data.csv")[FEATURES].to_json(orient="records"))
+    print(f"{args.concurrency} concurrent clients, 1 row per request, {args.seconds:g} s per setting")
+    print(f"{'wait ms':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/batch':>10}")
+    for wait_ms in args.wait_ms:
+        port = free_port()
+        server = start_server(port, wait_ms, args.max_rows)
+        try:
+            rps, ms, stats = asyncio.run(load(port, rows, args.concurrency, args.seconds))
+        finally:
+            server.terminate()
+            server.wait()
+        per_batch = stats["requests_per_batch"] or 0
+        print(f"{wait_ms:>8g} {rps:>8.0f} {np.percentile(ms, 50):>8.1f} {np.percentile(ms, 95):>8.1f} "
+              f"{np.percentile(ms, 99):>8.1f} {per_batch:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
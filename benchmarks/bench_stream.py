@@ -0,0 +1,102 @@
+"""
+Throughput / peak-RSS benchmark for ml_api's /predict/stream.
+
+Builds a multi-million-row CSV by tiling synthetic_data.csv, starts the API
+with uvicorn in a subprocess, streams the file through the endpoint and reads
+the NDJSON results as they arrive. Peak RSS of the server is read from
+/proc (Linux only).
+
+Usage:
+    python benchmarks/bench_stream.py --rows 2000000 --chunk-rows 10000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def build_csv(path, n_rows):
+    base = pd.read_csv(ROOT / "synthetic_data.csv")
+    block = pd.concat([base] * max(1, 100_000 // len(base)), ignore_index=True)
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < n_rows:
+            part = block.iloc[: n_rows - written]
+            part.to_csv(f, index=False, header=written == 0)
+            written += len(part)
+
+
+def peak_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def file_chunks(path, size=1 << 16):
+    with open(path, "rb") as f:
+        while chunk := f.read(size):
+            yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=10_000)
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data = Path(tmp) / "bulk.csv"
+        build_csv(data, args.rows)
+        size_mb = data.stat().st_size / 1e6
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=ROOT / "ml_api",
+        )
+        try:
+            url = f"http://127.0.0.1:{args.port}"
+            for _ in range(100):
+                try:
+                    httpx.get(f"{url}/health")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            idle_rss = peak_rss_mb(server.pid)
+
+            scored = 0
+            start = time.perf_counter()
+            with httpx.stream(
+                "POST", f"{url}/predict/stream?chunk_rows={args.chunk_rows}",
+                content=file_chunks(data), headers={"content-type": "text/csv"}, timeout=None,
+            ) as response:
+                for line in response.iter_lines():
+                    result = json.loads(line)
+                    if "error" in result:
+                        raise RuntimeError(result["error"])
+                    scored += len(result["probabilities"])
+            elapsed = time.perf_counter() - start
+
+            print(f"rows scored      : {scored:,} ({size_mb:.0f} MB CSV)")
+            print(f"elapsed          : {elapsed:.1f} s")
+            print(f"throughput       : {scored / elapsed:,.0f} rows/s")
+            print(f"server RSS idle  : {idle_rss:.0f} MB")
+            print(f"server RSS peak  : {peak_rss_mb(server.pid):.0f} MB")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
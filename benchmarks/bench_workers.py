@@ -0,0 +1,125 @@
+"""
+Scaling curve of the multi-worker server (api_common/serve.py) from 1 to N
+workers, and how much worker memory the preload shares.
+
+For every worker count the server is started, `--concurrency` keep-alive
+clients send 1-row /predict requests (result cache off) for `--seconds`,
+and the proportional set size (PSS, shared pages split between the
+processes that map them) of the master + workers is compared with their
+summed RSS. With `--compare-uvicorn` the same is measured for
+`uvicorn --workers N`, which starts every worker from scratch.
+
+The throughput can only scale up to the number of cores the server and
+the load generator share, so run this on the deployment hardware.
+
+Usage:
+    python benchmarks/bench_workers.py [--workers 1 2 4 8] [--concurrency 64] [--seconds 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from bench_microbatch import FEATURES, client, encode_requests, free_port
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def start(port, workers, uvicorn_workers=False):
+    env = {**os.environ, "PREDICTION_CACHE_SIZE": "0"}
+    if uvicorn_workers:
+        cmd = [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--workers", str(workers)]
+    else:
+        cmd = [sys.executable, str(ROOT / "api_common" / "serve.py"), "--port", str(port), "--workers", str(workers)]
+    server = subprocess.Popen(cmd + ["--log-level", "warning"], cwd=ROOT / "ml_api", env=env,
+                              stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            health = httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).json()
+            if health.get("healthy_workers", workers) == workers:
+                break
+        except (httpx.TransportError, ValueError):
+            pass
+        time.sleep(0.2)
+    else:
+        server.kill()
+        raise SystemExit("Server did not start")
+
+    # uvicorn's /health only covers one worker: wait until all have finished loading
+    rss = 0
+    while time.monotonic() < deadline:
+        time.sleep(1)
+        previous, (rss, _) = rss, memory_mb(process_tree(server.pid))
+        if abs(rss - previous) < 0.01 * rss:
+            return server
+    server.kill()
+    raise SystemExit("Server memory did not settle")
+
+
+def process_tree(pid):
+    """`pid` and all its descendants."""
+    pids = [pid]
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        for child in (task / "children").read_text().split():
+            pids.extend(process_tree(int(child)))
+    return pids
+
+
+def memory_mb(pids):
+    """Summed (RSS, PSS) in MB over `pids`."""
+    rss = pss = 0
+    for pid in pids:
+        for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+            if line.startswith("Rss:"):
+                rss += int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss += int(line.split()[1])
+    return rss / 1024, pss / 1024
+
+
+async def load(port, requests, concurrency, seconds):
+    await client(port, requests, time.perf_counter() + 0.5, [], 0)  # warm up
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, requests, start + seconds, latencies, k * 97)
+                           for k in range(concurrency)))
+    return len(latencies) / (time.perf_counter() - start), np.array(latencies) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--compare-uvicorn", action="store_true")
+    args = parser.parse_args()
+
+    rows = json.loads(pd.read_csv(ROOT / "test_data.csv")[FEATURES].to_json(orient="records"))
+    modes = [("serve.py", False)] + ([("uvicorn", True)] if args.compare_uvicorn else [])
+    print(f"{len(os.sched_getaffinity(0))} cores available, {args.concurrency} clients, 1 row per request")
+    print(f"{'server':>9} {'workers':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8} {'PSS MB':>8}")
+    for name, uvicorn_workers in modes:
+        for workers in args.workers:
+            port = free_port()
+            server = start(port, workers, uvicorn_workers)
+            try:
+                rss, pss = memory_mb(process_tree(server.pid))
+                rps, ms = asyncio.run(load(port, encode_requests(rows, port), args.concurrency, args.seconds))
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{name:>9} {workers:>8} {rps:>8.0f} {np.percentile(ms, 50):>8.1f} "
+                  f"{np.percentile(ms, 99):>8.1f} {rss:>8.0f} {pss:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Import-time budget for the API services.
+
+Runs `python -X importtime -c "import app"` in each service directory in a
+fresh interpreter (best of --repeat runs), prints the slowest top-level
+imports, and exits with status 1 if importing the app takes longer than
+its budget or pulls in a module that is meant to load lazily (sklearn,
+shap, ... are imported when the model is warmed up, after the server
+started listening). tests/test_import_time.py runs the same check, so a
+startup regression fails the test suite.
+
+Usage:
+    python benchmarks/check_import_time.py [--budget-ms 1000] [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVICES = ["ml_api", "ml_api_extended"]
+LAZY_MODULES = ["sklearn", "scipy", "shap", "joblib", "numba"]
+BUDGET_MS = 1000
+
+
+def import_profile(service):
+    """`{module: (self_us, cumulative_us, depth)}` for `import app` in `service`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT / service, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{service}: import app failed\n{result.stderr[-2000:]}")
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        profile[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return profile
+
+
+def measure(service, repeat=3):
+    """Best of `repeat` runs: `(import ms, lazy modules imported eagerly, profile)`."""
+    profile = min((import_profile(service) for _ in range(repeat)), key=lambda p: p["app"][1])
+    eager = sorted({name.split(".")[0] for name in profile} & set(LAZY_MODULES))
+    return profile["app"][1] / 1000, eager, profile
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS,
+                        help="maximum time to import each service's app module")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("services", nargs="*", default=SERVICES)
+    args = parser.parse_args()
+
+    failed = False
+    for service in args.services:
+        total_ms, eager, profile = measure(service, args.repeat)
+
+        print(f"\n{service}: import app {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+        direct = sorted(((cum, name) for name, (_, cum, depth) in profile.items() if depth == 1), reverse=True)
+        for cumulative_us, name in direct[:args.top]:
+            print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+        if eager:
+            print(f"  FAIL: imported at startup, should load lazily: {', '.join(eager)}")
+            failed = True
+        if total_ms > args.budget_ms:
+            print(f"  FAIL: {total_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Local stand-in for the NocoDB v2 records API.
+
+Serves test_data.csv (or another CSV) at
+`/api/v2/tables/{table_id}/records` with the same `offset` / `limit` /
+`viewId` parameters, `{"list": [...], "pageInfo": {...}}` body, server-side
+page cap, `xc-token` check and ETag / If-None-Match handling as NocoDB.
+Latency and transient failures (a random fraction of requests, or every
+n-th one, answered with 503/429 and an optional Retry-After) can be
+injected to exercise client retries.
+
+Usage:
+    python benchmarks/nocodb_stand_in.py --port 8090 --max-limit 100 --fail-rate 0.1
+    NOCODB_API_URL=http://127.0.0.1:8090/api/v2/tables/local/records uvicorn app:app
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from pathlib import Path
+
+import pandas as pd
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CATEGORICAL_COLUMNS = [
+    "job", "education", "default", "housing", "loan",
+    "months_since_previous_contact", "n_previous_contacts", "poutcome",
+]
+
+
+def create_app(csv_path=ROOT / "test_data.csv", max_limit=1000, default_limit=25,
+               token=None, latency=0.0, fail_rate=0.0, fail_every=0, fail_status=503,
+               retry_after=None, seed=0):
+    header = pd.read_csv(csv_path, nrows=0).columns
+    frame = pd.read_csv(csv_path, dtype={c: str for c in CATEGORICAL_COLUMNS if c in header})
+    frame.insert(0, "Id", range(1, len(frame) + 1))
+    records = json.loads(frame.to_json(orient="records"))
+    rng = random.Random(seed)
+
+    app = FastAPI(title="NocoDB stand-in")
+    app.state.calls = {"records": 0, "not_modified": 0, "failed": 0, "max_in_flight": 0}
+    app.state.in_flight = 0
+
+    @app.get("/api/v2/tables/{table_id}/records")
+    async def list_records(request: Request, table_id: str, offset: int = 0,
+                           limit: int = default_limit, viewId: str = None):
+        app.state.calls["records"] += 1
+        if token is not None and request.headers.get("xc-token") != token:
+            return JSONResponse({"msg": "Invalid token"}, status_code=401)
+        if latency:
+            app.state.in_flight += 1
+            app.state.calls["max_in_flight"] = max(app.state.calls["max_in_flight"], app.state.in_flight)
+            try:
+                await asyncio.sleep(latency)
+            finally:
+                app.state.in_flight -= 1
+        if (fail_rate and rng.random() < fail_rate) or (fail_every and app.state.calls["records"] % fail_every == 0):
+            app.state.calls["failed"] += 1
+            headers = {"retry-after": retry_after} if retry_after is not None else None
+            return JSONResponse({"msg": "Service unavailable"}, status_code=fail_status, headers=headers)
+
+        limit = max(1, min(limit, max_limit))
+        page = records[offset:offset + limit]
+        body = {
+            "list": page,
+            "pageInfo": {
+                "totalRows": len(records),
+                "page": offset // limit + 1,
+                "pageSize": limit,
+                "isFirstPage": offset == 0,
+                "isLastPage": offset + limit >= len(records),
+            },
+        }
+        payload = json.dumps(body).encode()
+        etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+        if request.headers.get("if-none-match") == etag:
+            app.state.calls["not_modified"] += 1
+            return Response(status_code=304, headers={"etag": etag})
+        return Response(payload, media_type="application/json", headers={"etag": etag})
+
+    @app.get("/stats")
+    def stats():
+        return app.state.calls
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=str(ROOT / "test_data.csv"))
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--max-limit", type=int, default=1000)
+    parser.add_argument("--token", default=None)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with --fail-status")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every n-th request with --fail-status")
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--retry-after", default=None, help="Retry-After header sent with failures")
+    args = parser.parse_args()
+
+    app = create_app(args.csv, args.max_limit, token=args.token, latency=args.latency, fail_rate=args.fail_rate,
+                     fail_every=args.fail_every, fail_status=args.fail_status, retry_after=args.retry_after)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
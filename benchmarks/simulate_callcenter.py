@@ -0,0 +1,329 @@
+"""
+Multi-agent load simulator for the call-center dashboard.
+
+Each simulated agent runs the flow of pages/7_📞_Callcenter_dashboard.py
+as an asyncio task: fetch a queue of customers from NocoDB, score it with
+one /predict call (and one /explain/rows call for the reason codes), then
+handle the customers in CallDispatcher order -- wait a think time, submit
+the outcome -- and fetch a new queue when it runs out. `--flow per-call`
+replays the page's old behaviour instead, which re-scored the whole
+remaining queue plus the active customer (and explained it) on every
+submit.
+
+Everything runs locally: the NocoDB stand-in (nocodb_stand_in.py, serving
+test_data.csv), ml_api for /predict and ml_api_extended for /explain/rows,
+both under serve.py. Unlike the page, which caches the fetch per queue
+size, every queue is a fresh page at a random offset, so agents work
+different customers and every fetch reaches NocoDB.
+
+Reported per agent count: calls handled per second, latency percentiles of
+the agent-visible steps (new queue, submit) and of each upstream request,
+and upstream request counts. `--output` saves the results as JSON;
+`--compare` checks a run against saved results and exits with status 1 if
+throughput dropped or a p99 latency grew by more than `--max-regression`.
+
+Usage:
+    python benchmarks/simulate_callcenter.py [--agents 50 200] [--think-ms 500] [--seconds 30]
+    python benchmarks/simulate_callcenter.py --output base.json
+    python benchmarks/simulate_callcenter.py --compare base.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from bench_microbatch import free_port
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from call_dispatcher import CallDispatcher, expected_bonus  # noqa: E402
+from ml_api_extended.nocodb_client import NocoDBClient  # noqa: E402
+
+LATENCY_FLOOR_MS = 5.0
+
+
+def start(cmd, cwd, env, port, workers=None, health_path="/health"):
+    """Start a server and wait until `health_path` answers (and all its workers are up)."""
+    server = subprocess.Popen(cmd, cwd=cwd, env={**os.environ, **env},
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            health = httpx.get(f"http://127.0.0.1:{port}{health_path}", timeout=1)
+            if health.status_code == 200 and health.json().get("healthy_workers", workers) == workers:
+                return server
+        except (httpx.TransportError, ValueError):
+            pass
+        if server.poll() is not None:
+            break
+        time.sleep(0.2)
+    server.kill()
+    raise SystemExit(f"{' '.join(cmd)} did not start")
+
+
+def start_stack(workers, nocodb_latency, explain):
+    """NocoDB stand-in, ml_api and (optionally) ml_api_extended; returns (processes, urls)."""
+    nocodb_port, model_port, explain_port = free_port(), free_port(), free_port()
+
+    def serve(port):
+        return [sys.executable, str(ROOT / "api_common" / "serve.py"), "--port", str(port), "--workers", str(workers),
+                "--log-level", "warning"]
+
+    processes = [start(
+        [sys.executable, "benchmarks/nocodb_stand_in.py", "--port", str(nocodb_port),
+         "--latency", str(nocodb_latency)],
+        ROOT, {}, nocodb_port, health_path="/stats",
+    )]
+    processes.append(start(serve(model_port), ROOT / "ml_api", {}, model_port, workers))
+    urls = {
+        "nocodb": f"http://127.0.0.1:{nocodb_port}/api/v2/tables/local/records",
+        "predict": f"http://127.0.0.1:{model_port}/predict",
+        "explain": None,
+    }
+    if explain:
+        # Run from the repo root so the service finds model_1mvp.pkl
+        processes.append(start(
+            serve(explain_port) + ["--app-dir", "ml_api_extended"],
+            ROOT, {"SHAP_BACKGROUND_PATH": "ml_api_extended/shap_background_v1.csv",
+                   "NOCODB_CACHE_DIR": tempfile.mkdtemp(prefix="nocodb-cache-")},
+            explain_port, workers,
+        ))
+        urls["explain"] = f"http://127.0.0.1:{explain_port}/explain/rows"
+    return processes, urls
+
+
+def model_input(row, day):
+    """The dashboard's /predict row for a NocoDB record."""
+    return {
+        "age": int(row["age"]),
+        "balance": float(row["balance"]),
+        "day": day,
+        "campaign": int(row["campaign"]),
+        "job": str(row["job"]),
+        "education": str(row["education"]),
+        "default": str(row["default"]),
+        "housing": str(row["housing"]),
+        "loan": str(row["loan"]),
+        "months_since_previous_contact": str(row["months_since_previous_contact"]),
+        "n_previous_contacts": str(row["n_previous_contacts"]),
+        "poutcome": str(row["poutcome"]),
+        "had_contact": bool(row["had_contact"]),
+        "is_single": bool(row["is_single"]),
+        "uknown_contact": bool(row["uknown_contact"]),
+    }
+
+
+class Simulation:
+    """Shared clients and measurements of one run."""
+
+    def __init__(self, urls, queue_size, think_s, flow, seed=0):
+        self.urls = urls
+        self.table_rows = sum(1 for _ in open(ROOT / "test_data.csv")) - 1  # what the stand-in serves
+        self.queue_size = queue_size
+        self.think_s = think_s
+        self.flow = flow
+        self.seed = seed
+        self.day = datetime.datetime.now().day
+        self.latencies = defaultdict(list)
+        self.upstream = Counter()
+        self.errors = Counter()
+        self.handled = 0
+
+    async def __aenter__(self):
+        # One pooled session for the whole app, as the page's st.cache_resource session
+        self.http = httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=100))
+        self.noco = NocoDBClient(self.urls["nocodb"], max_concurrency=100, timeout=30)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.http.aclose()
+        await self.noco.aclose()
+
+    async def timed(self, name, request):
+        self.upstream[name] += 1
+        start = time.perf_counter()
+        try:
+            return await request
+        except Exception:
+            self.errors[name] += 1
+            raise
+        finally:
+            self.latencies[name].append(time.perf_counter() - start)
+
+    async def fetch_customers(self, rng):
+        offset = rng.randrange(0, self.table_rows - self.queue_size)
+        return await self.timed("nocodb", self.noco.fetch_records(self.queue_size, offset))
+
+    async def post(self, name, rows, **params):
+        response = await self.timed(name, self.http.post(
+            self.urls[name], json={"data": [model_input(row, self.day) for row in rows]}, params=params))
+        response.raise_for_status()
+        body = response.json()
+        if "error" in body:
+            self.errors[name] += 1
+            raise RuntimeError(body["error"])
+        return body
+
+    async def score(self, rows):
+        """Probabilities (and reason codes, if the explain service runs) of `rows`."""
+        requests = [self.post("predict", rows)]
+        if self.urls["explain"]:
+            requests.append(self.post("explain", rows, top_k=3))
+        results = await asyncio.gather(*requests)
+        return results[0]["probabilities"]
+
+    def record(self, step, seconds):
+        self.latencies[step].append(seconds)
+
+    async def agent(self, k, deadline):
+        rng = random.Random(self.seed * 100_003 + k)
+        await asyncio.sleep(rng.random() * self.think_s)  # agents don't all start in the same instant
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                records = await self.fetch_customers(rng)
+                probabilities = await self.score(records)
+            except Exception:
+                await asyncio.sleep(self.think_s)  # the page retries on the next rerun
+                continue
+            self.record("new queue", time.perf_counter() - start)
+
+            dispatcher = CallDispatcher()
+            dispatcher.extend((i, expected_bonus(p, 1.0), {"record": row, "probability": p})
+                              for i, (row, p) in enumerate(zip(records, probabilities)))
+            active = dispatcher.assign(k)
+            while active is not None and time.perf_counter() < deadline:
+                await asyncio.sleep(rng.expovariate(1 / self.think_s))
+                start = time.perf_counter()
+                dispatcher.complete(active.customer_id)
+                active = dispatcher.assign(k)
+                if self.flow == "per-call" and active is not None:
+                    # Old page rerun: whole remaining queue, then the active row, then its reason codes
+                    waiting = [active] + dispatcher.peek(len(dispatcher))
+                    try:
+                        await self.post("predict", [call.payload["record"] for call in waiting])
+                        await self.post("predict", [active.payload["record"]])
+                        if self.urls["explain"]:
+                            await self.post("explain", [active.payload["record"]], top_k=3)
+                    except Exception:
+                        pass
+                self.record("submit", time.perf_counter() - start)
+                self.handled += 1
+
+    async def run(self, agents, seconds):
+        start = time.perf_counter()
+        await asyncio.gather(*(self.agent(k, start + seconds) for k in range(agents)))
+        return time.perf_counter() - start
+
+
+def percentiles_ms(values):
+    ms = np.array(values) * 1e3
+    return {"p50": float(np.percentile(ms, 50)), "p95": float(np.percentile(ms, 95)),
+            "p99": float(np.percentile(ms, 99)), "max": float(ms.max())}
+
+
+async def simulate(urls, agents, args):
+    async with Simulation(urls, args.queue_size, args.think_ms / 1e3, args.flow, args.seed) as sim:
+        elapsed = await sim.run(agents, args.seconds)
+    return {
+        "agents": agents,
+        "calls_per_s": sim.handled / elapsed,
+        "calls_handled": sim.handled,
+        "latency_ms": {name: percentiles_ms(values) for name, values in sim.latencies.items() if values},
+        "upstream": {name: {"count": n, "per_s": n / elapsed, "errors": sim.errors[name]}
+                     for name, n in sim.upstream.items()},
+    }
+
+
+def report(result):
+    print(f"\n{result['agents']} agents: {result['calls_handled']} calls handled, "
+          f"{result['calls_per_s']:.1f} calls/s")
+    print(f"  {'':<10} {'count':>7} {'req/s':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, ms in result["latency_ms"].items():
+        up = result["upstream"].get(name)
+        count, rate, errors = (up["count"], f"{up['per_s']:.1f}", up["errors"]) if up else ("", "", "")
+        print(f"  {name:<10} {count:>7} {rate:>7} {errors:>7} {ms['p50']:>8.1f} {ms['p95']:>8.1f} "
+              f"{ms['p99']:>8.1f} {ms['max']:>8.1f}")
+
+
+def compare(results, baseline, max_regression):
+    """Lines describing regressions of `results` against `baseline` (same agent counts)."""
+    previous = {r["agents"]: r for r in baseline["results"]}
+    problems = []
+    for result in results:
+        base = previous.get(result["agents"])
+        if base is None:
+            continue
+        if result["calls_per_s"] < base["calls_per_s"] * (1 - max_regression):
+            problems.append(f"{result['agents']} agents: {result['calls_per_s']:.1f} calls/s, "
+                            f"was {base['calls_per_s']:.1f}")
+        for name, ms in result["latency_ms"].items():
+            if name not in base["latency_ms"]:
+                continue
+            # Sub-millisecond steps (a local submit) are noise, not a latency to regress from
+            limit = max(base["latency_ms"][name]["p99"], LATENCY_FLOOR_MS) * (1 + max_regression)
+            if ms["p99"] > limit:
+                problems.append(f"{result['agents']} agents: {name} p99 {ms['p99']:.1f} ms, "
+                                f"was {base['latency_ms'][name]['p99']:.1f} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--think-ms", type=float, default=500, help="mean time an agent spends per call")
+    parser.add_argument("--queue-size", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--flow", choices=["queue", "per-call"], default="queue")
+    parser.add_argument("--workers", type=int, default=1, help="serve.py workers per API")
+    parser.add_argument("--nocodb-latency", type=float, default=0.05, help="seconds added to every NocoDB request")
+    parser.add_argument("--no-explain", action="store_true", help="don't start ml_api_extended for reason codes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="results JSON of an earlier run to check against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    processes, urls = start_stack(args.workers, args.nocodb_latency, not args.no_explain)
+    try:
+        print(f"flow={args.flow}, queue of {args.queue_size}, think time {args.think_ms:g} ms, "
+              f"{args.seconds:g} s per run, {args.workers} worker(s) per API")
+        results = []
+        for agents in args.agents:
+            results.append(asyncio.run(simulate(urls, agents, args)))
+            report(results[-1])
+        nocodb_stats = httpx.get(urls["nocodb"].split("/api/")[0] + "/stats").json()
+        print(f"\nNocoDB stand-in served {nocodb_stats}")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "max_regression")}
+    if args.output:
+        Path(args.output).write_text(json.dumps({"config": config, "results": results}, indent=2))
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        problems = compare(results, baseline, args.max_regression)
+        for line in problems:
+            print(f"REGRESSION: {line}")
+        if problems:
+            sys.exit(1)
+        print(f"No regression beyond {args.max_regression:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
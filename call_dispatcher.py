@@ -0,0 +1,168 @@
+"""
+Priority-queue dispatcher for the call center.
+
+Scored customers wait in a binary heap keyed by the expected value of
+calling them, highest first; customers with equal value are handed out in
+the order they were queued. Agents pull with `assign`, which pops the best
+waiting customer and records who has it until `complete` (call handled) or
+`release` (call not made, customer goes back in line). Push and assign are
+O(log n) and every operation holds one lock for a few microseconds, so any
+number of agent threads can share one dispatcher without a customer being
+handed to two of them.
+
+Removing or re-scoring a waiting customer only marks its heap slot stale;
+stale slots are skipped when they surface and the heap is rebuilt when
+more than half of it is stale.
+"""
+import heapq
+import itertools
+import threading
+
+
+def expected_value(probability, deal_value, call_cost=0.0):
+    """
+    Expected return of calling a customer: `p * deal_value - call_cost`.
+
+    With the dashboard's bonus formula a won upsell pays `(1 - p) * bonus`,
+    so pass `deal_value=(1 - p) * bonus`.
+    """
+    return probability * deal_value - call_cost
+
+
+def expected_bonus(probability, bonus, call_cost=0.0):
+    """Expected value of a call under the bonus formula: `p * (1 - p) * bonus - call_cost`."""
+    return expected_value(probability, (1 - probability) * bonus, call_cost)
+
+
+class QueuedCall:
+    """A customer in the dispatcher: id, priority value and whatever payload it was queued with."""
+
+    __slots__ = ("customer_id", "value", "payload", "seq", "agent", "stale")
+
+    def __init__(self, customer_id, value, payload, seq):
+        self.customer_id = customer_id
+        self.value = value
+        self.payload = payload
+        self.seq = seq
+        self.agent = None
+        self.stale = False
+
+    def __repr__(self):
+        return f"QueuedCall({self.customer_id!r}, value={self.value:.4g}, agent={self.agent!r})"
+
+
+class CallDispatcher:
+    """Thread-safe max-priority queue of customers with at-most-once assignment to agents."""
+
+    def __init__(self):
+        self._heap = []      # (-value, seq, QueuedCall)
+        self._waiting = {}   # customer_id -> QueuedCall
+        self._assigned = {}  # customer_id -> QueuedCall
+        self._seq = itertools.count()
+        self._stale = 0
+        self._lock = threading.Lock()
+        self.pushed = self.assigned = self.completed = self.released = 0
+
+    def __len__(self):
+        """Customers waiting (not assigned)."""
+        return len(self._waiting)
+
+    def __contains__(self, customer_id):
+        return customer_id in self._waiting or customer_id in self._assigned
+
+    def _push(self, call):
+        self._waiting[call.customer_id] = call
+        heapq.heappush(self._heap, (-call.value, call.seq, call))
+
+    def push(self, customer_id, value, payload=None):
+        """Queue a customer. A customer already waiting is re-queued with the new value and payload."""
+        with self._lock:
+            if customer_id in self._assigned:
+                raise ValueError(f"Customer {customer_id!r} is assigned to agent {self._assigned[customer_id].agent!r}")
+            self._drop(customer_id)
+            self._push(QueuedCall(customer_id, value, payload, next(self._seq)))
+            self.pushed += 1
+
+    def extend(self, items):
+        """Queue many `(customer_id, value, payload)` at once; O(n) when the queue is empty."""
+        with self._lock:
+            for customer_id, value, payload in items:
+                if customer_id in self._assigned:
+                    raise ValueError(f"Customer {customer_id!r} is assigned to agent "
+                                     f"{self._assigned[customer_id].agent!r}")
+                self._drop(customer_id)
+                call = QueuedCall(customer_id, value, payload, next(self._seq))
+                self._waiting[customer_id] = call
+                self._heap.append((-value, call.seq, call))
+                self.pushed += 1
+            heapq.heapify(self._heap)
+
+    def assign(self, agent):
+        """Pop the highest-value waiting customer for `agent`; None if nobody is waiting."""
+        with self._lock:
+            heap = self._heap
+            while heap:
+                call = heapq.heappop(heap)[2]
+                if call.stale:
+                    self._stale -= 1
+                    continue
+                del self._waiting[call.customer_id]
+                call.agent = agent
+                self._assigned[call.customer_id] = call
+                self.assigned += 1
+                return call
+            return None
+
+    def complete(self, customer_id):
+        """The assigned call was handled: forget the customer. Returns its `QueuedCall`."""
+        with self._lock:
+            call = self._assigned.pop(customer_id)
+            self.completed += 1
+            return call
+
+    def release(self, customer_id):
+        """Put an assigned customer back in line, at its old value and position among equals."""
+        with self._lock:
+            call = self._assigned.pop(customer_id)
+            call.agent = None
+            self._push(call)
+            self.released += 1
+
+    def remove(self, customer_id):
+        """Take a waiting customer out of the queue. Returns False if it wasn't waiting."""
+        with self._lock:
+            return self._drop(customer_id)
+
+    def _drop(self, customer_id):
+        call = self._waiting.pop(customer_id, None)
+        if call is None:
+            return False
+        call.stale = True
+        self._stale += 1
+        if self._stale > len(self._heap) // 2:
+            self._heap = [item for item in self._heap if not item[2].stale]
+            heapq.heapify(self._heap)
+            self._stale = 0
+        return True
+
+    def peek(self, n=1):
+        """The next `n` customers `assign` would hand out, best first, without assigning them."""
+        with self._lock:
+            return [item[2] for item in heapq.nsmallest(n + self._stale, self._heap) if not item[2].stale][:n]
+
+    def assigned_to(self, agent):
+        """Calls currently held by `agent`."""
+        with self._lock:
+            return [call for call in self._assigned.values() if call.agent == agent]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "waiting": len(self._waiting),
+                "assigned_now": len(self._assigned),
+                "pushed": self.pushed,
+                "assigned": self.assigned,
+                "completed": self.completed,
+                "released": self.released,
+                "heap_size": len(self._heap),
+            }
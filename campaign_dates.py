@@ -0,0 +1,139 @@
+"""
+Calendar reconstruction and temporal split for the bank marketing data.
+
+`bank-full.csv` only has `month` and `day`; the rows are in chronological
+order starting in May 2008, so the year is implicit: it increases every
+time the month goes backwards. `infer_years` does that with a diff/cumsum
+over the month numbers instead of a Python loop, and `time_split` returns
+positional indices (slices when the data is ordered) for the notebook's
+train/validation/test periods instead of filtered DataFrame copies.
+"""
+import warnings
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+MONTH_MAP = {name: i + 1 for i, name in enumerate(MONTHS)}
+
+
+def month_numbers(month):
+    """Month names ('jan'...'dec') or numbers 1-12 -> int8 array; raises on anything else."""
+    month = pd.Series(month) if not isinstance(month, pd.Series) else month
+    if pd.api.types.is_numeric_dtype(month):
+        numbers = month.to_numpy()
+    else:
+        # Map the few distinct names, then take by code (missing -> code -1 -> 0)
+        codes, names = pd.factorize(month)
+        lookup = np.array([MONTH_MAP.get(str(name).lower(), 0) for name in names] + [0])
+        numbers = lookup[codes]
+
+    bad = (numbers < 1) | (numbers > 12) | pd.isna(numbers)
+    if bad.any():
+        raise ValueError(f"Unknown month values: {sorted(set(map(str, month[bad].unique())))}")
+    return numbers.astype(np.int8)
+
+
+def infer_years(month, day=None, start_year=2008, max_year=None, strict=True):
+    """
+    Year of every row of a chronologically ordered extract.
+
+    The year starts at `start_year` and goes up by one wherever the month
+    number decreases. Two checks catch extracts whose blocks are out of
+    order, where the inferred years would silently be wrong:
+
+    - with `day`, the day must never go backwards within one (year, month);
+      this raises, or only warns with `strict=False`, since a few shuffled
+      rows inside a month don't change the years;
+    - with `max_year`, misplaced blocks that add spurious rollovers (e.g. a
+      block of May rows after June) must not push the last year past it.
+    """
+    m = month_numbers(month).astype(np.int16)
+    rollover = np.diff(m, prepend=m[:1]) < 0
+    years = start_year + np.cumsum(rollover, dtype=np.int32)
+
+    if day is not None:
+        d = np.asarray(day)
+        same_block = ~rollover[1:] & (m[1:] == m[:-1])
+        backwards = np.flatnonzero(same_block & (d[1:] < d[:-1]))
+        if len(backwards):
+            i = int(backwards[0]) + 1
+            message = (
+                f"Rows are out of order: day goes from {d[i - 1]} to {d[i]} within "
+                f"{MONTHS[m[i] - 1]} {years[i]} at row {i} ({len(backwards)} such rows)."
+            )
+            if strict:
+                raise ValueError(message)
+            warnings.warn(message, RuntimeWarning, stacklevel=2)
+    if max_year is not None and len(years) and years[-1] > max_year:
+        i = int(np.flatnonzero(years > max_year)[0])
+        raise ValueError(
+            f"Rows are out of order: inferred year reaches {years[-1]} (> {max_year}); "
+            f"the first row past {max_year} is row {i} ({MONTHS[m[i] - 1]} after "
+            f"{MONTHS[m[i - 1] - 1]})."
+        )
+    return years
+
+
+def to_dates(years, months, days=1):
+    """Vectorized `pd.to_datetime(dict(year=..., month=..., day=...))` as datetime64[ns]."""
+    month_index = (np.asarray(years, dtype=np.int64) - 1970) * 12 + np.asarray(months, dtype=np.int64) - 1
+    dates = month_index.astype("datetime64[M]").astype("datetime64[D]") + (np.asarray(days) - 1)
+    return dates.astype("datetime64[ns]")
+
+
+def add_dates(df, start_year=2008, max_year=None, check_order="warn"):
+    """
+    Return `df` with the notebook's `month_num`, `year`, `date` and
+    `year_month` columns added (see `infer_years` for the order checks).
+
+    `check_order` handles days going backwards within a month: "warn"
+    (default), True to raise, False to skip the check.
+    """
+    month_num = month_numbers(df["month"])
+    day = df["day"] if check_order else None
+    years = infer_years(month_num, day, start_year, max_year, strict=check_order is True)
+    return df.assign(
+        month_num=month_num,
+        year=years,
+        date=to_dates(years, month_num, df["day"].to_numpy()),
+        year_month=to_dates(years, month_num),
+    )
+
+
+class TimeSplit(NamedTuple):
+    train: object
+    validation: object
+    test: object
+
+
+def time_split(year_month, train_end="2009-02-01", test_start="2009-05-01", end=None):
+    """
+    Positions of the train / validation / test rows for the notebook's split.
+
+    - train:      year_month <= train_end
+    - validation: train_end < year_month < test_start
+    - test:       test_start <= year_month (< end, if given)
+
+    When `year_month` is sorted (the raw data is) each part is a `slice`,
+    otherwise an integer array; use them with `df.iloc[...]`.
+    """
+    ym = np.asarray(year_month, dtype="datetime64[ns]")
+    train_end, test_start = np.datetime64(train_end, "ns"), np.datetime64(test_start, "ns")
+    end = np.datetime64(end, "ns") if end is not None else None
+
+    if len(ym) < 2 or not (ym[1:] < ym[:-1]).any():
+        a = int(np.searchsorted(ym, train_end, side="right"))
+        b = max(a, int(np.searchsorted(ym, test_start, side="left")))
+        c = int(np.searchsorted(ym, end, side="left")) if end is not None else len(ym)
+        return TimeSplit(slice(0, a), slice(a, b), slice(b, max(b, c)))
+
+    test = ym >= test_start
+    if end is not None:
+        test &= ym < end
+    return TimeSplit(
+        np.flatnonzero(ym <= train_end),
+        np.flatnonzero((ym > train_end) & (ym < test_start)),
+        np.flatnonzero(test),
+    )
@@ -0,0 +1,97 @@
+"""
+Pre-aggregated tables for the EDA page.
+
+Instead of handing all bank-full.csv rows to Altair (which serializes them
+into the page and bins/counts them in the browser), every chart is drawn
+from a small summary table computed here once per process:
+
+- per numeric variable, a histogram by `y`: `bin_start, bin_end, y, count`
+  on "nice" bin edges like the ones Altair's `alt.Bin(maxbins=30)` picks;
+- per categorical variable, counts and proportions by `y`:
+  `<var>, y, count, proportion`.
+
+A chart's payload is then a few dozen rows whatever the dataset size.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from bank_data import DATA_DIR, load_bank_data
+
+DISTRIBUTION_VARIABLES = ["age", "balance", "day", "duration", "campaign", "pdays", "previous"]
+IMBALANCE_VARIABLES = ["job", "marital", "education", "default", "housing", "loan", "contact", "month", "poutcome"]
+MAX_BINS = 30
+
+
+def nice_bins(lo, hi, maxbins=MAX_BINS):
+    """
+    Bin edges covering `[lo, hi]` with a round step (1, 2 or 5 times a power
+    of ten) and at most `maxbins` bins, as Vega-Lite's binning does.
+    """
+    span = float(hi - lo) or 1.0
+    step = 10.0 ** (np.round(np.log10(span)) - 1)
+    while np.ceil(span / step) > maxbins:
+        step *= 10
+    for divisor in (5, 2):
+        if span / (step / divisor) <= maxbins:
+            step /= divisor
+    start = np.floor(lo / step) * step
+    stop = max(np.ceil(hi / step) * step, start + step)
+    return start + step * np.arange(round((stop - start) / step) + 1)
+
+
+def histogram_by_target(df, var, maxbins=MAX_BINS, target="y"):
+    """Counts of `var` per bin and target class; empty bins are left out."""
+    values = df[var].to_numpy(dtype=float)
+    classes, labels = _classes(df[target])
+    edges = nice_bins(values.min(), values.max(), maxbins)
+    n_bins = len(edges) - 1
+    bins = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, n_bins - 1)
+    counts = np.bincount(classes * n_bins + bins, minlength=len(labels) * n_bins)
+
+    class_idx, bin_idx = np.divmod(np.arange(len(counts)), n_bins)
+    keep = counts > 0
+    return pd.DataFrame({
+        "bin_start": edges[bin_idx[keep]],
+        "bin_end": edges[bin_idx[keep] + 1],
+        target: np.asarray(labels, dtype=object)[class_idx[keep]],
+        "count": counts[keep],
+    })
+
+
+def category_by_target(df, var, target="y"):
+    """Rows per category and target class, and their share of the category."""
+    counts = df.groupby([var, target], observed=True).size().rename("count").reset_index()
+    counts["proportion"] = counts["count"] / counts.groupby(var, observed=True)["count"].transform("sum")
+    return counts.astype({var: str, target: str})
+
+
+def _classes(series):
+    """`(codes, labels)` of a categorical or plain column."""
+    codes, labels = pd.factorize(series, sort=True)
+    return codes, list(labels)
+
+
+def build_cube(df, distribution_variables=DISTRIBUTION_VARIABLES,
+               imbalance_variables=IMBALANCE_VARIABLES, maxbins=MAX_BINS):
+    """`{"histograms": {var: table}, "categories": {var: table}}` for `df`."""
+    return {
+        "histograms": {var: histogram_by_target(df, var, maxbins) for var in distribution_variables},
+        "categories": {var: category_by_target(df, var) for var in imbalance_variables},
+    }
+
+
+@lru_cache(maxsize=None)
+def _load(data_dir):
+    return build_cube(load_bank_data(data_dir=data_dir))
+
+
+def load_cube(data_dir=DATA_DIR):
+    """The cube of the bank dataset, built on first use and shared by every session in the process."""
+    return _load(str(data_dir))
+
+
+def clear_cache():
+    """Drop the cached cube, e.g. after `bank_data.build_cache` was re-run."""
+    _load.cache_clear()
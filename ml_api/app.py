@@ -1,14 +1,99 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-from typing import List, Literal
-import joblib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from pydantic import BaseModel, model_validator
+from typing import List, Literal, Optional
+import asyncio
+import json
+import os
+import sys
 import numpy as np
 import pandas as pd
+from pathlib import Path
 
-# Load trained logistic regression model pipeline
-model = joblib.load("model_1mvp.pkl")
+# serve.py, api_metrics.py and worker_health.py are shared with the other
+# service in api_common/; the Docker image copies them next to this file.
+sys.path.append(str(Path(__file__).resolve().parent.parent / "api_common"))
 
-app = FastAPI(title="Logistic Regression API")
+from api_metrics import (
+    ROW_BUCKETS, PrometheusMiddleware, child, collect_on_scrape, exposition, observe_rows, observe_validation, stage
+)
+from chunked_io import (
+    DuplexStreamingResponse, detect_format, iter_parquet_frames, iter_text_frames, missing_values, spool_stream
+)
+from fast_scorer import CompiledScorer
+from micro_batcher import MicroBatcher
+from model_registry import MODELS_DIR, ModelRegistry
+from prediction_cache import PredictionCache
+from worker_health import WorkerHealth
+
+# Versioned model pipelines live in models/<version>/. The version named in
+# models/ACTIVE is served by default and can be swapped without a restart;
+# requests pick another one with `?model=<version>`. Linear models are served
+# by a NumPy-only scorer, loaded from the version's pickle-free `compiled/`
+# export when it has one (see `python model_registry.py export`).
+registry = ModelRegistry(
+    MODELS_DIR,
+    max_loaded=int(os.getenv("MODEL_CACHE_SIZE", "3")),
+    poll_interval=float(os.getenv("MODEL_POLL_INTERVAL", "5")),
+)
+registry.get()
+
+# Per-row results of /predict, keyed on the validated row and the model that
+# scored it. PREDICTION_CACHE_SIZE=0 turns the cache off.
+prediction_cache = PredictionCache(
+    max_size=int(os.getenv("PREDICTION_CACHE_SIZE", "50000")),
+    ttl=float(os.getenv("PREDICTION_CACHE_TTL", "600")),
+)
+registry.on_reload(prediction_cache.invalidate)
+
+# /predict/raw engineers model features from raw bank-full.csv columns with
+# the settings (the balance clip bound) recorded in the model version's
+# metadata.json. feature_engineering imports sklearn, so it is imported on
+# first use instead of at import: warmed in a background thread once the
+# server is up (or before fork under serve.py).
+def load_feature_engineering():
+    import feature_engineering
+
+    return feature_engineering
+
+def feature_engineer(entry):
+    """BankFeatureEngineer for `entry`, or None if its metadata has no `feature_engineering` settings."""
+    settings = entry.metadata.get("feature_engineering")
+    if not settings:
+        return None
+    return load_feature_engineering().BankFeatureEngineer(**settings).fit(None)
+
+# Reported per worker by /health when running under serve.py
+worker_health = WorkerHealth(lambda: {
+    "model": registry.active_version(),
+    "cache": {k: v for k, v in prediction_cache.stats().items() if k in ("size", "hits", "misses")},
+})
+
+@asynccontextmanager
+async def lifespan(app):
+    await worker_health.start()
+    asyncio.get_running_loop().run_in_executor(None, load_feature_engineering)
+    yield
+    await micro_batcher.aclose()
+    await worker_health.stop()
+
+app = FastAPI(title="Logistic Regression API", lifespan=lifespan)
+app.state.warm_up = load_feature_engineering
+app.add_middleware(PrometheusMiddleware)
+
+# Prometheus metrics of this service, on top of the per-endpoint latency,
+# stage and batch-size histograms of api_metrics.py
+CACHE_ROWS = Counter("api_prediction_cache_rows", "/predict rows served from the cache or scored.", ["result"])
+MICRO_BATCH_ROWS = Histogram("api_micro_batch_rows", "Rows scored together per micro-batch.", buckets=ROW_BUCKETS)
+
+@collect_on_scrape
+def model_metrics():
+    info = GaugeMetricFamily("api_model_info", "Model version served by default.", labels=["version"])
+    info.add_metric([registry.active_version()], 1)
+    yield info
 
 # Schema for input data (matches features used in training)
 class InputData(BaseModel):
@@ -28,23 +113,272 @@ class InputData(BaseModel):
     is_single: bool
     uknown_contact: bool
 
+INPUT_FEATURES = list(InputData.model_fields)
+
 class BatchInputData(BaseModel):
     data: List[InputData]
 
+# Column-oriented batch: one array per feature. Each list is validated as a
+# whole by pydantic-core instead of building one InputData object per row.
+class ColumnarInputData(BaseModel):
+    age: List[int]
+    balance: List[float]
+    day: List[int]
+    campaign: List[int]
+    job: List[str]
+    education: List[str]
+    default: List[Literal["yes", "no", "unknown"]]
+    housing: List[Literal["yes", "no", "unknown"]]
+    loan: List[Literal["yes", "no", "unknown"]]
+    months_since_previous_contact: List[str]
+    n_previous_contacts: List[str]
+    poutcome: List[str]
+    had_contact: List[bool]
+    is_single: List[bool]
+    uknown_contact: List[bool]
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        lengths = {name: len(values) for name, values in self}
+        if len(set(lengths.values())) > 1:
+            raise ValueError(f"All feature columns must have the same length, got {lengths}")
+        return self
+
+    def __len__(self):
+        return len(self.age)
+
+# Raw record as in the UCI bank-full.csv; the derived features are computed
+# server-side. Extra columns (month, duration, y, ...) are ignored.
+class RawInputData(BaseModel):
+    age: int
+    job: str
+    marital: str
+    education: str
+    default: Literal["yes", "no", "unknown"]
+    balance: float
+    housing: Literal["yes", "no", "unknown"]
+    loan: Literal["yes", "no", "unknown"]
+    contact: str
+    day: int
+    campaign: int
+    pdays: int
+    previous: int
+    poutcome: str
+
+class BatchRawInputData(BaseModel):
+    data: List[RawInputData]
+
+def score_frame(X, entry):
+    """Return `(predictions, probabilities)` for a DataFrame of input rows."""
+    return entry.score(X)
+
+def score_rows(rows, entry):
+    """Return `(predictions, probabilities)` for a list of `InputData` rows."""
+    MICRO_BATCH_ROWS.observe(len(rows))
+    with stage("/predict", "dataframe"):
+        if entry.scorer is not None:
+            X = entry.scorer.columns_from_rows(rows, entry.scorer.input_features)
+        else:
+            X = pd.DataFrame([item.dict() for item in rows])
+    with stage("/predict", "predict_proba"):
+        return entry.score(X)
+
+# Cache misses from concurrent /predict calls on the same model are scored
+# together: rows wait up to MICRO_BATCH_WAIT_MS (0 = off) or until
+# MICRO_BATCH_MAX_ROWS are queued.
+micro_batcher = MicroBatcher(
+    lambda entry, rows: score_rows(rows, entry),
+    max_rows=int(os.getenv("MICRO_BATCH_MAX_ROWS", "256")),
+    max_wait_ms=float(os.getenv("MICRO_BATCH_WAIT_MS", "2")),
+)
+
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return worker_health.report()
 
 @app.post("/predict")
-def predict(batch: BatchInputData):
+async def predict(batch: BatchInputData, model: Optional[str] = None):
+    observe_validation("/predict")
+    observe_rows("/predict", len(batch.data))
+    try:
+        entry = registry.get(model)
+        # Serve repeated rows from the cache and score only the misses
+        with stage("/predict", "cache_lookup"):
+            keys = prediction_cache.keys(entry, batch.data, INPUT_FEATURES)
+            results = prediction_cache.get_many(keys)
+            misses = [i for i, hit in enumerate(results) if hit is None]
+        child(CACHE_ROWS, "hit").inc(len(results) - len(misses))
+        child(CACHE_ROWS, "miss").inc(len(misses))
+        if misses:
+            with stage("/predict", "micro_batch"):  # queueing for the batch + scoring
+                preds, probs = await micro_batcher.submit(entry, [batch.data[i] for i in misses])
+            preds, probs = preds.tolist(), probs.tolist()
+            prediction_cache.put_many([keys[i] for i in misses], preds, probs)
+            for i, pred, prob in zip(misses, preds, probs):
+                results[i] = (pred, prob)
+        return {
+            "model": entry.version,
+            "predictions": [r[0] for r in results],
+            "probabilities": [r[1] for r in results],
+            "cached": len(results) - len(misses),
+        }
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+@app.post("/predict/columnar")
+def predict_columnar(batch: ColumnarInputData, model: Optional[str] = None):
+    """Score a column-oriented batch and return predictions/probabilities as arrays."""
+    observe_validation("/predict/columnar")
+    observe_rows("/predict/columnar", len(batch))
     try:
-        X = pd.DataFrame([item.dict() for item in batch.data])
-        preds = model.predict(X)
-        probs = model.predict_proba(X)[:, 1]
+        entry = registry.get(model)
+        with stage("/predict/columnar", "predict_proba"):
+            preds, probs = entry.score({f: getattr(batch, f) for f in entry.features})
         return {
+            "model": entry.version,
+            "n_rows": len(batch),
             "predictions": preds.tolist(),
             "probabilities": probs.tolist()
         }
     except Exception as e:
         import traceback
         return {"error": str(e), "trace": traceback.format_exc()}
+
+@app.post("/predict/raw")
+def predict_raw(batch: BatchRawInputData, model: Optional[str] = None):
+    """Score raw bank-marketing records, engineering the model features server-side."""
+    observe_validation("/predict/raw")
+    observe_rows("/predict/raw", len(batch.data))
+    try:
+        entry = registry.get(model)
+        engineer = feature_engineer(entry)
+        if engineer is None:
+            return {"error": f"Model {entry.version} has no feature_engineering settings in its metadata; "
+                             "raw records cannot be scored."}
+        with stage("/predict/raw", "dataframe"):
+            columns = CompiledScorer.columns_from_rows(batch.data, load_feature_engineering().RAW_COLUMNS)
+        with stage("/predict/raw", "preprocessing"):
+            X = engineer.transform(columns)
+        with stage("/predict/raw", "predict_proba"):
+            preds, probs = score_frame(X, entry)
+        return {
+            "model": entry.version,
+            "predictions": preds.tolist(),
+            "probabilities": probs.tolist()
+        }
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+@app.post("/predict/stream")
+async def predict_stream(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson", "parquet"]] = None,
+    chunk_rows: int = 10000,
+    model: Optional[str] = None,
+):
+    """
+    Score a CSV, NDJSON or Parquet upload chunk by chunk.
+
+    The body is read as it arrives and each chunk is scored as soon as it is
+    parsed, so memory use depends on `chunk_rows` and not on the file size.
+    Results are streamed back as NDJSON, one line per chunk:
+    `{"offset": ..., "predictions": [...], "probabilities": [...]}`.
+    The whole upload is scored by the model version resolved at the start.
+    A chunk with missing feature values is rejected, as /predict would
+    reject the row: the stream ends with an `{"error": ..., "offset": ...}` line.
+    """
+    try:
+        entry = registry.get(model)
+    except Exception as e:
+        return {"error": str(e)}
+    fmt = format or detect_format(request.headers.get("content-type"))
+    chunk_rows = max(1, chunk_rows)
+    if fmt == "parquet":
+        frames = iter_parquet_frames(request.stream(), chunk_rows)
+    else:
+        frames = iter_text_frames(request.stream(), fmt, chunk_rows)
+
+    async def results():
+        offset = 0
+        try:
+            async for X in frames:
+                missing = missing_values(X, entry.features)
+                if missing:
+                    raise ValueError("Missing values in " + ", ".join(
+                        f"{column} (first at row {offset + i})" for column, i in missing.items()))
+                observe_rows("/predict/stream", len(X))
+                with stage("/predict/stream", "predict_proba"):
+                    preds, probs = await run_in_threadpool(score_frame, X, entry)
+                yield (json.dumps({
+                    "offset": offset,
+                    "predictions": preds.tolist(),
+                    "probabilities": probs.tolist()
+                }) + "\n").encode()
+                offset += len(X)
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band.
+            yield (json.dumps({"error": str(e), "offset": offset}) + "\n").encode()
+
+    return DuplexStreamingResponse(spool_stream(results()), media_type="application/x-ndjson")
+
+# =====================================================
+# MODEL REGISTRY
+# =====================================================
+
+@app.get("/models")
+def list_models():
+    """All registered versions with their metadata, and which one is active."""
+    try:
+        return {"active": registry.active_version(), "models": registry.describe()}
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+@app.post("/models/activate")
+def activate_model(model: str):
+    """
+    Hot-swap the default model. The new version is loaded and verified before
+    it goes live. Under serve.py the other workers switch within
+    MODEL_POLL_INTERVAL seconds, when they next poll models/ACTIVE.
+    """
+    try:
+        entry = registry.activate(model)
+        return {"active": entry.version, "metadata": entry.metadata, "propagation_s": registry.poll_interval}
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+@app.post("/models/reload")
+def reload_model(model: Optional[str] = None):
+    """
+    Re-read a version's artifact from disk (the active one by default). Under
+    serve.py the other workers re-read it within MODEL_POLL_INTERVAL seconds,
+    when they next poll its models/<version>/RELOAD token.
+    """
+    try:
+        entry = registry.reload(model)
+        return {"reloaded": entry.version, "propagation_s": registry.poll_interval}
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+# =====================================================
+# PREDICTION CACHE
+# =====================================================
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters and size of the /predict result cache, and micro-batching counters."""
+    return {**prediction_cache.stats(), "micro_batching": micro_batcher.stats()}
+
+# =====================================================
+# PROMETHEUS
+# =====================================================
+
+@app.get("/metrics/prometheus")
+def prometheus_metrics():
+    """Request latency, per-stage time, batch sizes, cache hits and model version for Prometheus."""
+    body, content_type = exposition()
+    return Response(body, media_type=content_type)
@@ -0,0 +1,298 @@
+"""
+Offline batch scorer for nightly rescoring.
+
+Splits an input file into shards (byte ranges for CSV/NDJSON, row groups for
+Parquet), scores them across a process pool that loads the model once per
+worker, and writes one part file per shard. Parts are renamed into place only
+when complete, so a re-run with the same arguments skips finished shards and
+resumes after a failure. Finally the parts are concatenated into the output.
+
+Usage:
+    python batch_score.py customers.csv scored.parquet --workers 8 --top-k 3
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from chunked_io import CATEGORICAL_COLUMNS, categorical_as_str
+from fast_scorer import CompiledScorer
+from model_registry import ModelRegistry
+
+# Per-worker state, filled once by `_init_worker`.
+_worker = {}
+
+
+# =====================================================
+# SHARDING
+# =====================================================
+
+def input_format(path):
+    suffix = Path(path).suffix.lower()
+    if suffix in (".parquet", ".pq"):
+        return "parquet"
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    return "csv"
+
+
+def plan_shards(path, fmt, n_shards):
+    """Cut the input into at most `n_shards` independent pieces."""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        n_groups = pq.ParquetFile(path).num_row_groups
+        groups = np.array_split(np.arange(n_groups), min(n_shards, n_groups))
+        return [{"row_groups": g.tolist()} for g in groups if len(g)]
+
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        start = len(f.readline()) if fmt == "csv" else 0
+        cuts = [start]
+        for i in range(1, n_shards):
+            f.seek(max(start, size * i // n_shards))
+            f.readline()  # move to the next line boundary
+            cuts.append(max(f.tell(), cuts[-1]))
+    cuts.append(size)
+    return [{"start": a, "end": b} for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+class _RangeReader(io.RawIOBase):
+    """Read-only file view limited to the byte range `[start, end)`."""
+
+    def __init__(self, path, start, end):
+        self._f = open(path, "rb")
+        self._f.seek(start)
+        self._left = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self._f.readinto(memoryview(buffer)[:min(len(buffer), self._left)])
+        self._left -= n
+        return n
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+
+def iter_shard_frames(path, fmt, shard, chunk_rows):
+    """Yield DataFrames of at most `chunk_rows` rows for one shard, categorical columns as strings."""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        for batch in parquet.iter_batches(batch_size=chunk_rows, row_groups=shard["row_groups"]):
+            yield categorical_as_str(batch.to_pandas())
+        return
+
+    reader = io.BufferedReader(_RangeReader(path, shard["start"], shard["end"]))
+    try:
+        if fmt == "csv":
+            header = pd.read_csv(path, nrows=0).columns.to_list()
+            dtype = {c: str for c in CATEGORICAL_COLUMNS if c in header}
+            frames = pd.read_csv(reader, names=header, header=None, dtype=dtype, chunksize=chunk_rows)
+        else:
+            frames = pd.read_json(reader, lines=True, dtype=False, chunksize=chunk_rows)
+        for frame in frames:
+            yield categorical_as_str(frame)
+    finally:
+        reader.close()
+
+
+# =====================================================
+# WORKERS
+# =====================================================
+
+def load_model(model_path):
+    """`(pipeline, compiled scorer)`; either may be None, not both."""
+    if os.path.isdir(model_path):
+        # Pickle-free export from the model registry
+        return None, CompiledScorer.load(model_path)
+    model = joblib.load(model_path)
+    try:
+        scorer = CompiledScorer.from_pipeline(model)
+        scorer.verify(model)
+    except Exception as e:
+        print(f"[DEBUG] {model_path}: compiled scorer not used ({e})")
+        scorer = None
+    return model, scorer
+
+
+def _init_worker(model_path):
+    model, scorer = load_model(model_path)
+    _worker.update(model=model, scorer=scorer)
+
+
+def score_chunk(X, top_k=0, id_column=None):
+    """Score one DataFrame chunk and build its output frame."""
+    model, scorer = _worker["model"], _worker["scorer"]
+    if scorer is not None:
+        preds, probs = scorer.score(X)
+    else:
+        preds, probs = model.predict(X), model.predict_proba(X)[:, 1]
+
+    out = {}
+    if id_column:
+        out[id_column] = X[id_column].to_numpy()
+    out["probability"] = probs
+    out["prediction"] = preds
+
+    if top_k:
+        if scorer is None:
+            raise ValueError("top-k contributions need a linear model that compiles")
+        contrib = scorer.contributions(X)
+        k = min(top_k, contrib.shape[1])
+        order = np.argsort(-np.abs(contrib), axis=1)[:, :k]
+        names = np.array(scorer.input_features, dtype=object)
+        for i in range(k):
+            out[f"top_{i + 1}_feature"] = names[order[:, i]]
+            out[f"top_{i + 1}_contribution"] = np.take_along_axis(contrib, order[:, i:i + 1], axis=1)[:, 0]
+    return pd.DataFrame(out)
+
+
+def run_shard(index, path, fmt, shard, part_path, chunk_rows, top_k, id_column):
+    """Score one shard into `part_path`, renaming a temporary file into place when done."""
+    tmp_path = part_path.with_name(part_path.name + ".tmp")
+    writer = None
+    n_rows = 0
+    try:
+        for X in iter_shard_frames(path, fmt, shard, chunk_rows):
+            scored = score_chunk(X, top_k, id_column)
+            if part_path.suffix == ".parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(scored, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+            else:
+                scored.to_csv(tmp_path, mode="a" if n_rows else "w", header=not n_rows, index=False)
+            n_rows += len(scored)
+    finally:
+        if writer is not None:
+            writer.close()
+    if not n_rows:
+        tmp_path.touch()
+    os.replace(tmp_path, part_path)
+    return index, n_rows
+
+
+# =====================================================
+# DRIVER
+# =====================================================
+
+def merge_parts(parts, output):
+    """Concatenate finished part files into `output` one part at a time."""
+    parts = [p for p in parts if p.stat().st_size]
+    if output.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for part in parts:
+                table = pq.read_table(part)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+    with open(output, "wb") as out:
+        for i, part in enumerate(parts):
+            with open(part, "rb") as f:
+                if i:
+                    f.readline()  # skip the repeated header
+                shutil.copyfileobj(f, out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/NDJSON/Parquet file with the logistic regression model.")
+    parser.add_argument("input", help="input file (.csv, .ndjson/.jsonl or .parquet)")
+    parser.add_argument("output", help="output file (.csv or .parquet)")
+    parser.add_argument("--model", default=None,
+                        help="registry version, pickled pipeline or compiled export dir (default: the active version)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--shards", type=int, default=None, help="number of shards (default: 4 x workers)")
+    parser.add_argument("--chunk-rows", type=int, default=50_000, help="rows held in memory per worker")
+    parser.add_argument("--top-k", type=int, default=0, help="also write the k largest feature contributions")
+    parser.add_argument("--id-column", default=None, help="input column copied to the output")
+    parser.add_argument("--keep-parts", action="store_true", help="keep per-shard part files after merging")
+    args = parser.parse_args(argv)
+
+    path = Path(args.input)
+    output = Path(args.output)
+    model_path = args.model if args.model and os.path.exists(args.model) \
+        else str(ModelRegistry().artifact_path(args.model))
+    if args.top_k and load_model(model_path)[1] is None:
+        parser.error(f"--top-k needs per-feature contributions, which {model_path} can't provide "
+                     "(only linear models that compile do)")
+    fmt = input_format(path)
+    n_shards = args.shards or 4 * args.workers
+    ext = ".parquet" if output.suffix == ".parquet" else ".csv"
+    parts_dir = output.with_name(output.name + ".parts")
+    parts_dir.mkdir(parents=True, exist_ok=True)
+
+    # The manifest pins the shard plan, so a resumed run cuts the input exactly
+    # like the run it is resuming.
+    manifest_path = parts_dir / "manifest.json"
+    stat = path.stat()
+    settings = {"input": str(path.resolve()), "size": stat.st_size, "mtime": stat.st_mtime,
+                "n_shards": n_shards, "top_k": args.top_k, "id_column": args.id_column,
+                "model": os.path.abspath(model_path)}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+        if manifest["settings"] != settings:
+            sys.exit(f"{parts_dir} belongs to a different run; remove it or use the same arguments.")
+    else:
+        manifest = {"settings": settings, "shards": plan_shards(path, fmt, n_shards)}
+        manifest_path.write_text(json.dumps(manifest))
+
+    shards = manifest["shards"]
+    part_paths = [parts_dir / f"part-{i:05d}{ext}" for i in range(len(shards))]
+    todo = [i for i, p in enumerate(part_paths) if not p.exists()]
+    print(f"{len(shards)} shards, {len(shards) - len(todo)} already done, {args.workers} workers, model {model_path}")
+
+    start = time.perf_counter()
+    n_rows = 0
+    failed = []
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+        futures = {
+            pool.submit(run_shard, i, str(path), fmt, shards[i], part_paths[i],
+                        args.chunk_rows, args.top_k, args.id_column): i
+            for i in todo
+        }
+        for future in as_completed(futures):
+            try:
+                _, rows = future.result()
+                n_rows += rows
+            except Exception as e:
+                failed.append(futures[future])
+                print(f"[ERROR] shard {futures[future]} failed: {e}")
+    elapsed = time.perf_counter() - start
+    print(f"scored {n_rows:,} rows in {elapsed:.1f}s ({n_rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    if failed:
+        sys.exit(f"{len(failed)} shard(s) failed; re-run the same command to resume.")
+
+    merge_parts(part_paths, output)
+    if not args.keep_parts:
+        shutil.rmtree(parts_dir)
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Record the BankFeatureEngineer settings of a model version, for /predict/raw.
+
+The notebook clips `balance` at the 99th percentile of the full dataset
+before the train/test split, so the bound is fitted on all rows and stored
+in the version's metadata.json under "feature_engineering", next to the
+model it was trained with.
+
+Usage:
+    python build_feature_engineer.py logreg-1mvp                         # fit on bank_data.load_bank_data()
+    python build_feature_engineer.py logreg-1mvp --balance-upper 13164.9
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from feature_engineering import BankFeatureEngineer
+from model_registry import METADATA_FILE, MODELS_DIR, ModelRegistry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("version", help="model version whose metadata.json is updated")
+    parser.add_argument("--root", default=MODELS_DIR)
+    parser.add_argument("--balance-upper", type=float, default=None,
+                        help="use this clip bound instead of fitting it on the raw data")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.version not in registry.versions():
+        parser.error(f"Unknown model {args.version!r}. Available: {registry.versions()}")
+
+    engineer = BankFeatureEngineer(balance_upper=args.balance_upper)
+    if args.balance_upper is None:
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+        from bank_data import load_bank_data
+
+        engineer.fit(load_bank_data())
+    else:
+        engineer.fit(None)
+
+    metadata = registry.metadata(args.version)
+    metadata["feature_engineering"] = {"balance_upper": engineer.balance_upper_}
+    (Path(args.root) / args.version / METADATA_FILE).write_text(json.dumps(metadata, indent=2) + "\n")
+    print(f"Recorded feature engineering of {args.version} (balance clipped at {engineer.balance_upper_})")
+
+
+if __name__ == "__main__":
+    main()
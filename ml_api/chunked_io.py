@@ -0,0 +1,232 @@
+"""
+Chunked readers for bulk scoring uploads.
+
+CSV and NDJSON bodies are cut on line boundaries as bytes arrive, so only
+about `chunk_rows` rows are ever parsed at once. Parquet keeps its metadata in
+a footer, so the upload is spooled to a temporary file (in memory while small)
+and then read back one record batch at a time.
+
+Results go through `spool_stream`, so a client that only starts reading once
+its upload is finished (most HTTP clients) can't stall the upload.
+"""
+import asyncio
+import io
+import json
+import tempfile
+
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+
+# Columns that must stay strings even when a chunk only holds numeric-looking
+# values (e.g. n_previous_contacts = "1", "2", ...).
+CATEGORICAL_COLUMNS = [
+    "job", "education", "default", "housing", "loan",
+    "months_since_previous_contact", "n_previous_contacts", "poutcome",
+]
+
+FORMATS = ("csv", "ndjson", "parquet")
+
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/jsonlines": "ndjson",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+}
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request is still being read.
+
+    The stock response listens for `http.disconnect` on `receive` while
+    streaming, which would steal body messages from `request.stream()`. Here
+    the body iterator owns `receive`; a client disconnect surfaces there.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def detect_format(content_type, default="csv"):
+    """Map a request Content-Type header to one of `FORMATS`."""
+    if not content_type:
+        return default
+    return CONTENT_TYPES.get(content_type.split(";")[0].strip().lower(), default)
+
+
+class LineChunker:
+    """
+    Accumulate raw bytes and hand back blocks of whole lines.
+
+    A block is released as soon as at least `chunk_rows` complete lines are
+    buffered, and is cut at the last newline received, so blocks hold between
+    `chunk_rows` and `chunk_rows` + one network read worth of rows.
+    """
+
+    def __init__(self, chunk_rows):
+        self.chunk_rows = chunk_rows
+        self._parts = []
+        self._lines = 0
+
+    def feed(self, data):
+        if not data:
+            return None
+        self._parts.append(data)
+        self._lines += data.count(b"\n")
+        if self._lines < self.chunk_rows:
+            return None
+        buffer = b"".join(self._parts)
+        cut = buffer.rfind(b"\n") + 1
+        block, rest = buffer[:cut], buffer[cut:]
+        self._parts = [rest] if rest else []
+        self._lines = 0
+        return block
+
+    def flush(self):
+        block = b"".join(self._parts)
+        self._parts = []
+        self._lines = 0
+        return block if block.strip() else None
+
+
+def _category(value):
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # an integer column with nulls comes back as float
+    return str(value)
+
+
+def categorical_as_str(frame, columns=CATEGORICAL_COLUMNS):
+    """
+    Make the categorical columns of `frame` strings, in place, as the model
+    was trained on them: `1` and `1.0` become "1", missing values stay
+    missing (never "None" or "nan"). Returns `frame`.
+    """
+    for column in columns:
+        if column in frame.columns:
+            frame[column] = pd.Series([_category(v) for v in frame[column]], index=frame.index, dtype=object)
+    return frame
+
+
+def _csv_frame(block, header):
+    dtype = {c: str for c in CATEGORICAL_COLUMNS if c in header}
+    return pd.read_csv(io.BytesIO(block), names=header, header=None, dtype=dtype)
+
+
+def _ndjson_frame(block):
+    records = [json.loads(line) for line in block.splitlines() if line.strip()]
+    return categorical_as_str(pd.DataFrame.from_records(records))
+
+
+def missing_values(frame, columns):
+    """`{column: position of its first missing value}` for the `columns` of `frame` that have any."""
+    missing = {}
+    for column in columns:
+        if column in frame.columns:
+            isna = frame[column].isna().to_numpy()
+            if isna.any():
+                missing[column] = int(isna.argmax())
+    return missing
+
+
+def _parse(block, fmt, header):
+    if fmt == "csv":
+        return run_in_threadpool(_csv_frame, block, header)
+    return run_in_threadpool(_ndjson_frame, block)
+
+
+async def iter_text_frames(byte_stream, fmt, chunk_rows):
+    """
+    Yield DataFrames of roughly `chunk_rows` rows from a CSV/NDJSON byte stream.
+
+    Parsing runs in the threadpool so large blocks don't stall the event loop.
+    """
+    chunker = LineChunker(chunk_rows)
+    header = None
+    pending = b""
+
+    async for data in byte_stream:
+        if fmt == "csv" and header is None:
+            # Hold bytes back until the header line is complete.
+            pending += data
+            if b"\n" not in pending:
+                continue
+            line, data = pending.split(b"\n", 1)
+            header = pd.read_csv(io.BytesIO(line), nrows=0).columns.to_list()
+            pending = b""
+        block = chunker.feed(data)
+        if block is not None:
+            yield await _parse(block, fmt, header)
+
+    if fmt == "csv" and header is None:
+        return
+    block = chunker.flush()
+    if block is not None:
+        yield await _parse(block, fmt, header)
+
+
+async def iter_parquet_frames(byte_stream, chunk_rows, columns=None, spool_bytes=8 * 1024 * 1024):
+    """Spool a Parquet upload to a temporary file and yield it batch by batch."""
+    import pyarrow.parquet as pq
+
+    with tempfile.SpooledTemporaryFile(max_size=spool_bytes) as spool:
+        async for data in byte_stream:
+            spool.write(data)
+        spool.seek(0)
+        parquet = pq.ParquetFile(spool)
+        if columns is not None:
+            columns = [c for c in columns if c in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield categorical_as_str(batch.to_pandas())
+
+
+async def spool_stream(chunks, spool_bytes=8 * 1024 * 1024, read_bytes=1024 * 1024):
+    """
+    Decouple producing response chunks from sending them.
+
+    `chunks` is drained by a background task into a spool file (in memory
+    while small), and the returned generator tails that file. If the client
+    isn't reading yet, the backlog lands on disk instead of blocking the
+    producer, which is still consuming the request body. The backlog is sent
+    back in pieces of at most `read_bytes`.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+    ready = asyncio.Event()
+    state = {"written": 0, "done": False}
+
+    async def produce():
+        try:
+            async for data in chunks:
+                spool.seek(state["written"])
+                spool.write(data)
+                state["written"] += len(data)
+                ready.set()
+        finally:
+            state["done"] = True
+            ready.set()
+
+    task = asyncio.create_task(produce())
+    sent = 0
+    try:
+        while True:
+            ready.clear()
+            if state["written"] > sent:
+                spool.seek(sent)
+                data = spool.read(min(state["written"] - sent, read_bytes))
+                sent += len(data)
+                yield data
+            elif state["done"]:
+                break
+            else:
+                await ready.wait()
+        await task
+    finally:
+        task.cancel()
+        spool.close()
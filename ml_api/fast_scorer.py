@@ -0,0 +1,289 @@
+"""
+Compiled scorer for the logistic regression pipeline.
+
+The fitted `StandardScaler` statistics are folded into the classifier
+coefficients and every one-hot category becomes a direct weight lookup, so a
+request can be scored straight from the parsed payload with NumPy instead of
+building a DataFrame and running the full `ColumnTransformer`.
+
+`save` / `load` store the folded weights without pickle: a `manifest.json`
+(feature names, category vocabularies, classes, intercept) next to one
+`.npy` file per weight array, which `load` memory-maps. Loading needs only
+NumPy, so the service doesn't have to import sklearn to start serving.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# pipeline_columns.py is shared with the other service in api_common/; the
+# Docker image copies it next to this file.
+sys.path.append(str(Path(__file__).resolve().parent.parent / "api_common"))
+
+from pipeline_columns import column_names, is_passthrough
+
+FORMAT_NAME = "compiled-logreg"
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+ARRAY_FILES = ("numeric_weights", "numeric_means", "category_weights")
+
+
+class CompiledScorer:
+    """Score rows with the folded weights of a fitted scaler/one-hot/logreg pipeline."""
+
+    def __init__(self, numeric_features, numeric_weights, categorical_features,
+                 category_weights, intercept, classes, numeric_means=None):
+        self.numeric_features = list(numeric_features)
+        self.numeric_weights = np.asarray(numeric_weights, dtype=float)
+        # Training means, used as the reference point for per-feature contributions.
+        self.numeric_means = (np.zeros(len(self.numeric_features)) if numeric_means is None
+                              else np.asarray(numeric_means, dtype=float))
+        self.categorical_features = list(categorical_features)
+        # One {category: weight} dict per categorical feature; unknown
+        # categories contribute 0, like OneHotEncoder(handle_unknown="ignore").
+        self.category_weights = [dict(w) for w in category_weights]
+        self.intercept = float(intercept)
+        self.classes = np.asarray(classes)
+
+    @property
+    def input_features(self):
+        return self.numeric_features + self.categorical_features
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Fold a fitted `preprocessor` + `classifier` pipeline into lookup tables."""
+        steps = getattr(pipeline, "named_steps", {})
+        if "preprocessor" not in steps or "classifier" not in steps:
+            raise ValueError("Expected a pipeline with 'preprocessor' and 'classifier' steps.")
+        preprocessor = steps["preprocessor"]
+        classifier = steps["classifier"]
+
+        if not hasattr(classifier, "coef_"):
+            raise ValueError(f"{type(classifier).__name__} is not a linear model and can't be compiled.")
+        if classifier.coef_.shape[0] != 1:
+            raise ValueError("Only binary logistic regression can be compiled.")
+        coef = classifier.coef_[0]
+        intercept = float(classifier.intercept_[0])
+
+        numeric_features, numeric_weights, numeric_means = [], [], []
+        categorical_features, category_weights = [], []
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop":
+                continue
+            columns = column_names(preprocessor, columns)
+            step_coef = coef[preprocessor.output_indices_[name]]
+            if is_passthrough(transformer):
+                # Unscaled columns (e.g. remainder="passthrough"): the weight applies to the raw value
+                numeric_features.extend(columns)
+                numeric_weights.extend(step_coef.tolist())
+                numeric_means.extend([0.0] * len(columns))
+                continue
+            step = transformer.steps[-1][1] if hasattr(transformer, "steps") else transformer
+
+            if hasattr(step, "categories_"):
+                if getattr(step, "drop_idx_", None) is not None:
+                    raise ValueError("OneHotEncoder with drop= is not supported.")
+                offset = 0
+                for column, categories in zip(columns, step.categories_):
+                    weights = step_coef[offset:offset + len(categories)]
+                    category_weights.append(zip(categories.tolist(), weights.tolist()))
+                    categorical_features.append(column)
+                    offset += len(categories)
+            elif hasattr(step, "scale_") or hasattr(step, "mean_"):
+                mean = step.mean_ if step.with_mean else np.zeros(len(columns))
+                scale = step.scale_ if step.with_std else np.ones(len(columns))
+                # w * (x - mean) / scale == (w / scale) * x - w * mean / scale
+                folded = step_coef / scale
+                intercept -= float(np.dot(folded, mean))
+                numeric_features.extend(columns)
+                numeric_weights.extend(folded.tolist())
+                numeric_means.extend(np.broadcast_to(mean, len(columns)).tolist())
+            else:
+                raise ValueError(f"Cannot compile transformer step {name!r}.")
+
+        return cls(numeric_features, numeric_weights, categorical_features,
+                   category_weights, intercept, classifier.classes_, numeric_means)
+
+    def save(self, directory):
+        """
+        Write the scorer to `directory` as `.npy` arrays plus `manifest.json`.
+
+        Everything is written to a sibling temporary directory that is then
+        renamed into place, so `directory` never holds the arrays of one export
+        and the manifest of another. An existing export is renamed aside just
+        before (a reader in between finds no export and falls back to the
+        pickle) and deleted afterwards.
+        """
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{directory.name}-", dir=directory.parent))
+        try:
+            self._write(tmp_dir)
+            os.chmod(tmp_dir, 0o755)
+            if directory.exists():
+                old = Path(tempfile.mkdtemp(prefix=f".{directory.name}-old-", dir=directory.parent))
+                os.replace(directory, old / directory.name)
+                os.replace(tmp_dir, directory)
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.replace(tmp_dir, directory)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return directory
+
+    def _write(self, directory):
+        categories = [list(w) for w in self.category_weights]
+        arrays = {
+            "numeric_weights": self.numeric_weights,
+            "numeric_means": self.numeric_means,
+            "category_weights": np.array([x for w in self.category_weights for x in w.values()], dtype=float),
+        }
+        for name, array in arrays.items():
+            with open(directory / f"{name}.npy", "wb") as f:
+                np.save(f, np.ascontiguousarray(array, dtype="<f8"), allow_pickle=False)
+
+        manifest = {
+            "format": FORMAT_NAME,
+            "format_version": FORMAT_VERSION,
+            "numeric_features": self.numeric_features,
+            "categorical_features": self.categorical_features,
+            "categories": categories,
+            "intercept": self.intercept,
+            "classes": self.classes.tolist(),
+            "arrays": {name: {"file": f"{name}.npy", "shape": list(a.shape)} for name, a in arrays.items()},
+        }
+        (directory / MANIFEST_FILE).write_text(json.dumps(manifest, indent=1) + "\n")
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Load a scorer written by `save`; arrays are memory-mapped unless `mmap=False`."""
+        directory = Path(directory)
+        manifest = json.loads((directory / MANIFEST_FILE).read_text())
+        if manifest.get("format") != FORMAT_NAME or manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"{directory} is {manifest.get('format')} v{manifest.get('format_version')}, "
+                f"expected {FORMAT_NAME} v{FORMAT_VERSION}."
+            )
+        arrays = {}
+        for name in ARRAY_FILES:
+            spec = manifest["arrays"][name]
+            array = np.load(directory / spec["file"], mmap_mode="r" if mmap else None, allow_pickle=False)
+            if list(array.shape) != spec["shape"]:
+                raise ValueError(f"{spec['file']} has shape {array.shape}, manifest says {spec['shape']}.")
+            arrays[name] = array
+
+        categories = manifest["categories"]
+        if sum(map(len, categories)) != len(arrays["category_weights"]):
+            raise ValueError("Category vocabularies don't match category_weights.npy.")
+        offsets = np.cumsum([0] + [len(c) for c in categories])
+        category_weights = [
+            zip(vocab, arrays["category_weights"][start:end].tolist())
+            for vocab, start, end in zip(categories, offsets[:-1], offsets[1:])
+        ]
+        return cls(manifest["numeric_features"], arrays["numeric_weights"],
+                   manifest["categorical_features"], category_weights,
+                   manifest["intercept"], manifest["classes"], arrays["numeric_means"])
+
+    @staticmethod
+    def columns_from_rows(rows, features):
+        """Pivot a list of row objects (or dicts) into one list per feature."""
+        if rows and isinstance(rows[0], dict):
+            return {f: [row[f] for row in rows] for f in features}
+        return {f: [getattr(row, f) for row in rows] for f in features}
+
+    def decision_function(self, columns):
+        """Log-odds for a mapping of feature name -> column values."""
+        if self.numeric_features:
+            X = np.column_stack([np.asarray(columns[f], dtype=float) for f in self.numeric_features])
+            z = X @ self.numeric_weights + self.intercept
+        else:
+            n = len(columns[self.categorical_features[0]])
+            z = np.full(n, self.intercept)
+        for feature, weights in zip(self.categorical_features, self.category_weights):
+            get = weights.get
+            z += np.fromiter((get(v, 0.0) for v in columns[feature]), dtype=float, count=len(z))
+        return z
+
+    def predict_proba(self, columns):
+        """Probability of the positive class."""
+        z = self.decision_function(columns)
+        return np.exp(-np.logaddexp(0.0, -z))
+
+    def score(self, columns):
+        """Return `(predictions, probabilities)` from a single pass over the data."""
+        z = self.decision_function(columns)
+        preds = self.classes[(z > 0).astype(int)]
+        return preds, np.exp(-np.logaddexp(0.0, -z))
+
+    def contributions(self, columns):
+        """
+        Per-feature log-odds contributions, shape `(n_rows, len(input_features))`.
+
+        Numeric features are measured against their training mean, categorical
+        features contribute the weight of their category (0 if unseen). The
+        row sums plus `base_value` equal `decision_function`.
+        """
+        n = len(columns[self.input_features[0]])
+        out = np.empty((n, len(self.input_features)))
+        for j, feature in enumerate(self.numeric_features):
+            x = np.asarray(columns[feature], dtype=float)
+            out[:, j] = (x - self.numeric_means[j]) * self.numeric_weights[j]
+        offset = len(self.numeric_features)
+        for j, (feature, weights) in enumerate(zip(self.categorical_features, self.category_weights)):
+            get = weights.get
+            out[:, offset + j] = np.fromiter((get(v, 0.0) for v in columns[feature]), dtype=float, count=n)
+        return out
+
+    @property
+    def base_value(self):
+        """Log-odds of a row at the numeric means with no known category."""
+        return self.intercept + float(np.dot(self.numeric_weights, self.numeric_means))
+
+    def verify(self, pipeline, X=None, atol=1e-9):
+        """
+        Check the compiled scorer against the original pipeline.
+
+        When no `X` is given, a probe frame is built that hits every known
+        category and spans +-3 standard deviations of every numeric feature.
+        Returns the largest absolute probability difference, raising
+        `ValueError` if it exceeds `atol` or any predicted class differs.
+        """
+        if X is None:
+            X = self._probe_frame(pipeline)
+        expected = pipeline.predict_proba(X)[:, 1]
+        columns = {f: X[f].to_numpy() for f in self.input_features}
+        preds, probs = self.score(columns)
+
+        max_diff = float(np.max(np.abs(probs - expected))) if len(X) else 0.0
+        if max_diff > atol or not np.array_equal(preds, pipeline.predict(X)):
+            raise ValueError(f"Compiled scorer disagrees with pipeline (max |dp| = {max_diff:.3g}).")
+        return max_diff
+
+    def _probe_frame(self, pipeline):
+        import pandas as pd
+
+        preprocessor = pipeline.named_steps["preprocessor"]
+        n = max([len(w) for w in self.category_weights] + [8])
+        data = {}
+        for name, transformer, columns in preprocessor.transformers_:
+            columns = column_names(preprocessor, columns)
+            if transformer == "drop" or is_passthrough(transformer):
+                # Alternate, so a wrongly compiled passthrough column changes the scores
+                for column in columns:
+                    data[column] = [i % 2 == 0 for i in range(n)]
+                continue
+            step = transformer.steps[-1][1] if hasattr(transformer, "steps") else transformer
+            if hasattr(step, "categories_"):
+                for column, categories in zip(columns, step.categories_):
+                    data[column] = [categories[i % len(categories)] for i in range(n)]
+            else:
+                mean = step.mean_ if step.with_mean else np.zeros(len(columns))
+                scale = step.scale_ if step.with_std else np.ones(len(columns))
+                spread = np.linspace(-3, 3, n)
+                for i, column in enumerate(columns):
+                    data[column] = mean[i] + spread * scale[i]
+        return pd.DataFrame(data)[list(preprocessor.feature_names_in_)]
@@ -0,0 +1,101 @@
+"""
+Feature engineering from raw bank-marketing columns.
+
+`BankFeatureEngineer` turns rows of the UCI `bank-full.csv` schema into the
+model's inputs, exactly as the training notebook does: `pdays` and
+`previous` binned with `pd.cut`, the `had_contact` / `is_single` /
+`uknown_contact` flags and `balance` clipped at its 99th percentile. The
+clip bound is learned in `fit` and recorded in the model version's
+metadata.json (see build_feature_engineer.py), so /predict/raw uses the
+value the model was trained with.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+RAW_COLUMNS = [
+    "age", "job", "marital", "education", "default", "balance", "housing",
+    "loan", "contact", "day", "campaign", "pdays", "previous", "poutcome",
+]
+
+MODEL_FEATURES = [
+    "age", "job", "education", "default", "balance", "housing", "loan", "day",
+    "campaign", "poutcome", "months_since_previous_contact", "n_previous_contacts",
+    "had_contact", "is_single", "uknown_contact",
+]
+
+# Same right-closed intervals and labels as the notebook's pd.cut calls
+PDAYS_BINS = np.array([-2, -1, 150, 230, 310, 380, 1000])
+PDAYS_LABELS = [
+    "No contact",
+    "0 - 5 months", "5 - 8 months", "8 - 11 months", "Around a year", "More than a year"
+]
+
+PREVIOUS_BINS = np.array([-1, 0, 1, 2, 3, 4, 5, 6, 300])
+PREVIOUS_LABELS = [
+    "No contact",
+    "1", "2", "3", "4", "5", "6",
+    "More than 6"
+]
+
+
+def _cut_codes(values, bins):
+    """`pd.cut(values, bins).codes` for right-closed `bins`: -1 outside the bins or missing."""
+    x = np.asarray(values, dtype=float)
+    codes = np.searchsorted(bins, x, side="left") - 1
+    codes[(codes < 0) | (codes >= len(bins) - 1)] = -1
+    return codes
+
+
+def _column(X, name):
+    # Keep DataFrame columns as they are (no copy to Python objects)
+    values = X[name]
+    return values if isinstance(values, pd.Series) else np.asarray(values)
+
+
+class BankFeatureEngineer(BaseEstimator, TransformerMixin):
+    """
+    Raw bank-marketing columns -> model input features.
+
+    Parameters
+    ----------
+    balance_quantile : float
+        Quantile of `balance` used as the upper clip bound when fitting.
+    balance_upper : float or None
+        Fixed clip bound; overrides `balance_quantile` when set.
+    """
+
+    def __init__(self, balance_quantile=0.99, balance_upper=None):
+        self.balance_quantile = balance_quantile
+        self.balance_upper = balance_upper
+
+    def fit(self, X, y=None):
+        if self.balance_upper is not None:
+            self.balance_upper_ = float(self.balance_upper)
+        else:
+            balance = np.asarray(X["balance"], dtype=float)
+            self.balance_upper_ = float(np.nanquantile(balance, self.balance_quantile))
+        return self
+
+    def transform(self, X):
+        """Accepts a DataFrame or any mapping of column name -> values."""
+        check_is_fitted(self, "balance_upper_")
+        missing = [c for c in RAW_COLUMNS if c not in X]
+        if missing:
+            raise ValueError(f"Missing raw columns: {missing}")
+
+        pdays_codes = _cut_codes(X["pdays"], PDAYS_BINS)
+        previous_codes = _cut_codes(X["previous"], PREVIOUS_BINS)
+        out = {name: _column(X, name) for name in MODEL_FEATURES[:10]}
+        out["balance"] = np.minimum(np.asarray(X["balance"], dtype=float), self.balance_upper_)
+        out["months_since_previous_contact"] = pd.Categorical.from_codes(pdays_codes, PDAYS_LABELS)
+        out["n_previous_contacts"] = pd.Categorical.from_codes(previous_codes, PREVIOUS_LABELS)
+        # The notebook compares the binned label, so missing pdays counts as contact
+        out["had_contact"] = pdays_codes != 0
+        out["is_single"] = np.asarray(_column(X, "marital") == "single")
+        out["uknown_contact"] = np.asarray(_column(X, "contact") == "unknown")
+        return pd.DataFrame(out, index=getattr(X, "index", None))
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(MODEL_FEATURES, dtype=object)
@@ -0,0 +1,120 @@
+"""
+Micro-batching of small /predict requests.
+
+Concurrent single-row requests each pay the per-call overhead of the scorer
+(and a threadpool hop). `MicroBatcher` holds rows for the same model for up
+to `max_wait_ms`, or until `max_rows` are waiting, scores them as one batch
+in the threadpool and hands every caller back its own slice. Requests that
+are already `max_rows` or larger skip the wait and are scored on their own.
+If a shared batch fails, each of its requests is scored again on its own,
+so only the request that caused the failure gets the error.
+"""
+import asyncio
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+
+class MicroBatcher:
+    """Coalesce `submit(key, rows)` calls that arrive close together into one `score(key, rows)` call."""
+
+    def __init__(self, score, max_rows=256, max_wait_ms=2.0):
+        self.score = score
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self._pending = {}  # key -> [(rows, future), ...]
+        self._counts = {}
+        self._timers = {}
+        # asyncio keeps only weak references to tasks; without these a batch
+        # could be collected mid-flight and its callers would never get an answer
+        self._tasks = set()
+        self.batches = self.requests = self.rows = 0
+        self.retries = 0  # failed shared batches whose requests were scored again one by one
+
+    @property
+    def enabled(self):
+        return self.max_wait > 0 and self.max_rows > 1
+
+    async def submit(self, key, rows):
+        """`(predictions, probabilities)` arrays for `rows`, scored as part of a shared batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self.enabled or len(rows) >= self.max_rows:
+            self._spawn(self._run(key, [(rows, future)]))
+            return await future
+
+        self._pending.setdefault(key, []).append((rows, future))
+        self._counts[key] = self._counts.get(key, 0) + len(rows)
+        if self._counts[key] >= self.max_rows:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        self._counts.pop(key, None)
+        batch = self._pending.pop(key, None)
+        if batch:
+            self._spawn(self._run(key, batch))
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def aclose(self):
+        """On shutdown: score the rows still waiting and wait for every batch in flight."""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, key, batch):
+        rows = [row for part, _ in batch for row in part]
+        self.batches += 1
+        self.requests += len(batch)
+        self.rows += len(rows)
+        try:
+            preds, probs = await run_in_threadpool(self.score, key, rows)
+        except Exception as e:
+            if len(batch) == 1:
+                _settle(batch[0][1], exception=e)
+                return
+            # Score each request on its own, so only the bad one gets the error
+            self.retries += 1
+            await asyncio.gather(*(self._run_alone(key, part, future) for part, future in batch))
+            return
+
+        bounds = np.cumsum([0] + [len(part) for part, _ in batch])
+        for (_, future), start, end in zip(batch, bounds[:-1], bounds[1:]):
+            _settle(future, (preds[start:end], probs[start:end]))
+
+    async def _run_alone(self, key, rows, future):
+        try:
+            _settle(future, await run_in_threadpool(self.score, key, rows))
+        except Exception as e:
+            _settle(future, exception=e)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "max_rows": self.max_rows,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "retries": self.retries,
+            "requests_per_batch": self.requests / self.batches if self.batches else None,
+        }
+
+
+def _settle(future, result=None, exception=None):
+    if future.done():  # the client may have gone away
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
@@ -0,0 +1,416 @@
+"""
+Versioned model registry with hot reload.
+
+Layout on disk:
+
+    models/
+        ACTIVE                  # name of the version served by default
+        <version>/RELOAD        # token rewritten by `reload`, so every process re-reads the version
+        <version>/model.pkl     # fitted sklearn pipeline
+        <version>/compiled/     # pickle-free export of a linear pipeline (fast_scorer.CompiledScorer.save)
+        <version>/metadata.json # features, sklearn version, training window, metrics, ...
+
+A version with a `compiled/` export is loaded from it -- memory-mapped
+NumPy arrays and JSON, no unpickling and no sklearn import. Other versions
+(tree models, ...) are loaded from `model.pkl`, and so is a version whose
+`model.pkl` was replaced after it was exported (the export records a hash
+of the pickle it came from); `reload` re-exports such a version.
+
+Loaded versions are kept in memory in an LRU cache (the active one is never
+evicted). The ACTIVE file and the RELOAD tokens of loaded versions are
+re-checked at most every `poll_interval` seconds, so writing ACTIVE -- or
+calling `activate` or `reload` in any process -- switches or re-reads the
+model in every process sharing the directory (all serve.py workers) without
+a restart. This is eventually consistent: until each process has polled,
+it keeps serving what it had. Requests hold on to the `ModelEntry` they
+started with, so a swap never mixes two models within one request.
+
+Usage:
+    python model_registry.py list
+    python model_registry.py register rf.pkl --version rf-v1 --training-window 2008-05-01 2009-02-01 --metric roc_auc=0.68
+    python model_registry.py activate rf-v1
+    python model_registry.py export logreg-1mvp --data ../test_data.csv
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fast_scorer import FORMAT_NAME, FORMAT_VERSION, MANIFEST_FILE, CompiledScorer
+
+MODELS_DIR = os.getenv("MODELS_DIR", "models")
+ARTIFACT_FILE = "model.pkl"
+COMPILED_DIR = "compiled"
+METADATA_FILE = "metadata.json"
+ACTIVE_FILE = "ACTIVE"
+RELOAD_FILE = "RELOAD"
+VERSION_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+# Incremented on every load, so two loads of one version can be told apart
+_generations = itertools.count(1)
+
+
+class ModelEntry:
+    """
+    One loaded version: the pipeline and/or its compiled scorer, and metadata.
+    Versions loaded from a `compiled/` export have no pipeline.
+    """
+
+    def __init__(self, version, pipeline, metadata, scorer=None):
+        self.version = version
+        self.generation = next(_generations)
+        self.pipeline = pipeline
+        self.metadata = metadata
+        self.scorer = scorer
+        self.reload_token = None  # content of <version>/RELOAD when this entry was loaded
+        if scorer is None:
+            # Only linear pipelines compile; tree models (XGBoost, random forest)
+            # are served by the pipeline itself.
+            try:
+                self.scorer = CompiledScorer.from_pipeline(pipeline)
+                self.scorer.verify(pipeline)
+            except Exception as e:
+                print(f"[DEBUG] Model {version}: compiled scorer not used ({e})")
+
+    @property
+    def features(self):
+        if self.metadata.get("features"):
+            return self.metadata["features"]
+        if self.pipeline is not None:
+            return list(self.pipeline.feature_names_in_)
+        return self.scorer.input_features
+
+    def score(self, X):
+        """`(predictions, probabilities)` for a DataFrame or mapping of feature columns."""
+        if self.scorer is not None:
+            return self.scorer.score(X)
+        import pandas as pd
+
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame({f: X[f] for f in self.features})
+        return self.pipeline.predict(X), self.pipeline.predict_proba(X)[:, 1]
+
+
+class ModelRegistry:
+    """Directory-backed registry of model versions with an in-memory LRU cache."""
+
+    def __init__(self, root=MODELS_DIR, max_loaded=3, poll_interval=5.0):
+        self.root = Path(root)
+        self.max_loaded = max(1, max_loaded)
+        self.poll_interval = poll_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._active = None
+        self._active_mtime = None
+        self._checked_at = 0.0
+        self._listeners = []
+
+    # -------------------------------------------------
+    # Versions and metadata
+    # -------------------------------------------------
+
+    def _path(self, version):
+        if not isinstance(version, str) or not VERSION_PATTERN.fullmatch(version):
+            raise ValueError(f"Invalid model version name: {version!r}")
+        return self.root / version
+
+    def versions(self):
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            p.name for p in self.root.iterdir()
+            if (p / ARTIFACT_FILE).exists() or (p / COMPILED_DIR / MANIFEST_FILE).exists()
+        )
+
+    def metadata(self, version):
+        path = self._path(version) / METADATA_FILE
+        return json.loads(path.read_text()) if path.exists() else {}
+
+    def artifact_path(self, version=None):
+        """The `compiled/` export of `version` if it has an up-to-date one, else its `model.pkl`."""
+        version = version or self.active_version()
+        directory = self._path(version)
+        if (directory / COMPILED_DIR / MANIFEST_FILE).exists():
+            if not self._export_is_stale(version):
+                return directory / COMPILED_DIR
+            print(f"[DEBUG] Model {version}: {ARTIFACT_FILE} changed since it was exported; not using {COMPILED_DIR}/")
+        if (directory / ARTIFACT_FILE).exists():
+            return directory / ARTIFACT_FILE
+        raise KeyError(f"Unknown model {version!r}. Available: {self.versions()}")
+
+    def _export_is_stale(self, version):
+        """Whether `model.pkl` was replaced after the `compiled/` export was written from it."""
+        pickle_path = self._path(version) / ARTIFACT_FILE
+        source = self.metadata(version).get("compiled", {}).get("source_sha256")
+        # Exports that predate the recorded hash are trusted, as before
+        return source is not None and pickle_path.exists() and _sha256(pickle_path) != source
+
+    def active_version(self):
+        """Version named in ACTIVE, re-read when the file changes (checked every `poll_interval` s)."""
+        self._poll()
+        if self._active is None:
+            raise KeyError(f"No model versions in {self.root}")
+        return self._active
+
+    def _reload_token(self, version):
+        try:
+            return (self._path(version) / RELOAD_FILE).read_text().strip()
+        except FileNotFoundError:
+            return None
+
+    def _poll(self):
+        """Pick up ACTIVE and RELOAD changes made by other processes, at most every `poll_interval` s."""
+        now = time.monotonic()
+        if self._active is not None and now - self._checked_at < self.poll_interval:
+            return
+        self._checked_at = now
+        path = self.root / ACTIVE_FILE
+        try:
+            mtime = path.stat().st_mtime_ns
+            if mtime != self._active_mtime:
+                self._active = path.read_text().strip()
+                self._active_mtime = mtime
+        except FileNotFoundError:
+            versions = self.versions()
+            self._active = versions[-1] if versions else None
+
+        # Drop versions reloaded elsewhere; the next `get` reads them again
+        with self._lock:
+            loaded = list(self._entries)
+        tokens = {version: self._reload_token(version) for version in loaded}
+        stale = []
+        with self._lock:
+            for version, token in tokens.items():
+                entry = self._entries.get(version)
+                if entry is not None and entry.reload_token != token:
+                    del self._entries[version]
+                    stale.append(version)
+        for version in stale:
+            print(f"[DEBUG] Model {version} was reloaded by another process; re-reading it")
+            for callback in self._listeners:
+                callback(version)
+
+    def describe(self):
+        active = self.active_version()
+        return [
+            {"version": v, "active": v == active, "loaded": v in self._entries, **self.metadata(v)}
+            for v in self.versions()
+        ]
+
+    # -------------------------------------------------
+    # Loading
+    # -------------------------------------------------
+
+    def get(self, version=None):
+        """Loaded `ModelEntry` for `version` (the active one if None)."""
+        self._poll()
+        version = version or self.active_version()
+        with self._lock:
+            entry = self._entries.get(version)
+            if entry is not None:
+                self._entries.move_to_end(version)
+                return entry
+
+        # Load outside the lock so other versions keep serving meanwhile
+        entry = self._load(version)
+        with self._lock:
+            entry = self._entries.setdefault(version, entry)
+            self._entries.move_to_end(version)
+            self._evict()
+        return entry
+
+    def _load(self, version):
+        path = self.artifact_path(version)
+        # Read before the artifact, so a reload that lands mid-load is seen on the next poll
+        token = self._reload_token(version)
+        print(f"[DEBUG] Loading model {version} from {path}")
+        if path.is_dir():
+            entry = ModelEntry(version, None, self.metadata(version), scorer=CompiledScorer.load(path))
+        else:
+            import joblib
+
+            entry = ModelEntry(version, joblib.load(path), self.metadata(version))
+        entry.reload_token = token
+        return entry
+
+    def _evict(self):
+        active = self._active
+        for version in list(self._entries):
+            if len(self._entries) <= self.max_loaded:
+                break
+            if version != active:
+                del self._entries[version]
+                print(f"[DEBUG] Evicted model {version} from memory")
+
+    def on_reload(self, callback):
+        """Call `callback(version)` after a version was reloaded, here or (once polled) in another process."""
+        self._listeners.append(callback)
+
+    def reload(self, version=None):
+        """
+        Re-read a version from disk (e.g. after its artifact was replaced) and
+        swap it in. A `compiled/` export older than a replaced `model.pkl` is
+        re-exported first. The version is loaded here before the new RELOAD
+        token tells other processes to re-read it, so a broken artifact raises.
+        """
+        version = version or self.active_version()
+        if (self._path(version) / COMPILED_DIR / MANIFEST_FILE).exists() and self._export_is_stale(version):
+            try:
+                self.export(version)
+            except ValueError as e:
+                # The stale export stays unused; the pickle is served instead
+                print(f"[DEBUG] Model {version}: no compiled export ({e})")
+        entry = self._load(version)
+        entry.reload_token = f"{time.time_ns()}-{os.getpid()}"
+        path = self._path(version) / RELOAD_FILE
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(entry.reload_token + "\n")
+        os.replace(tmp, path)
+        with self._lock:
+            self._entries[version] = entry
+            self._entries.move_to_end(version)
+            self._evict()
+        for callback in self._listeners:
+            callback(version)
+        return entry
+
+    def activate(self, version):
+        """
+        Make `version` the default. It is loaded (and its scorer verified)
+        before ACTIVE is rewritten, so a broken artifact never goes live.
+        Other processes switch once they poll ACTIVE.
+        """
+        entry = self.get(version)
+        path = self.root / ACTIVE_FILE
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(version + "\n")
+        os.replace(tmp, path)
+        self._active = version
+        self._active_mtime = path.stat().st_mtime_ns
+        return entry
+
+    # -------------------------------------------------
+    # Registration
+    # -------------------------------------------------
+
+    def register(self, pipeline, version, training_window=None, metrics=None, activate=False, **extra):
+        """
+        Save a fitted pipeline as a new version with its metadata, plus a
+        `compiled/` export when the pipeline compiles (see `export`).
+        """
+        import joblib
+        import sklearn
+
+        directory = self._path(version)
+        if (directory / ARTIFACT_FILE).exists():
+            raise ValueError(f"Model version {version!r} already exists")
+        directory.mkdir(parents=True, exist_ok=True)
+
+        metadata = {
+            "version": version,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "estimator": type(pipeline[-1] if hasattr(pipeline, "steps") else pipeline).__name__,
+            "features": [str(f) for f in getattr(pipeline, "feature_names_in_", [])],
+            "sklearn_version": sklearn.__version__,
+            "training_window": training_window,
+            "metrics": metrics or {},
+            **extra,
+        }
+        tmp = directory / (ARTIFACT_FILE + ".tmp")
+        joblib.dump(pipeline, tmp)
+        (directory / METADATA_FILE).write_text(json.dumps(metadata, indent=2) + "\n")
+        os.replace(tmp, directory / ARTIFACT_FILE)
+        try:
+            self.export(version)
+        except ValueError as e:
+            print(f"[DEBUG] Model {version}: no compiled export ({e})")
+        if activate:
+            self.activate(version)
+        return self.metadata(version)
+
+    def export(self, version, X=None, atol=1e-9):
+        """
+        Write the pickle-free `compiled/` export of a version's linear pipeline.
+
+        The export is read back from disk and checked against the pickled
+        pipeline (on a probe frame covering every category, and on `X` if
+        given) before it is recorded in the metadata; raises `ValueError` if
+        they disagree or the pipeline can't be compiled.
+        """
+        import joblib
+
+        directory = self._path(version)
+        pipeline = joblib.load(directory / ARTIFACT_FILE)
+        out = directory / COMPILED_DIR
+        CompiledScorer.from_pipeline(pipeline).save(out)
+        try:
+            loaded = CompiledScorer.load(out)
+            max_diff = loaded.verify(pipeline, atol=atol)
+            if X is not None:
+                max_diff = max(max_diff, loaded.verify(pipeline, X[list(pipeline.feature_names_in_)], atol=atol))
+        except ValueError:
+            (out / MANIFEST_FILE).unlink()
+            raise
+
+        metadata = self.metadata(version)
+        metadata["compiled"] = {"format": FORMAT_NAME, "format_version": FORMAT_VERSION, "max_abs_diff": max_diff,
+                                "source_sha256": _sha256(directory / ARTIFACT_FILE)}
+        (directory / METADATA_FILE).write_text(json.dumps(metadata, indent=2) + "\n")
+        return max_diff
+
+
+def _sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the model registry.")
+    parser.add_argument("--root", default=MODELS_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    register = commands.add_parser("register", help="add a pickled pipeline as a new version")
+    register.add_argument("artifact")
+    register.add_argument("--version", required=True)
+    register.add_argument("--training-window", nargs=2, metavar=("START", "END"))
+    register.add_argument("--metric", action="append", default=[], metavar="NAME=VALUE")
+    register.add_argument("--activate", action="store_true")
+    activate = commands.add_parser("activate", help="make a version the default")
+    activate.add_argument("version")
+    export = commands.add_parser("export", help="write and check the pickle-free export of a version")
+    export.add_argument("version")
+    export.add_argument("--data", help="CSV of model features to compare the export against the pickle on")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "list":
+        for info in registry.describe():
+            print(("* " if info["active"] else "  ") + info["version"],
+                  info.get("estimator", ""), info.get("metrics", {}))
+    elif args.command == "register":
+        window = dict(zip(["start", "end"], args.training_window)) if args.training_window else None
+        metrics = {k: float(v) for k, v in (m.split("=", 1) for m in args.metric)}
+        import joblib
+
+        metadata = registry.register(joblib.load(args.artifact), args.version, window, metrics, args.activate)
+        print(json.dumps(metadata, indent=2))
+    elif args.command == "activate":
+        registry.activate(args.version)
+        print(f"{args.version} is now active")
+    elif args.command == "export":
+        import pandas as pd
+
+        X = pd.read_csv(args.data) if args.data else None
+        max_diff = registry.export(args.version, X)
+        print(f"Exported {registry.artifact_path(args.version)} (max |dp| vs pickle = {max_diff:.3g})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Bounded LRU + TTL cache of single-row predictions for /predict.
+
+Dashboards rescore the same customer rows on every rerun, so each row's
+result is cached under `(model version, load generation, row values)`. The
+row values are the validated `InputData` fields in a fixed feature order,
+so payloads that differ only in key order or in how a value was spelled
+(`"35"` vs `35`) share an entry. The load generation changes every time the
+registry (re)loads a version from disk, so a reloaded artifact never serves
+a stale cached result; `invalidate` drops the old entries right away.
+"""
+import threading
+import time
+from collections import OrderedDict
+from operator import attrgetter
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of `(prediction, probability)` per row, with a TTL in seconds."""
+
+    def __init__(self, max_size=50_000, ttl=600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.expired = self.evictions = self.invalidated = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    @staticmethod
+    def keys(entry, rows, features):
+        """One key per row object for the loaded model `entry`."""
+        prefix = (entry.version, entry.generation)
+        values = attrgetter(*features)
+        return [prefix + values(row) for row in rows]
+
+    def get_many(self, keys):
+        """Cached `(prediction, probability)` per key, or None for misses."""
+        if not self.enabled:
+            self.misses += len(keys)
+            return [None] * len(keys)
+        now = time.monotonic()
+        out = []
+        with self._lock:
+            data = self._data
+            for key in keys:
+                item = data.get(key)
+                if item is not None and item[2] < now:
+                    del data[key]
+                    self.expired += 1
+                    item = None
+                if item is None:
+                    self.misses += 1
+                    out.append(None)
+                else:
+                    data.move_to_end(key)
+                    self.hits += 1
+                    out.append(item[:2])
+        return out
+
+    def put_many(self, keys, predictions, probabilities):
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            data = self._data
+            for key, pred, prob in zip(keys, predictions, probabilities):
+                data[key] = (pred, prob, expires)
+                data.move_to_end(key)
+            while len(data) > self.max_size:
+                data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, version=None):
+        """Drop every entry for `version` (all entries if None); returns how many."""
+        with self._lock:
+            if version is None:
+                stale = list(self._data)
+            else:
+                stale = [key for key in self._data if key[0] == version]
+            for key in stale:
+                del self._data[key]
+            self.invalidated += len(stale)
+        return len(stale)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidated": self.invalidated,
+        }
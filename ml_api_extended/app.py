@@ -1,31 +1,132 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
+from prometheus_client import Histogram
+from prometheus_client.core import GaugeMetricFamily
+from pydantic import BaseModel, model_validator
+import asyncio
 import os
+import sys
+import threading
 from typing import List, Literal, Optional
-import joblib
+import anyio
 import numpy as np
 import pandas as pd
-import requests
-import shap
-from sklearn.metrics import roc_auc_score, precision_recall_curve, auc
+from pathlib import Path
+
+# serve.py, api_metrics.py and worker_health.py are shared with the other
+# service in api_common/; the Docker image copies them next to this file.
+sys.path.append(str(Path(__file__).resolve().parent.parent / "api_common"))
+
+from api_metrics import (
+    LATENCY_BUCKETS, PrometheusMiddleware, child, collect_on_scrape, exposition, observe_rows, observe_validation, stage
+)
+from linear_explainer import LinearShapExplainer
+from metrics_engine import MetricsState, merge_states
+from profit_optimizer import C_FN, C_FP, downsample, optimal_threshold, threshold_curve
+from nocodb_client import NocoDBClient
+from worker_health import WorkerHealth
 
 # =====================================================
 # CONFIG
 # =====================================================
 
 # Replace these with your NoCoDB API details
-NOCO_API_URL = "https://dun3co-sdc-nocodb.hf.space/api/v2/tables/m39a8axnn3980w9/records"
-NOCO_VIEW_ID = "vwjuv5jnaet9npuu"
+NOCO_API_URL = os.getenv("NOCODB_API_URL", "https://dun3co-sdc-nocodb.hf.space/api/v2/tables/m39a8axnn3980w9/records")
+NOCO_VIEW_ID = os.getenv("NOCODB_VIEW_ID", "vwjuv5jnaet9npuu")
 NOCO_API_TOKEN = os.getenv("NOCODB_TOKEN")
 
-HEADERS = {"xc-token": NOCO_API_TOKEN}
+# Fetched pages are cached on disk for NOCODB_CACHE_TTL seconds, then revalidated by ETag
+NOCO_CACHE_DIR = os.getenv("NOCODB_CACHE_DIR", ".nocodb_cache")
+NOCO_CACHE_TTL = float(os.getenv("NOCODB_CACHE_TTL", "300"))
+
+NOCODB_FETCH_SECONDS = Histogram("api_nocodb_fetch_seconds", "Time to get one NocoDB page, by where it came from.",
+                                 ["source"], buckets=LATENCY_BUCKETS)
+
+noco = NocoDBClient(
+    NOCO_API_URL,
+    token=NOCO_API_TOKEN,
+    view_id=NOCO_VIEW_ID,
+    cache_dir=NOCO_CACHE_DIR,
+    cache_ttl=NOCO_CACHE_TTL,
+    on_fetch=lambda source, seconds: child(NOCODB_FETCH_SECONDS, source).observe(seconds),
+)
+
+# Fixed background sample for SHAP; bump the file name to version a new one
+SHAP_BACKGROUND_PATH = os.getenv("SHAP_BACKGROUND_PATH", "shap_background_v1.csv")
 
 # =====================================================
 # MODEL LOADING
 # =====================================================
 
-model = joblib.load("model_1mvp.pkl")
-app = FastAPI(title="Logistic Regression API 2")
+# Unpickling the pipeline imports sklearn/scipy, which is most of the cold
+# start. It is loaded on first use instead of at import: warmed in a
+# background thread once the server is up (or before fork under serve.py).
+_model_state = None
+_model_lock = threading.Lock()
+
+def load_model():
+    """Return `(model, explainer)`, loading them on the first call."""
+    global _model_state
+    if _model_state is None:
+        with _model_lock:
+            if _model_state is None:
+                import joblib
+
+                model = joblib.load("model_1mvp.pkl")
+                # Closed-form linear SHAP, built once. Falls back to shap.Explainer per
+                # request if the model isn't a linear pipeline or the background is missing.
+                try:
+                    explainer = LinearShapExplainer.from_file(model, SHAP_BACKGROUND_PATH)
+                except Exception as e:
+                    print(f"[WARN] Linear SHAP explainer disabled: {e}")
+                    explainer = None
+                _model_state = (model, explainer)
+    return _model_state
+
+def _preprocess(model, X, endpoint):
+    """Split a pipeline into `(classifier, transformed X)`, timing the preprocessing."""
+    if not hasattr(model, "named_steps"):
+        return model, X
+    with stage(endpoint, "preprocessing"):
+        return model[-1], model[:-1].transform(X)
+
+def _warm_up():
+    try:
+        load_model()
+    except Exception as e:
+        print(f"[WARN] Model warm-up failed, will retry on first request: {e}")
+
+# Reported per worker by /health when running under serve.py
+worker_health = WorkerHealth(lambda: {
+    "model": "loading" if _model_state is None else "ready",
+    "explainer": None if _model_state is None else ("linear" if _model_state[1] is not None else "shap"),
+    "nocodb": dict(noco.stats),
+})
+
+@asynccontextmanager
+async def lifespan(app):
+    await worker_health.start()
+    if _model_state is None:
+        asyncio.get_running_loop().run_in_executor(None, _warm_up)
+    yield
+    await worker_health.stop()
+    await noco.aclose()
+
+app = FastAPI(title="Logistic Regression API 2", lifespan=lifespan)
+app.state.warm_up = load_model
+app.add_middleware(PrometheusMiddleware)
+
+@collect_on_scrape
+def model_metrics():
+    info = GaugeMetricFamily("api_model_info", "Served model and SHAP explainer; 0 until loaded.",
+                             labels=["model", "explainer", "background"])
+    explainer = None if _model_state is None else _model_state[1]
+    info.add_metric(["model_1mvp.pkl",
+                     "loading" if _model_state is None else ("linear" if explainer is not None else "shap"),
+                     explainer.version if explainer is not None else ""],
+                    0 if _model_state is None else 1)
+    yield info
 
 # =====================================================
 # DATA SCHEMAS
@@ -51,24 +152,61 @@ class InputData(BaseModel):
 class BatchInputData(BaseModel):
     data: List[InputData]
 
+class LabelledInputData(InputData):
+    y: bool
+
+class LabelledBatchInputData(BaseModel):
+    data: List[LabelledInputData]
+
+# Column-oriented batch: one array per feature. Each list is validated as a
+# whole by pydantic-core instead of building one InputData object per row.
+class ColumnarInputData(BaseModel):
+    age: List[int]
+    balance: List[float]
+    day: List[int]
+    campaign: List[int]
+    job: List[str]
+    education: List[str]
+    default: List[Literal["yes", "no", "unknown"]]
+    housing: List[Literal["yes", "no", "unknown"]]
+    loan: List[Literal["yes", "no", "unknown"]]
+    months_since_previous_contact: List[str]
+    n_previous_contacts: List[str]
+    poutcome: List[str]
+    had_contact: List[bool]
+    is_single: List[bool]
+    uknown_contact: List[bool]
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        lengths = {name: len(values) for name, values in self}
+        if len(set(lengths.values())) > 1:
+            raise ValueError(f"All feature columns must have the same length, got {lengths}")
+        return self
+
+    def __len__(self):
+        return len(self.age)
+
 # =====================================================
 # HEALTH CHECK
 # =====================================================
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return worker_health.report()
 
 # =====================================================
 # NOCODB DATA FETCHING
 # =====================================================
 
 def fetch_test_data(limit: int = 100):
-    """Fetch test or sample data from NoCoDB view."""
-    params = {"offset": 0, "limit": limit, "viewId": NOCO_VIEW_ID}
-    res = requests.get(NOCO_API_URL, headers=HEADERS, params=params)
-    res.raise_for_status()
-    data = res.json()["list"]
+    """
+    Fetch test or sample data from NoCoDB view.
+
+    Called from sync endpoints (which run in the threadpool); the request is
+    handed to the event loop that owns the pooled NocoDB session.
+    """
+    data = anyio.from_thread.run(noco.fetch_records, limit)
     return pd.DataFrame(data)
 
 # =====================================================
@@ -77,11 +215,39 @@ def fetch_test_data(limit: int = 100):
 
 @app.post("/predict")
 def predict(batch: BatchInputData):
+    observe_validation("/predict")
+    observe_rows("/predict", len(batch.data))
+    try:
+        model, _ = load_model()
+        with stage("/predict", "dataframe"):
+            X = pd.DataFrame([item.dict() for item in batch.data])
+        classifier, X = _preprocess(model, X, "/predict")
+        with stage("/predict", "predict_proba"):
+            preds = classifier.predict(X)
+            probs = classifier.predict_proba(X)[:, 1]
+        return {
+            "predictions": preds.tolist(),
+            "probabilities": probs.tolist()
+        }
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+@app.post("/predict/columnar")
+def predict_columnar(batch: ColumnarInputData):
+    """Score a column-oriented batch and return predictions/probabilities as arrays."""
+    observe_validation("/predict/columnar")
+    observe_rows("/predict/columnar", len(batch))
     try:
-        X = pd.DataFrame([item.dict() for item in batch.data])
-        preds = model.predict(X)
-        probs = model.predict_proba(X)[:, 1]
+        model, _ = load_model()
+        with stage("/predict/columnar", "dataframe"):
+            X = pd.DataFrame(batch.dict())
+        classifier, X = _preprocess(model, X, "/predict/columnar")
+        with stage("/predict/columnar", "predict_proba"):
+            preds = classifier.predict(X)
+            probs = classifier.predict_proba(X)[:, 1]
         return {
+            "n_rows": len(batch),
             "predictions": preds.tolist(),
             "probabilities": probs.tolist()
         }
@@ -94,15 +260,27 @@ def predict(batch: BatchInputData):
 # =====================================================
 
 @app.post("/explain")
-def explain(batch: Optional[BatchInputData] = None, limit: int = 100):
-    """Generate SHAP values either from provided data or from NoCoDB test data."""
+def explain(batch: Optional[BatchInputData] = None, limit: int = 100,
+            background: Literal["fixed", "batch"] = "fixed"):
+    """
+    Generate SHAP values either from provided data or from NoCoDB test data.
+
+    `background="fixed"` measures against the versioned background sample
+    loaded at startup; `background="batch"` uses the data itself, as the
+    per-request shap.Explainer used to.
+    """
+    observe_validation("/explain")
     try:
+        model, explainer = load_model()
         if batch:
-            X = pd.DataFrame([item.dict() for item in batch.data])
+            with stage("/explain", "dataframe"):
+                X = pd.DataFrame([item.dict() for item in batch.data])
             source = "client batch"
         else:
-            X = fetch_test_data(limit=limit)
+            with stage("/explain", "nocodb_fetch"):
+                X = fetch_test_data(limit=limit)
             source = f"NoCoDB (limit={limit})"
+        observe_rows("/explain", len(X))
 
         print(f"[DEBUG] SHAP explain called using {source} | shape={X.shape} | cols={list(X.columns)}")
 
@@ -112,34 +290,46 @@ def explain(batch: Optional[BatchInputData] = None, limit: int = 100):
             print(f"[DEBUG] Dropping columns not used for prediction: {drop_cols}")
             X = X.drop(columns=drop_cols)
 
-        # Handle pipelines correctly
-        if hasattr(model, "named_steps"):
-            preprocessor = model.named_steps["preprocessor"]
-            classifier = model.named_steps["classifier"]
+        with stage("/explain", "shap"):
+            if explainer is not None:
+                shap_summary = explainer.summary(X, background=background)
+            elif hasattr(model, "named_steps"):
+                # Handle pipelines correctly
+                preprocessor = model.named_steps["preprocessor"]
+                classifier = model.named_steps["classifier"]
 
-            X_transformed = preprocessor.transform(X)
-            feature_names = preprocessor.get_feature_names_out()
+                X_transformed = preprocessor.transform(X)
+                feature_names = preprocessor.get_feature_names_out()
 
-            print(f"[DEBUG] Transformed shape: {X_transformed.shape} | n_features={len(feature_names)}")
+                print(f"[DEBUG] Transformed shape: {X_transformed.shape} | n_features={len(feature_names)}")
 
-            explainer = shap.Explainer(classifier, X_transformed)
-            shap_values = explainer(X_transformed)
+                import shap
 
-            shap_summary = pd.DataFrame({
-                "feature": feature_names,
-                "mean_abs_shap": np.abs(shap_values.values).mean(axis=0)
-            }).sort_values("mean_abs_shap", ascending=False)
-        else:
-            # If model is not a pipeline
-            explainer = shap.Explainer(model, X)
-            shap_values = explainer(X)
-            shap_summary = pd.DataFrame({
-                "feature": X.columns,
-                "mean_abs_shap": np.abs(shap_values.values).mean(axis=0)
-            }).sort_values("mean_abs_shap", ascending=False)
+                shap_explainer = shap.Explainer(classifier, X_transformed)
+                shap_values = shap_explainer(X_transformed)
+
+                shap_summary = pd.DataFrame({
+                    "feature": feature_names,
+                    "mean_abs_shap": np.abs(shap_values.values).mean(axis=0)
+                }).sort_values("mean_abs_shap", ascending=False)
+            else:
+                # If model is not a pipeline
+                import shap
+
+                shap_explainer = shap.Explainer(model, X)
+                shap_values = shap_explainer(X)
+                shap_summary = pd.DataFrame({
+                    "feature": X.columns,
+                    "mean_abs_shap": np.abs(shap_values.values).mean(axis=0)
+                }).sort_values("mean_abs_shap", ascending=False)
 
         print(f"[DEBUG] SHAP summary created successfully with {len(shap_summary)} features.")
-        return {"n_samples": len(X), "shap_summary": shap_summary.to_dict(orient="records")}
+        return {
+            "n_samples": len(X),
+            "background": background if explainer is not None else "batch",
+            "background_version": explainer.version if explainer is not None and background == "fixed" else None,
+            "shap_summary": shap_summary.to_dict(orient="records")
+        }
 
     except Exception as e:
         import traceback
@@ -148,73 +338,174 @@ def explain(batch: Optional[BatchInputData] = None, limit: int = 100):
         return {"error": str(e), "trace": traceback.format_exc()}
 
 
+@app.post("/explain/rows")
+def explain_rows(batch: BatchInputData, top_k: int = 3,
+                 background: Literal["fixed", "batch"] = "fixed"):
+    """
+    Per-row reason codes: the top-k input features behind each row's score.
+
+    One-hot contributions are summed back to the original feature, so a row
+    gets e.g. `poutcome = success (+1.2)` rather than `cat__poutcome_success`.
+    """
+    observe_validation("/explain/rows")
+    observe_rows("/explain/rows", len(batch.data))
+    try:
+        _, explainer = load_model()
+        if explainer is None:
+            return {"error": "Reason codes need the linear SHAP explainer, which is not available for this model."}
+
+        with stage("/explain/rows", "dataframe"):
+            X = pd.DataFrame([item.dict() for item in batch.data])
+        with stage("/explain/rows", "shap"):
+            probabilities, reasons = explainer.reason_codes(X, top_k=max(1, top_k), background=background)
+        return {
+            "n_samples": len(X),
+            "background_version": explainer.version if background == "fixed" else None,
+            "rows": [
+                {"probability": p, "reasons": r}
+                for p, r in zip(probabilities.tolist(), reasons)
+            ]
+        }
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+
 # =====================================================
 # METRICS ENDPOINT
 # =====================================================
 
+def _metrics_chunk(state, X):
+    """Score one labelled chunk and fold it into `state`."""
+    if "y" not in X.columns:
+        raise ValueError("No target column 'y' found in dataset.")
+    y_true = X["y"].astype(bool).to_numpy()
+    X = X.drop(columns=["y", "Id"], errors="ignore")
+    observe_rows("/metrics", len(X))
+    model, _ = load_model()
+    classifier, X_transformed = _preprocess(model, X, "/metrics")
+    with stage("/metrics", "predict_proba"):
+        state.update(y_true, classifier.predict_proba(X_transformed)[:, 1])
+    return len(X)
+
+
 @app.post("/metrics")
-def metrics(batch: Optional[BatchInputData] = None, limit: int = 100):
+async def metrics(batch: Optional[LabelledBatchInputData] = None, limit: int = 100,
+                  n_points: int = 50, include_state: bool = False):
     """
-    Compute ROC AUC and threshold analysis using input or NoCoDB test data.
+    Compute ROC AUC, PR AUC, Brier score and calibration using a labelled
+    batch (rows with their `y`) or NoCoDB test data.
     Assumes the target column 'y' is boolean (True/False).
-    """
-    # Defaults in case something fails
-    roc_auc = None
-    pr_auc = None
-    thresholds = []
-    precision = []
-    recall = []
 
+    NoCoDB data is scored page by page into a histogram state, so memory stays
+    bounded whatever `limit` is; `limit <= 0` uses the whole labelled view.
+    The curves cover the full threshold range, down-sampled to `n_points`.
+    `include_state=true` also returns the raw state so results from several
+    workers can be combined with /metrics/merge.
+    """
+    observe_validation("/metrics")
     try:
+        state = MetricsState()
+
         # Fetch data from batch or NoCoDB
         if batch:
             X = pd.DataFrame([item.dict() for item in batch.data])
             source = "client batch"
+            await run_in_threadpool(_metrics_chunk, state, X)
         else:
-            X = fetch_test_data(limit=limit)
             source = f"NoCoDB (limit={limit})"
+            async for page in noco.iter_pages(limit if limit > 0 else None):
+                await run_in_threadpool(_metrics_chunk, state, pd.DataFrame(page))
 
-        print(f"[DEBUG] Metrics called using {source} | shape={X.shape}")
+        print(f"[DEBUG] Metrics called using {source} | "
+              f"{state.n_positive} positive cases out of {state.n_samples}")
 
-        # Ensure target 'y' exists
-        if "y" not in X.columns:
-            return {"error": "No target column 'y' found in dataset."}
+        result = state.summary(n_points)
+        if result["roc_auc"] is not None:
+            print(f"[DEBUG] ROC AUC={result['roc_auc']:.3f} | PR AUC={result['pr_auc']:.3f}")
+        if include_state:
+            result["state"] = state.to_dict()
+        return result
 
-        # Convert boolean target to integer
-        y_true = X["y"].astype(int).tolist()
-        print(f"[DEBUG] Found {sum(y_true)} positive cases out of {len(y_true)}")
-        X = X.drop(columns=["y"])
+    except Exception as e:
+        import traceback
+        print("[ERROR] Metrics failed:", e)
+        print(traceback.format_exc())
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+
+@app.post("/metrics/merge")
+def metrics_merge(states: List[dict], n_points: int = 50):
+    """Combine `state` dicts returned by /metrics?include_state=true into one result."""
+    try:
+        if not states:
+            return {"error": "No metrics states given."}
+        return merge_states(states).summary(n_points)
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
 
-        # Drop ID if exists
-        if "Id" in X.columns:
-            X = X.drop(columns=["Id"])
 
-        # Predict probabilities
-        y_prob = model.predict_proba(X)[:, 1]
+# =====================================================
+# PROFIT / THRESHOLD ENDPOINT
+# =====================================================
 
-        # Compute metrics
-        roc_auc = roc_auc_score(y_true, y_prob)
-        precision, recall, thresholds = precision_recall_curve(y_true, y_prob)
-        pr_auc = auc(recall, precision)
+def _score_labelled(X):
+    """Return `(y_true, y_prob, campaign)` arrays for one labelled chunk."""
+    if "y" not in X.columns:
+        raise ValueError("No target column 'y' found in dataset.")
+    y_true = X["y"].astype(bool).to_numpy()
+    X = X.drop(columns=["y", "Id"], errors="ignore")
+    observe_rows("/profit", len(X))
+    model, _ = load_model()
+    classifier, X_transformed = _preprocess(model, X, "/profit")
+    with stage("/profit", "predict_proba"):
+        y_prob = classifier.predict_proba(X_transformed)[:, 1]
+    return y_true, y_prob, X["campaign"].to_numpy(dtype=float)
+
+
+@app.post("/profit")
+async def profit(batch: Optional[LabelledBatchInputData] = None, limit: int = 0,
+                 c_fp: float = C_FP, c_fn: float = C_FN, n_points: int = 200):
+    """
+    Expected return of skipping customers below each probability threshold.
 
-        print(f"[DEBUG] ROC AUC={roc_auc:.3f} | PR AUC={pr_auc:.3f}")
+    Each call not made saves `c_fp` (per call in `campaign`), each skipped
+    subscriber costs `c_fn`. Uses the labelled batch if given, otherwise the
+    NoCoDB test data (`limit <= 0` for all rows). Returns the optimal
+    threshold and the curve down-sampled to `n_points`.
+    """
+    observe_validation("/profit")
+    try:
+        if batch:
+            X = pd.DataFrame([item.dict() for item in batch.data])
+            chunks = [await run_in_threadpool(_score_labelled, X)]
+        else:
+            chunks = []
+            async for page in noco.iter_pages(limit if limit > 0 else None):
+                chunks.append(await run_in_threadpool(_score_labelled, pd.DataFrame(page)))
+        if not chunks:
+            return {"error": "No labelled rows found."}
+
+        y_true, y_prob, campaign = (np.concatenate(parts) for parts in zip(*chunks))
+        curve = threshold_curve(y_true, y_prob, campaign, c_fp=c_fp, c_fn=c_fn)
+        best = optimal_threshold(curve)
+        print(f"[DEBUG] Profit over {len(y_true)} rows | t*={best['threshold']:.3f} "
+              f"| expected return={best['expected_return']:.1f}")
 
         return {
-            "roc_auc": roc_auc,
-            "pr_auc": pr_auc,
-            "thresholds": thresholds.tolist()[:20],
-            "precision": precision.tolist()[:20],
-            "recall": recall.tolist()[:20]
+            "n_samples": int(len(y_true)),
+            "c_fp": c_fp,
+            "c_fn": c_fn,
+            "optimal": {k: float(v) for k, v in best.items()},
+            "curve": downsample(curve, n_points).to_dict(orient="list"),
         }
 
     except Exception as e:
         import traceback
-        print("[ERROR] Metrics failed:", e)
-        print(traceback.format_exc())
         return {"error": str(e), "trace": traceback.format_exc()}
 
 
-    
 @app.get("/coefficients")
 def coefficients():
     """
@@ -223,6 +514,7 @@ def coefficients():
     """
     try:
         # Extract classifier and preprocessor
+        model, _ = load_model()
         classifier = model.named_steps["classifier"]
         preprocessor = model.named_steps["preprocessor"]
 
@@ -242,3 +534,17 @@ def coefficients():
     except Exception as e:
         import traceback
         return {"error": str(e), "trace": traceback.format_exc()}
+
+
+# =====================================================
+# PROMETHEUS
+# =====================================================
+
+@app.get("/metrics/prometheus")
+def prometheus_metrics():
+    """
+    Request latency, per-stage time, batch sizes, NocoDB fetch time and model
+    state for Prometheus. /metrics is the model-quality report.
+    """
+    body, content_type = exposition()
+    return Response(body, media_type=content_type)
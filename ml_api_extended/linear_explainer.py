@@ -0,0 +1,141 @@
+"""
+Closed-form SHAP explainer for the logistic regression pipeline.
+
+For a linear model with independent features the SHAP value of feature j is
+coef_j * (x_j - E[x_j]) in log-odds space, which is exactly what
+`shap.LinearExplainer` computes. Building it once at startup from a fixed,
+versioned background sample turns each explanation into one matrix op.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# pipeline_columns.py is shared with the other service in api_common/; the
+# Docker image copies it next to this file.
+sys.path.append(str(Path(__file__).resolve().parent.parent / "api_common"))
+
+from pipeline_columns import column_names, is_passthrough
+
+CATEGORICAL_COLUMNS = [
+    "job", "education", "default", "housing", "loan",
+    "months_since_previous_contact", "n_previous_contacts", "poutcome",
+]
+
+
+def load_background(path):
+    """Read a background sample CSV, keeping categorical columns as strings."""
+    header = pd.read_csv(path, nrows=0).columns
+    dtype = {c: str for c in CATEGORICAL_COLUMNS if c in header}
+    return pd.read_csv(path, dtype=dtype)
+
+
+class LinearShapExplainer:
+    """SHAP values for a `preprocessor` + linear `classifier` pipeline."""
+
+    def __init__(self, pipeline, background, version=None):
+        self.preprocessor = pipeline.named_steps["preprocessor"]
+        self.classifier = pipeline.named_steps["classifier"]
+        if not hasattr(self.classifier, "coef_") or self.classifier.coef_.shape[0] != 1:
+            raise ValueError("LinearShapExplainer needs a binary linear classifier with coef_.")
+
+        self.coef = self.classifier.coef_[0]
+        self.intercept = float(self.classifier.intercept_[0])
+        self.feature_names = self.preprocessor.get_feature_names_out()
+        self.version = version
+        self.background_mean = self._transform(background).mean(axis=0)
+        self.original_features, self.grouping = self._grouping()
+
+    def _grouping(self):
+        """
+        Map transformed columns back to the input features they came from.
+
+        Returns the input feature names and a 0/1 matrix of shape
+        `(n_transformed, n_input)`, so that `values @ grouping` sums the
+        one-hot columns of each categorical feature. A passthrough remainder
+        counts like any other transformer: its columns are model inputs too.
+        """
+        features, groups = [], []
+        for _, transformer, columns in self.preprocessor.transformers_:
+            if isinstance(transformer, str) and transformer == "drop":
+                continue
+            columns = column_names(self.preprocessor, columns)
+            step = transformer.steps[-1][1] if hasattr(transformer, "steps") else transformer
+            if not is_passthrough(transformer) and hasattr(step, "categories_"):
+                widths = [len(c) for c in step.categories_]
+            else:
+                widths = [1] * len(columns)
+            for column, width in zip(columns, widths):
+                groups.extend([len(features)] * width)
+                features.append(column)
+        grouping = np.zeros((len(groups), len(features)))
+        grouping[np.arange(len(groups)), groups] = 1.0
+        return features, grouping
+
+    @classmethod
+    def from_file(cls, pipeline, path):
+        """Build from a background CSV; the file stem doubles as the version tag."""
+        return cls(pipeline, load_background(path), version=Path(path).stem)
+
+    def _transform(self, X):
+        return np.asarray(self.preprocessor.transform(X), dtype=float)
+
+    @property
+    def expected_value(self):
+        return self.intercept + float(self.coef @ self.background_mean)
+
+    def shap_values(self, X_transformed, background_mean=None):
+        """SHAP matrix `(n_rows, n_features)` for already-transformed rows."""
+        mean = self.background_mean if background_mean is None else background_mean
+        return (X_transformed - mean) * self.coef
+
+    def explain(self, X, background="fixed"):
+        """
+        Return `(X_transformed, shap_values)` for raw input rows.
+
+        `background="batch"` uses the batch itself as the background, which
+        reproduces `shap.Explainer(classifier, X_transformed)` on that batch
+        (exactly up to 100 rows; shap samples larger backgrounds down to 100).
+        """
+        X_transformed = self._transform(X)
+        mean = X_transformed.mean(axis=0) if background == "batch" else None
+        return X_transformed, self.shap_values(X_transformed, mean)
+
+    def summary(self, X, background="fixed"):
+        """Mean |SHAP| per transformed feature, largest first."""
+        _, values = self.explain(X, background)
+        return pd.DataFrame({
+            "feature": self.feature_names,
+            "mean_abs_shap": np.abs(values).mean(axis=0)
+        }).sort_values("mean_abs_shap", ascending=False)
+
+    def reason_codes(self, X, top_k=3, background="fixed"):
+        """
+        Top-k input features driving each row's score.
+
+        Contributions of one-hot columns are summed back to their original
+        feature (`job`, `education`, `poutcome`, ...). Returns the positive
+        class probabilities and, per row, a list of
+        `{"feature", "value", "contribution"}` ordered by |contribution|.
+        """
+        X_transformed = self._transform(X)
+        mean = X_transformed.mean(axis=0) if background == "batch" else self.background_mean
+        values = self.shap_values(X_transformed, mean)
+        contributions = values @ self.grouping
+
+        base = self.intercept + float(self.coef @ mean)
+        probabilities = 1.0 / (1.0 + np.exp(-(base + values.sum(axis=1))))
+
+        k = min(top_k, contributions.shape[1])
+        order = np.argsort(-np.abs(contributions), axis=1, kind="stable")[:, :k]
+        top = np.take_along_axis(contributions, order, axis=1)
+        raw = X[self.original_features].to_numpy(dtype=object)
+        top_values = np.take_along_axis(raw, order, axis=1)
+        names = np.asarray(self.original_features, dtype=object)[order]
+
+        rows = [
+            [{"feature": f, "value": v, "contribution": c} for f, v, c in zip(fs, vs, cs)]
+            for fs, vs, cs in zip(names.tolist(), top_values.tolist(), top.tolist())
+        ]
+        return probabilities, rows
@@ -0,0 +1,186 @@
+"""
+Streaming, mergeable metrics for binary classifier scores.
+
+Scores are accumulated into fixed-width histograms per class, so ROC AUC, PR
+AUC, Brier score and calibration bins can be computed over any number of
+chunks with constant memory. Two states built on different chunks (or
+workers) merge by adding their arrays.
+"""
+import numpy as np
+
+
+class MetricsState:
+    """Per-class score histograms plus the sums needed for Brier and calibration."""
+
+    def __init__(self, n_bins=1000, n_calibration_bins=10):
+        self.n_bins = n_bins
+        self.n_calibration_bins = n_calibration_bins
+        self.pos = np.zeros(n_bins, dtype=np.int64)
+        self.neg = np.zeros(n_bins, dtype=np.int64)
+        self.squared_error = 0.0
+        self.cal_count = np.zeros(n_calibration_bins, dtype=np.int64)
+        self.cal_prob_sum = np.zeros(n_calibration_bins)
+        self.cal_pos = np.zeros(n_calibration_bins, dtype=np.int64)
+
+    @property
+    def n_samples(self):
+        return int(self.pos.sum() + self.neg.sum())
+
+    @property
+    def n_positive(self):
+        return int(self.pos.sum())
+
+    def update(self, y_true, y_prob):
+        """Add one chunk of labels (bool/0-1) and positive-class probabilities."""
+        y = np.asarray(y_true, dtype=bool)
+        p = np.clip(np.asarray(y_prob, dtype=float), 0.0, 1.0)
+
+        idx = np.minimum((p * self.n_bins).astype(np.int64), self.n_bins - 1)
+        self.pos += np.bincount(idx[y], minlength=self.n_bins)
+        self.neg += np.bincount(idx[~y], minlength=self.n_bins)
+        self.squared_error += float(np.sum((p - y) ** 2))
+
+        cal = np.minimum((p * self.n_calibration_bins).astype(np.int64), self.n_calibration_bins - 1)
+        self.cal_count += np.bincount(cal, minlength=self.n_calibration_bins)
+        self.cal_prob_sum += np.bincount(cal, weights=p, minlength=self.n_calibration_bins)
+        self.cal_pos += np.bincount(cal[y], minlength=self.n_calibration_bins)
+        return self
+
+    def merge(self, other):
+        """Fold another state (same bin layout) into this one."""
+        if (other.n_bins, other.n_calibration_bins) != (self.n_bins, self.n_calibration_bins):
+            raise ValueError("Cannot merge metrics states with different bin layouts.")
+        self.pos += other.pos
+        self.neg += other.neg
+        self.squared_error += other.squared_error
+        self.cal_count += other.cal_count
+        self.cal_prob_sum += other.cal_prob_sum
+        self.cal_pos += other.cal_pos
+        return self
+
+    def to_dict(self):
+        return {
+            "n_bins": self.n_bins,
+            "n_calibration_bins": self.n_calibration_bins,
+            "pos": self.pos.tolist(),
+            "neg": self.neg.tolist(),
+            "squared_error": self.squared_error,
+            "cal_count": self.cal_count.tolist(),
+            "cal_prob_sum": self.cal_prob_sum.tolist(),
+            "cal_pos": self.cal_pos.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data["n_bins"], data["n_calibration_bins"])
+        state.pos = np.asarray(data["pos"], dtype=np.int64)
+        state.neg = np.asarray(data["neg"], dtype=np.int64)
+        state.squared_error = float(data["squared_error"])
+        state.cal_count = np.asarray(data["cal_count"], dtype=np.int64)
+        state.cal_prob_sum = np.asarray(data["cal_prob_sum"], dtype=float)
+        state.cal_pos = np.asarray(data["cal_pos"], dtype=np.int64)
+        return state
+
+    # -------------------------------------------------
+    # Metrics
+    # -------------------------------------------------
+
+    def _operating_points(self):
+        """
+        Cumulative counts when predicting positive for scores >= each bin's
+        lower edge, from the highest threshold down to 0.
+
+        Returns `(thresholds, tp, fp)` for the occupied bins only; scores that
+        share a bin are treated as ties.
+        """
+        occupied = np.flatnonzero(self.pos + self.neg)[::-1]
+        tp = np.cumsum(self.pos[occupied])
+        fp = np.cumsum(self.neg[occupied])
+        return occupied / self.n_bins, tp, fp
+
+    def roc_auc(self):
+        P, N = self.n_positive, self.n_samples - self.n_positive
+        if P == 0 or N == 0:
+            return None
+        _, tp, fp = self._operating_points()
+        tpr = np.concatenate([[0.0], tp / P])
+        fpr = np.concatenate([[0.0], fp / N])
+        return float(np.trapezoid(tpr, fpr))
+
+    def brier_score(self):
+        n = self.n_samples
+        return self.squared_error / n if n else None
+
+    def curves(self, n_points=50):
+        """
+        Precision/recall and ROC points across the whole threshold range.
+
+        Thresholds are ordered from low to high (like sklearn's
+        `precision_recall_curve`) and down-sampled to at most `n_points`,
+        always keeping the lowest and highest.
+        """
+        P, N = self.n_positive, self.n_samples - self.n_positive
+        thresholds, tp, fp = self._operating_points()
+        if len(thresholds) == 0 or P == 0:
+            return {"thresholds": [], "precision": [], "recall": [], "fpr": [], "tpr": []}
+
+        precision = tp / (tp + fp)
+        recall = tp / P
+        fpr = fp / N if N else np.zeros_like(recall)
+
+        keep = np.unique(np.linspace(0, len(thresholds) - 1, min(n_points, len(thresholds))).round().astype(int))
+        keep = keep[::-1]
+        return {
+            "thresholds": thresholds[keep].tolist(),
+            "precision": precision[keep].tolist(),
+            "recall": recall[keep].tolist(),
+            "fpr": fpr[keep].tolist(),
+            "tpr": recall[keep].tolist(),
+        }
+
+    def pr_auc(self):
+        """Trapezoidal area under the precision-recall curve, as `auc(recall, precision)`."""
+        P = self.n_positive
+        if P == 0:
+            return None
+        _, tp, fp = self._operating_points()
+        precision = np.concatenate([[1.0], tp / (tp + fp)])
+        recall = np.concatenate([[0.0], tp / P])
+        return float(np.trapezoid(precision, recall))
+
+    def calibration(self):
+        """Mean predicted probability vs observed positive rate per calibration bin."""
+        bins = []
+        for i in np.flatnonzero(self.cal_count):
+            count = int(self.cal_count[i])
+            bins.append({
+                "bin_lower": i / self.n_calibration_bins,
+                "bin_upper": (i + 1) / self.n_calibration_bins,
+                "count": count,
+                "mean_predicted": float(self.cal_prob_sum[i] / count),
+                "fraction_positive": float(self.cal_pos[i] / count),
+            })
+        return bins
+
+    def summary(self, n_points=50):
+        return {
+            "n_samples": self.n_samples,
+            "n_positive": self.n_positive,
+            "roc_auc": self.roc_auc(),
+            "pr_auc": self.pr_auc(),
+            "brier_score": self.brier_score(),
+            "calibration": self.calibration(),
+            **self.curves(n_points),
+        }
+
+
+def merge_states(states):
+    """Merge an iterable of `MetricsState`s (or their dicts) into a new state."""
+    merged = None
+    for state in states:
+        if isinstance(state, dict):
+            state = MetricsState.from_dict(state)
+        if merged is None:
+            merged = MetricsState(state.n_bins, state.n_calibration_bins)
+        merged.merge(state)
+    return merged
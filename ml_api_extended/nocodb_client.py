@@ -0,0 +1,259 @@
+"""
+Async client for the NocoDB v2 records API.
+
+One pooled `httpx.AsyncClient` is reused across calls. Large limits are split
+into pages that are fetched concurrently, failed requests are retried with
+exponential backoff, and every page is cached on disk with a TTL and its
+ETag, so repeated /metrics and /explain calls don't refetch the same records.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import httpx
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def retry_after_seconds(value):
+    """
+    Seconds to wait from a Retry-After header, given as delta-seconds or
+    as an HTTP-date. None when the header is missing or unparsable.
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return max(0.0, seconds) if math.isfinite(seconds) else None
+
+
+class PageCache:
+    """JSON-on-disk cache of NocoDB pages keyed by request URL and params."""
+
+    def __init__(self, directory, ttl):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url, params):
+        key = json.dumps([url, sorted(params.items())], default=str)
+        return self.directory / (hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def get(self, url, params):
+        """Return the cached entry `{"stored_at", "etag", "body"}` or None."""
+        try:
+            return json.loads(self._path(url, params).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry):
+        return time.time() - entry["stored_at"] < self.ttl
+
+    def put(self, url, params, body, etag=None):
+        path = self._path(url, params)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"stored_at": time.time(), "etag": etag, "body": body}))
+        os.replace(tmp, path)
+
+
+class NocoDBClient:
+    """Paginated, retrying, cached reader for one NocoDB table (and view)."""
+
+    def __init__(self, url, token=None, view_id=None, page_size=1000, max_concurrency=4,
+                 timeout=10.0, retries=3, backoff=0.5, cache_dir=None, cache_ttl=300.0, on_fetch=None):
+        self.url = url
+        self.headers = {"xc-token": token} if token else {}
+        self.view_id = view_id
+        self.page_size = page_size
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = PageCache(cache_dir, cache_ttl) if cache_dir else None
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0, "retries": 0}
+        # Called as `on_fetch(source, seconds)` after each page, source being
+        # "cache", "not_modified", "fetched" or "error"
+        self.on_fetch = on_fetch
+        self._client = None
+        self._semaphore = None
+
+    def _session(self):
+        # Created lazily so the pool belongs to the event loop that uses it.
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch_page(self, offset, limit):
+        """Fetch one page: returns the decoded `{"list": [...], "pageInfo": {...}}` body."""
+        params = {"offset": offset, "limit": limit}
+        if self.view_id:
+            params["viewId"] = self.view_id
+
+        start = time.perf_counter()
+        source = "error"
+        try:
+            source, body = await self._fetch(params)
+            return body
+        finally:
+            if self.on_fetch is not None:
+                self.on_fetch(source, time.perf_counter() - start)
+
+    async def _fetch(self, params):
+        """`(source, body)` for one page, from the cache or NocoDB."""
+        cached = self.cache.get(self.url, params) if self.cache else None
+        if cached and self.cache.is_fresh(cached):
+            self.stats["cache_hits"] += 1
+            return "cache", cached["body"]
+
+        headers = {"If-None-Match": cached["etag"]} if cached and cached.get("etag") else {}
+        client = self._session()
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    self.stats["requests"] += 1
+                    res = await client.get(self.url, params=params, headers=headers)
+                if res.status_code == 304 and cached:
+                    self.stats["not_modified"] += 1
+                    self.cache.put(self.url, params, cached["body"], cached["etag"])
+                    return "not_modified", cached["body"]
+                if res.status_code not in RETRY_STATUSES:
+                    res.raise_for_status()
+                    body = res.json()
+                    if self.cache:
+                        self.cache.put(self.url, params, body, res.headers.get("etag"))
+                    return "fetched", body
+                delay = retry_after_seconds(res.headers.get("retry-after")) or self.backoff * 2 ** attempt
+                error = httpx.HTTPStatusError(f"{res.status_code} from NocoDB", request=res.request, response=res)
+            except httpx.TransportError as e:
+                delay = self.backoff * 2 ** attempt
+                error = e
+            if attempt == self.retries:
+                raise error
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay * (0.5 + random.random()))
+
+    async def _plan(self, limit, offset):
+        """
+        Fetch the first page and work out where the read ends.
+
+        Returns `(first_page, end, page_size)`. `end` is None when the server
+        reports no `totalRows`. NocoDB silently caps `limit` at its own maximum,
+        so a short first page with more rows remaining sets the page size.
+        """
+        first_limit = self.page_size if limit is None else min(limit, self.page_size)
+        first = await self.fetch_page(offset, first_limit)
+        got = len(first["list"])
+        total = first.get("pageInfo", {}).get("totalRows")
+        end = offset + limit if limit is not None else None
+        if total is not None:
+            end = total if end is None else min(end, total)
+        elif got < first_limit:
+            end = offset + got
+        page_size = first_limit
+        if 0 < got < first_limit and (end is None or offset + got < end):
+            page_size = got
+        return first, end, page_size
+
+    async def iter_pages(self, limit=None, offset=0):
+        """
+        Yield record lists page by page, in order.
+
+        Up to `max_concurrency` pages are in flight at once, so memory stays
+        bounded by a few pages whatever `limit` is. `limit=None` reads the
+        whole table.
+        """
+        first, end, page_size = await self._plan(limit, offset)
+        if not first["list"]:
+            return
+        yield first["list"]
+        next_offset = offset + len(first["list"])
+
+        if end is None:
+            # No totalRows from the server: walk sequentially until a short page.
+            while True:
+                page = await self.fetch_page(next_offset, page_size)
+                if page["list"]:
+                    yield page["list"]
+                if len(page["list"]) < page_size:
+                    return
+                next_offset += len(page["list"])
+
+        pending = deque()
+        try:
+            while next_offset < end or pending:
+                while next_offset < end and len(pending) < self.max_concurrency:
+                    size = min(page_size, end - next_offset)
+                    pending.append(asyncio.ensure_future(self.fetch_page(next_offset, size)))
+                    next_offset += size
+                page = await pending.popleft()
+                yield page["list"]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def fetch_records(self, limit=None, offset=0):
+        """All records in `[offset, offset + limit)` as one list."""
+        records = []
+        async for page in self.iter_pages(limit, offset):
+            records.extend(page)
+        return records
+
+
+# Blocking callers share clients living on one background event loop, so
+# their connection pools survive between calls.
+_sync_loop = None
+_sync_clients = {}
+_sync_lock = threading.Lock()
+
+
+def _background_loop():
+    global _sync_loop
+    if _sync_loop is None:
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name="nocodb-client", daemon=True).start()
+        _sync_loop = loop
+    return _sync_loop
+
+
+def fetch_records_sync(url, token=None, view_id=None, limit=None, offset=0, **kwargs):
+    """
+    Blocking fetch for scripts and Streamlit pages.
+
+    Calls with the same url, token, view and client options reuse one
+    `NocoDBClient` (and its pooled connections) for the life of the process.
+    """
+    key = (url, token, view_id, tuple(sorted(kwargs.items())))
+    with _sync_lock:
+        loop = _background_loop()
+        client = _sync_clients.get(key)
+        if client is None:
+            client = _sync_clients[key] = NocoDBClient(url, token, view_id, **kwargs)
+    return asyncio.run_coroutine_threadsafe(client.fetch_records(limit, offset), loop).result()
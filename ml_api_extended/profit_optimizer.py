@@ -0,0 +1,103 @@
+"""
+Expected-profit threshold optimizer for the campaign model.
+
+Vectorized version of the notebook's `expected_return(df, t, c_fp, c_fn)`:
+customers with a predicted probability <= t are not called, which saves
+`c_fp` per call they would have received (`campaign`), while every skipped
+subscriber costs `c_fn`. Scores are sorted once and the savings and misses
+are cumulative sums, so every distinct threshold is evaluated in O(n log n).
+"""
+import numpy as np
+import pandas as pd
+
+C_FP = 29.7  # saving per call not made
+C_FN = 300   # cost of missing a true subscriber
+
+
+def threshold_curve(y_true, y_prob, campaign=None, c_fp=C_FP, c_fn=C_FN):
+    """
+    Expected return at every distinct threshold.
+
+    `campaign` is the number of calls per customer (one call each if None).
+    Returns a DataFrame ordered by threshold with, for "skip everyone with
+    probability <= threshold":
+
+    - customers_skipped / customers_called
+    - calls_saved / calls_made
+    - subscribers_missed / subscribers_reached
+    - expected_return: calls_saved * c_fp - subscribers_missed * c_fn
+    - roi: expected_return relative to the cost of calling everyone
+
+    A leading row with threshold 0 (nobody skipped) is added when all
+    probabilities are positive, matching the notebook's `np.linspace(0, 1)`.
+    """
+    y = np.asarray(y_true, dtype=bool)
+    p = np.asarray(y_prob, dtype=float)
+    calls = np.ones(len(p)) if campaign is None else np.asarray(campaign, dtype=float)
+
+    order = np.argsort(p, kind="stable")
+    p, y, calls = p[order], y[order], calls[order]
+
+    # Last index of each run of equal scores: "<= t" includes all ties.
+    last = np.flatnonzero(np.append(p[1:] != p[:-1], True)) if len(p) else np.array([], dtype=int)
+    skipped = last + 1
+    calls_saved = np.cumsum(calls)[last]
+    missed = np.cumsum(y)[last]
+    thresholds = p[last]
+
+    if len(p) == 0 or p[0] > 0:
+        thresholds = np.concatenate([[0.0], thresholds])
+        skipped = np.concatenate([[0], skipped])
+        calls_saved = np.concatenate([[0.0], calls_saved])
+        missed = np.concatenate([[0], missed])
+
+    total_calls = float(calls.sum())
+    expected_return = calls_saved * c_fp - missed * c_fn
+    baseline_cost = total_calls * c_fp
+    return pd.DataFrame({
+        "threshold": thresholds,
+        "customers_skipped": skipped,
+        "customers_called": len(p) - skipped,
+        "calls_saved": calls_saved,
+        "calls_made": total_calls - calls_saved,
+        "subscribers_missed": missed,
+        "subscribers_reached": int(y.sum()) - missed,
+        "expected_return": expected_return,
+        "roi": expected_return / baseline_cost if baseline_cost else np.zeros(len(thresholds)),
+    })
+
+
+def at_thresholds(curve, thresholds):
+    """
+    Look up the curve at arbitrary thresholds (e.g. `np.linspace(0, 1, 120)`).
+
+    Each threshold takes the row of the largest distinct score <= it, which
+    is exactly what evaluating the notebook's filter at that threshold gives.
+    """
+    thresholds = np.asarray(thresholds, dtype=float)
+    idx = np.searchsorted(curve["threshold"].to_numpy(), thresholds, side="right") - 1
+    rows = curve.iloc[np.maximum(idx, 0)].reset_index(drop=True)
+    rows["threshold"] = thresholds
+    # Below the smallest score nobody is skipped
+    below = idx < 0
+    if below.any():
+        rows.loc[below, ["customers_skipped", "calls_saved", "subscribers_missed",
+                         "expected_return", "roi"]] = 0
+        rows.loc[below, "customers_called"] = int(curve["customers_skipped"].iloc[-1] + curve["customers_called"].iloc[-1])
+        rows.loc[below, "calls_made"] = float(curve["calls_saved"].iloc[-1] + curve["calls_made"].iloc[-1])
+        rows.loc[below, "subscribers_reached"] = int(curve["subscribers_missed"].iloc[-1] + curve["subscribers_reached"].iloc[-1])
+    return rows
+
+
+def optimal_threshold(curve):
+    """Row of the curve with the highest expected return (first one on ties)."""
+    return curve.iloc[int(curve["expected_return"].to_numpy().argmax())]
+
+
+def downsample(curve, n_points=200):
+    """At most `n_points` rows spread over the whole curve, keeping both ends and the optimum."""
+    if len(curve) <= n_points:
+        return curve
+    keep = np.linspace(0, len(curve) - 1, n_points).round().astype(int)
+    keep = np.union1d(keep, [int(curve["expected_return"].to_numpy().argmax())])
+    return curve.iloc[keep]
@@ -1,28 +1,16 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import altair as alt
-import requests
-import zipfile
-import io
 
-# Use session state to load data only once per session
-def load_data():
-    url = "https://archive.ics.uci.edu/ml/machine-learning-databases/00222/bank.zip"
-    r = requests.get(url)
-    z = zipfile.ZipFile(io.BytesIO(r.content))
-    df = pd.read_csv(z.open("bank-full.csv"), sep=";")
-    return df
+from density import load_density
+from eda_cube import DISTRIBUTION_VARIABLES, IMBALANCE_VARIABLES, load_cube
 
-if "bank_df" not in st.session_state:
-    st.session_state["bank_df"] = load_data()
+# Histogram and category-by-y tables of the bank dataset, computed once per
+# process and shared by all sessions: the charts get a few dozen summary
+# rows instead of every record
+cube = load_cube()
 
-df = st.session_state["bank_df"]
-
-distribution_variables = ['age', 'balance', 'day', 'duration', 'campaign', 'pdays', 'previous']
-imbalance_variables = ['job', 'marital', 'education', 'default', 'housing', 'loan', 'contact', 'month', 'poutcome']
+distribution_variables = DISTRIBUTION_VARIABLES
+imbalance_variables = IMBALANCE_VARIABLES
 
 with st.sidebar:
     st.header("Distribution visualizations")
@@ -62,11 +50,17 @@ if submit_button and select_variable:
             var = select_variable[idx]
             col = cols[col_idx]
             if plot_type == "Histogram":
-                chart = alt.Chart(df).mark_bar(opacity=0.7).encode(
-                    x=alt.X(var, bin=alt.Bin(maxbins=30), title=var),
-                    y=alt.Y('count()', title='Count'),
-                    color=alt.Color('y', title='Subscribed'),
-                    tooltip=[var, 'y']
+                chart = alt.Chart(cube["histograms"][var]).mark_bar(opacity=0.7).encode(
+                    x=alt.X('bin_start:Q', bin='binned', title=var),
+                    x2='bin_end:Q',
+                    y=alt.Y('count:Q', title='Count'),
+                    color=alt.Color('y:N', title='Subscribed'),
+                    tooltip=[
+                        alt.Tooltip('bin_start:Q', title=f'{var} from'),
+                        alt.Tooltip('bin_end:Q', title='to'),
+                        'y:N',
+                        alt.Tooltip('count:Q', title='Count')
+                    ]
                 ).properties(
                     width=350,
                     height=250,
@@ -89,16 +83,19 @@ if submit_button and select_variable:
                 elif var == "previous":
                     col.info("Previous contacts are right-skewed, with most clients having few previous contacts. We will bin this for our model.")
             else:  # KDE
-                fig, ax = plt.subplots(figsize=(4, 3))
-                for label, color in zip(['yes', 'no'], ['green', 'red']):
-                    subset = df[df['y'] == label][var]
-                    sns.kdeplot(subset, label=f"y = {label}", color=color, fill=True, alpha=0.3, ax=ax)
-                ax.set_title(f"{var} KDE by subscription")
-                ax.set_xlabel(var)
-                ax.set_ylabel("Density")
-                ax.legend()
-                col.pyplot(fig)
-                plt.close(fig)
+                # Curves are computed once per process (binned FFT KDE, see density.py)
+                chart = alt.Chart(load_density(var)).mark_area(opacity=0.3, line=True).encode(
+                    x=alt.X(f'{var}:Q', title=var),
+                    y=alt.Y('density:Q', title='Density', stack=None),
+                    color=alt.Color('y:N', title='Subscribed',
+                                    scale=alt.Scale(domain=['yes', 'no'], range=['green', 'red'])),
+                    tooltip=[alt.Tooltip(f'{var}:Q', format='.1f'), 'y:N', alt.Tooltip('density:Q', format='.3g')]
+                ).properties(
+                    width=350,
+                    height=250,
+                    title=f"{var} KDE by subscription"
+                )
+                col.altair_chart(chart, use_container_width=True)
                 # After plotting each distribution plot:
                 if var == "age":
                     col.info("The density shows a peak around 35-40 years, with a slight difference between subscribers and non-subscribers. Notably, subscribers tend to be slightly older.")
@@ -117,25 +114,11 @@ if submit_button and select_variable:
     
             
 
-# Helper to cache imbalance proportions per variable in session state
-def get_prop_df(var):
-    cache_key = f"prop_df_{var}"
-    if cache_key not in st.session_state:
-        prop_df = (
-            df.groupby(var)['y']
-            .value_counts(normalize=True)
-            .rename('proportion')
-            .reset_index()
-        )
-        st.session_state[cache_key] = prop_df
-    return st.session_state[cache_key]
-
 # Imbalance plots (stacked bar by 'y')
 if submit_button2 and select_imbalance:
     st.subheader("Imbalance by Target (y)")
     for var in select_imbalance:
-        prop_df = get_prop_df(var)
-        df_tooltip = pd.merge(df, prop_df, on=[var, 'y'], how='left')
+        prop_df = cube["categories"][var]
 
         # Custom month order if plotting 'month'
         if var == "month":
@@ -144,16 +127,16 @@ if submit_button2 and select_imbalance:
         else:
             x_axis = alt.X(var, title=var)
 
-        chart = alt.Chart(df_tooltip).mark_bar().encode(
+        chart = alt.Chart(prop_df).mark_bar().encode(
             x=x_axis,
-            y=alt.Y('count()', stack='normalize', title='Proportion'),
-            color=alt.Color('y', title='Subscribed', sort=['no', 'yes']),
-            order=alt.Order('y', sort='ascending'),
+            y=alt.Y('count:Q', stack='normalize', title='Proportion'),
+            color=alt.Color('y:N', title='Subscribed', sort=['no', 'yes']),
+            order=alt.Order('y:N', sort='ascending'),
             tooltip=[
                 var,
                 'y',
                 alt.Tooltip('proportion:Q', title='Proportion', format='.2%'),
-                alt.Tooltip('count():Q', title='Count')
+                alt.Tooltip('count:Q', title='Count')
             ]
         ).properties(
             width=350,
@@ -129,19 +129,23 @@ if st.button("Compute Model Metrics"):
             recall = metrics.get("recall", [])
 
             if roc_auc is not None and pr_auc is not None:
-                col1, col2 = st.columns(2)
+                col1, col2, col3 = st.columns(3)
                 with col1:
                     st.metric("ROC AUC", f"{roc_auc:.3f}")
                 with col2:
                     st.metric("PR AUC", f"{pr_auc:.3f}")
+                with col3:
+                    st.metric("Brier score", f"{metrics.get('brier_score', float('nan')):.3f}")
 
                 fig1, ax1 = plt.subplots(figsize=(5, 5))
                 ax1.plot([0, 1], [0, 1], "k--", label="Random")
-                if thresholds and len(thresholds) == len(recall):
-                    ax1.plot(recall, precision, label="Model")
-                ax1.set_xlabel("False Positive Rate (approx.)")
-                ax1.set_ylabel("True Positive Rate (approx.)")
-                ax1.set_title("ROC-like Visualization")
+                fpr = metrics.get("fpr", [])
+                tpr = metrics.get("tpr", [])
+                if fpr and len(fpr) == len(tpr):
+                    ax1.plot(fpr, tpr, label="Model")
+                ax1.set_xlabel("False Positive Rate")
+                ax1.set_ylabel("True Positive Rate")
+                ax1.set_title("ROC Curve")
                 ax1.legend()
                 st.pyplot(fig1)
 
@@ -0,0 +1,101 @@
+import streamlit as st
+import numpy as np
+import matplotlib.pyplot as plt
+
+from what_if import best_thresholds, scenario_grid, simulate
+
+st.set_page_config(page_title="What if?", page_icon="⁉️", layout="wide")
+
+st.title("⁉️ What if? ⁉️")
+
+with st.expander("ℹ️ - About this simulation", expanded=False):
+    st.markdown(
+        """
+        We simulate a population of customers whose true probability of subscribing follows a
+        Beta(1.5, 8) distribution, and a model whose predictions are the true probability plus
+        Gaussian noise (lower noise = more accurate model). Every customer with a predicted
+        probability above the threshold is called.
+
+        Each scenario (model noise, threshold, cost per call, value per conversion) is repeated over
+        many random populations, so the profit and ROI come with a confidence interval.
+        """
+    )
+
+# ============================================================
+# SCENARIO SETTINGS
+# ============================================================
+
+with st.sidebar:
+    st.header("Scenarios")
+    with st.form("What-if options"):
+        noise_levels = st.multiselect("Model noise (std)", [0.02, 0.05, 0.08, 0.12, 0.16, 0.2, 0.3], default=[0.05, 0.12, 0.2])
+        costs = st.multiselect("Cost per call", [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 1.0], default=[0.3, 0.5, 0.7])
+        values = st.multiselect("Value per conversion", [0.5, 1.0, 1.5, 2.0, 2.5, 3.0], default=[1.0, 1.5, 2.0])
+        n_thresholds = st.slider("Number of thresholds", 10, 200, 100, step=10)
+        n_customers = st.slider("Customers per simulation", 100, 5000, 1000, step=100)
+        n_replicates = st.slider("Monte Carlo replicates", 25, 1000, 200, step=25)
+        ci = st.select_slider("Confidence interval", options=[0.8, 0.9, 0.95, 0.99], value=0.95)
+        seed = st.number_input("Random seed", min_value=0, value=42, step=1)
+        st.form_submit_button(label="Run simulation")
+
+if not (noise_levels and costs and values):
+    st.warning("Select at least one noise level, cost and value.")
+    st.stop()
+
+
+@st.cache_data(show_spinner=False)
+def run_simulation(noise_levels, costs, values, n_thresholds, n_customers, n_replicates, ci, seed):
+    grid = scenario_grid(noise_levels, np.linspace(0, 0.99, n_thresholds), costs, values)
+    return simulate(grid, n_customers=n_customers, n_replicates=n_replicates, seed=seed, ci=ci)
+
+
+with st.spinner("Simulating..."):
+    results = run_simulation(tuple(noise_levels), tuple(costs), tuple(values),
+                             n_thresholds, n_customers, n_replicates, ci, int(seed))
+
+st.caption(f"{len(results):,} scenarios × {n_replicates} replicates of {n_customers:,} customers")
+
+# ============================================================
+# PROFIT CURVES
+# ============================================================
+
+st.header("Expected profit vs threshold")
+
+col1, col2, col3 = st.columns(3)
+noise = col1.selectbox("Model noise", sorted(noise_levels), index=len(noise_levels) // 2)
+cost = col2.selectbox("Cost per call", sorted(costs), index=len(costs) // 2)
+value = col3.selectbox("Value per conversion", sorted(values), index=0)
+
+fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+for c in sorted(costs):
+    subset = results[(results["cost_per_call"] == c) & (results["model_noise"] == noise) & (results["value_per_conversion"] == value)]
+    ax1.plot(subset["threshold"], subset["profit_mean"], label=f"Cost/call={c}")
+    ax1.fill_between(subset["threshold"], subset["profit_lo"], subset["profit_hi"], alpha=0.2)
+ax1.set_title(f"Different costs (noise={noise}, value={value})")
+for n in sorted(noise_levels):
+    subset = results[(results["cost_per_call"] == cost) & (results["model_noise"] == n) & (results["value_per_conversion"] == value)]
+    ax2.plot(subset["threshold"], subset["profit_mean"], label=f"Noise={n}")
+    ax2.fill_between(subset["threshold"], subset["profit_lo"], subset["profit_hi"], alpha=0.2)
+ax2.set_title(f"Different model accuracy (cost={cost}, value={value})")
+for ax in (ax1, ax2):
+    ax.set_xlabel("Threshold")
+    ax.set_ylabel("Expected Profit ($)")
+    ax.grid(True)
+    ax.legend()
+st.pyplot(fig)
+
+# ============================================================
+# SUMMARY
+# ============================================================
+
+st.header("Best threshold per scenario")
+summary = best_thresholds(results)
+st.dataframe(
+    summary[["cost_per_call", "value_per_conversion", "model_noise", "threshold", "n_called",
+             "profit_mean", "profit_lo", "profit_hi", "roi_mean", "roi_lo", "roi_hi"]]
+    .style.format({"threshold": "{:.2f}", "n_called": "{:.0f}",
+                   "profit_mean": "{:.2f}", "profit_lo": "{:.2f}", "profit_hi": "{:.2f}",
+                   "roi_mean": "{:.2f}", "roi_lo": "{:.2f}", "roi_hi": "{:.2f}"}),
+    hide_index=True,
+)
+st.download_button("Download all scenarios (CSV)", results.to_csv(index=False), file_name="whatif_scenarios.csv")
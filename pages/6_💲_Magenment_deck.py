@@ -0,0 +1,77 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import joblib
+
+from ml_api_extended.profit_optimizer import C_FN, C_FP, at_thresholds, optimal_threshold, threshold_curve
+
+st.set_page_config(page_title="Management deck", page_icon="💲", layout="wide")
+
+CATEGORICAL_COLUMNS = [
+    "job", "education", "default", "housing", "loan",
+    "months_since_previous_contact", "n_previous_contacts", "poutcome",
+]
+
+# ============================================================
+# DATA
+# ============================================================
+
+# The test set is scored once per session; moving the cost sliders only
+# re-runs the optimizer, which is a sort and a few cumulative sums.
+@st.cache_data(show_spinner=False)
+def load_scored_test_data():
+    df = pd.read_csv("test_data.csv", dtype={c: str for c in CATEGORICAL_COLUMNS})
+    model = joblib.load("model_1mvp.pkl")
+    df["y_pred_proba"] = model.predict_proba(df.drop(columns=["y"]))[:, 1]
+    return df
+
+df = load_scored_test_data()
+
+# ============================================================
+# PAGE
+# ============================================================
+
+st.title("💲 Management deck")
+st.markdown(
+    "Which customers should the call center skip? Every call not made saves its cost, "
+    "every subscriber we skip is lost revenue. The model ranks customers by their "
+    "probability of subscribing, and we pick the cut-off that maximises the expected return."
+)
+
+with st.sidebar:
+    st.header("Campaign economics")
+    c_fp = st.number_input("Cost per call (saved when skipped)", min_value=0.0, value=float(C_FP), step=0.5)
+    c_fn = st.number_input("Value of a subscriber (lost when skipped)", min_value=0.0, value=float(C_FN), step=10.0)
+
+curve = threshold_curve(df["y"], df["y_pred_proba"], df["campaign"], c_fp=c_fp, c_fn=c_fn)
+best = optimal_threshold(curve)
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Optimal threshold", f"{best['threshold']:.2f}")
+col2.metric("Expected return", f"{best['expected_return']:,.0f}")
+col3.metric("Calls saved", f"{best['calls_saved']:,.0f}")
+col4.metric("ROI vs calling everyone", f"{best['roi']:.1%}")
+
+fig, ax = plt.subplots(figsize=(9, 5))
+ax.plot(curve["threshold"], curve["expected_return"])
+ax.axvline(x=best["threshold"], color="r", linestyle="--", label=f"Optimal Threshold = {best['threshold']:.2f}")
+ax.set_xlabel("Threshold")
+ax.set_ylabel("Expected Savings")
+ax.set_title("Expected savings vs threshold")
+ax.grid(True)
+ax.legend()
+st.pyplot(fig)
+
+st.subheader("Scenarios")
+grid = at_thresholds(curve, np.round(np.arange(0.3, 0.75, 0.05), 2))
+st.dataframe(
+    grid[["threshold", "customers_called", "calls_made", "subscribers_reached",
+          "subscribers_missed", "expected_return", "roi"]]
+    .style.format({"threshold": "{:.2f}", "calls_made": "{:,.0f}", "expected_return": "{:,.0f}", "roi": "{:.1%}"}),
+    hide_index=True,
+)
+st.caption(
+    f"Based on {len(df):,} customers of the test set, "
+    f"{int(df['y'].sum()):,} of which subscribed."
+)
@@ -1,10 +1,12 @@
 import streamlit as st
 from streamlit_extras.let_it_rain import rain
 import requests
-import random
 import pandas as pd
 import datetime
 
+from call_dispatcher import CallDispatcher, expected_bonus
+from ml_api_extended.nocodb_client import fetch_records_sync
+
 
 st.title("📞 Callcenter Dashboard")
 
@@ -32,7 +34,7 @@ with st.sidebar:
     queue_size = st.number_input("Queue size", min_value=1, max_value=50, value=10, step=1)
     bonus = st.number_input("Upsell Bonus (currency/unit)", min_value=1.0, value=10.0, step=1.0)
     if st.button("Reset Queue"):
-        st.session_state.queue = None  # Force re-fetch
+        st.session_state.queue = None  # Force re-fetch (and re-score)
         st.session_state.total_bonus = 0.0
     # Placeholder for model probability
     model_prob_placeholder = st.empty()
@@ -44,52 +46,107 @@ with st.sidebar:
 def fetch_customers(limit):
     API_DATA_URL = "https://dun3co-sdc-nocodb.hf.space/api/v2/tables/m39a8axnn3980w9/records"
     API_DATA_TOKEN = st.secrets["NOCODB_TOKEN"]
-    HEADERS = {"xc-token": API_DATA_TOKEN}
-    params = {"offset": 0, "limit": limit, "viewId": "vwjuv5jnaet9npuu"}
-    res = requests.get(API_DATA_URL, headers=HEADERS, params=params)
-    res.raise_for_status()
-    return res.json()["list"]
+    return fetch_records_sync(
+        API_DATA_URL,
+        token=API_DATA_TOKEN,
+        view_id="vwjuv5jnaet9npuu",
+        limit=limit,
+        cache_dir=".nocodb_cache",
+    )
+
+API_EXPLAIN_URL = "https://dun3co-logregmodel.hf.space/explain/rows"
+API_TIMEOUT = 10
+
+# One pooled HTTP session for the whole app, so model calls reuse connections
+@st.cache_resource(show_spinner=False)
+def http_session():
+    return requests.Session()
+
+# Calls happen today, so customers are scored with the current day of month
+# (not the day of their original contact in the dataset)
+def model_input(row, day):
+    return {
+        "age": int(row["age"]),
+        "balance": float(row["balance"]),
+        "day": day,
+        "campaign": int(row["campaign"]),
+        "job": str(row["job"]),
+        "education": str(row["education"]),
+        "default": str(row["default"]),
+        "housing": str(row["housing"]),
+        "loan": str(row["loan"]),
+        "months_since_previous_contact": str(row["months_since_previous_contact"]),
+        "n_previous_contacts": str(row["n_previous_contacts"]),
+        "poutcome": str(row["poutcome"]),
+        "had_contact": bool(row["had_contact"]),
+        "is_single": bool(row["is_single"]),
+        "uknown_contact": bool(row["uknown_contact"]),
+    }
+
+def score_queue(queue, day):
+    """Subscription probability and top-3 reason codes of every queued customer, in one /explain/rows call."""
+    response = http_session().post(API_EXPLAIN_URL, json={"data": [model_input(row, day) for row in queue]},
+                                   params={"top_k": 3}, timeout=API_TIMEOUT)
+    response.raise_for_status()
+    rows = response.json()["rows"]
+    return [row["probability"] for row in rows], [row["reasons"] for row in rows]
+
+# This session's agent; the dispatcher can also be shared by many agents
+AGENT = "dashboard"
+
+def build_queue(records):
+    """
+    Score and explain `records` with one model call and queue them by
+    expected bonus, best call first. Probabilities and reason codes travel
+    with each queued customer and the max potential bonus is a running sum,
+    so handling a call needs no model call at all.
+    """
+    try:
+        probabilities, reasons = score_queue(records, day_value) if records else ([], [])
+    except Exception as e:
+        st.error(f"Model API call failed: {e}")
+        probabilities = reasons = None
+
+    dispatcher = CallDispatcher()
+    # p * (1 - p) * bonus: the bonus setting scales every customer alike, so it doesn't change the order.
+    # Unscored customers keep the fetched order.
+    dispatcher.extend(
+        (i,
+         expected_bonus(probabilities[i], 1.0) if probabilities is not None else 0.0,
+         {"record": row,
+          "probability": probabilities[i] if probabilities is not None else None,
+          "reasons": reasons[i] if reasons is not None else None})
+        for i, row in enumerate(records)
+    )
+    st.session_state.queue = dispatcher
+    st.session_state.queue_scored = probabilities is not None
+    st.session_state.active_call = dispatcher.assign(AGENT)
+    st.session_state.remaining_potential = sum(1 - p for p in probabilities) if probabilities is not None else None
+
+def queued_calls():
+    """The active call followed by the waiting ones, in dispatch order."""
+    active = st.session_state.active_call
+    if active is None:
+        return []
+    return [active] + st.session_state.queue.peek(len(st.session_state.queue))
+
+# Use current day of month for the model inputs
+day_value = datetime.datetime.now().day
 
 # --- Initialize or reset queue and bonus ---
 if "queue" not in st.session_state or st.session_state.queue is None:
-    records = fetch_customers(queue_size)
-    st.session_state.queue = random.sample(records, len(records))
+    build_queue(fetch_customers(queue_size))
+elif not st.session_state.queue_scored:
+    # The last attempt failed. Rescore only on request, so widget reruns
+    # don't keep calling an API that is down.
+    with st.sidebar:
+        st.warning("The queue isn't scored; calls keep the fetched order.")
+        retry = st.button("Retry scoring")
+    if retry:
+        build_queue([call.payload["record"] for call in queued_calls()])
 if "total_bonus" not in st.session_state:
     st.session_state.total_bonus = 0.0
 
-# --- Calculate maximum potential bonus for the remaining queue ---
-def get_max_potential_bonus(queue, bonus):
-    if not queue:
-        return 0.0, []
-    API_MODEL_URL = "https://dun3co-marketing-lr-prediction.hf.space/predict"
-    inputs = []
-    for row in queue:
-        inputs.append({
-            "age": int(row["age"]),
-            "balance": float(row["balance"]),
-            "day": int(row["day"]),
-            "campaign": int(row["campaign"]),
-            "job": str(row["job"]),
-            "education": str(row["education"]),
-            "default": str(row["default"]),
-            "housing": str(row["housing"]),
-            "loan": str(row["loan"]),
-            "months_since_previous_contact": str(row["months_since_previous_contact"]),
-            "n_previous_contacts": str(row["n_previous_contacts"]),
-            "poutcome": str(row["poutcome"]),
-            "had_contact": bool(row["had_contact"]),
-            "is_single": bool(row["is_single"]),
-            "uknown_contact": bool(row["uknown_contact"]),
-        })
-    try:
-        response = requests.post(API_MODEL_URL, json={"data": inputs})
-        response.raise_for_status()
-        probabilities = response.json()["probabilities"]
-        max_bonus = sum((1 - p) * bonus for p in probabilities)
-        return max_bonus, probabilities
-    except Exception:
-        return None, None
-
 # --- 3. Show queue visually and bonus info ---
 #st.subheader("Queue")
 
@@ -98,57 +155,33 @@ queue_col, bonus_col, empty_col = st.columns([2, 1.2, 0.8])
 
 with queue_col:
     st.subheader("Queue")
-    for i, row in enumerate(st.session_state.queue):
+    for i, call in enumerate(queued_calls()):
+        row = call.payload["record"]
         st.write(f"Position {i+1}: {row['job']} ({row['age']} yrs, {row['education']})")
 
-# Calculate max potential bonus and get probabilities for queue
-max_potential_bonus, queue_probabilities = get_max_potential_bonus(st.session_state.queue, bonus)
+# Maximum potential bonus for the remaining queue
+remaining_potential = st.session_state.remaining_potential
+max_potential_bonus = remaining_potential * bonus if remaining_potential is not None else None
 
 # --- 4. Simulate next call ---
-if st.session_state.queue:
+if st.session_state.active_call is not None:
     st.subheader("Active Call")
-    active_row = st.session_state.queue[0]
+    active_call = st.session_state.active_call
+    active_row = active_call.payload["record"]
 
-    # Use current day of month if possible, fallback to API day
-    today_day = datetime.datetime.now().day
-    try:
-        day_value = int(today_day)
-    except Exception:
-        day_value = int(active_row["day"])
-
-    # Prepare model input for active call
-    input_row = {
-        "age": int(active_row["age"]),
-        "balance": float(active_row["balance"]),
-        "day": day_value,
-        "campaign": int(active_row["campaign"]),
-        "job": str(active_row["job"]),
-        "education": str(active_row["education"]),
-        "default": str(active_row["default"]),
-        "housing": str(active_row["housing"]),
-        "loan": str(active_row["loan"]),
-        "months_since_previous_contact": str(active_row["months_since_previous_contact"]),
-        "n_previous_contacts": str(active_row["n_previous_contacts"]),
-        "poutcome": str(active_row["poutcome"]),
-        "had_contact": bool(active_row["had_contact"]),
-        "is_single": bool(active_row["is_single"]),
-        "uknown_contact": bool(active_row["uknown_contact"]),
-    }
-    payload = {"data": [input_row]}
+    # --- 5. Model prediction for active call, scored with the queue ---
+    probability = active_call.payload["probability"]
+    # Show in sidebar
+    model_prob_placeholder.metric("Model Probability (Subscribe)",
+                                  f"{probability:.2%}" if probability is not None else "N/A")
 
-    # --- 5. Get model prediction for active call ---
-    API_MODEL_URL = "https://dun3co-marketing-lr-prediction.hf.space/predict"
-    try:
-        response = requests.post(API_MODEL_URL, json=payload)
-        response.raise_for_status()
-        result = response.json()
-        probability = result["probabilities"][0]
-        # Show in sidebar
-        model_prob_placeholder.metric("Model Probability (Subscribe)", f"{probability:.2%}")
-    except Exception as e:
-        st.error(f"Model API call failed: {e}")
-        probability = None
-        model_prob_placeholder.metric("Model Probability (Subscribe)", "N/A")
+    # --- Reason codes: why the model scored this customer this way ---
+    if active_call.payload["reasons"] is not None:
+        with st.sidebar:
+            st.caption("Top reasons for this score")
+            for reason in active_call.payload["reasons"]:
+                arrow = "⬆️" if reason["contribution"] > 0 else "⬇️"
+                st.caption(f"{arrow} {reason['feature'].replace('_', ' ')} = {reason['value']}")
 
     # --- Customer info as tiles ---
     st.write("### Customer Information")
@@ -211,12 +244,15 @@ if st.session_state.queue:
         # Plain Streamlit widgets for worker action (no custom styling)
         st.subheader("Callcenter Worker Action")
         upsell = st.radio("Did you upsell?", options=["Yes", "No"], key="upsell_radio", horizontal=True)
-        submit = st.button("Submit", disabled=not st.session_state.queue, key="upsell_submit")
+        submit = st.button("Submit", key="upsell_submit")
 
         if submit:
             if upsell == "Yes" and probability is not None:
                 st.session_state.total_bonus += (1 - probability) * bonus
-            st.session_state.queue.pop(0)
+            st.session_state.queue.complete(active_call.customer_id)
+            if probability is not None:
+                st.session_state.remaining_potential = max(0.0, remaining_potential - (1 - probability))
+            st.session_state.active_call = st.session_state.queue.assign(AGENT)
             st.rerun()
 
 else:
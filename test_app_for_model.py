@@ -3,19 +3,10 @@ import seaborn as sns
 import pandas as pd
 import matplotlib.pyplot as plt
 import joblib
-import requests
-import zipfile
-import io
 
+from bank_data import load_bank_data
 
-url = "https://archive.ics.uci.edu/ml/machine-learning-databases/00222/bank.zip"
-r = requests.get(url)
-
-# Open the zip file in memory
-z = zipfile.ZipFile(io.BytesIO(r.content))
-
-# Extract and read "bank.csv"
-df = pd.read_csv(z.open("bank-full.csv"), sep=";")
+df = load_bank_data()
 
 # Load dataset
 
@@ -0,0 +1,89 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+import uvicorn
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+sys.path.insert(0, str(ROOT / "ml_api"))
+
+from bench_microbatch import free_port  # noqa: E402
+
+
+@pytest.fixture
+def serve():
+    """Run ASGI apps with uvicorn in background threads; `serve(app)` returns the base URL."""
+    servers = []
+
+    def start(app):
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        servers.append((server, thread))
+        deadline = time.monotonic() + 10
+        while not server.started:
+            if time.monotonic() > deadline or not thread.is_alive():
+                raise RuntimeError("test server did not start")
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{port}"
+
+    yield start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(5)
+
+
+@pytest.fixture
+def ml_api(monkeypatch):
+    """The ml_api `app` module, imported as the service runs it: from inside ml_api/."""
+    monkeypatch.chdir(ROOT / "ml_api")
+    monkeypatch.setenv("MODELS_DIR", str(ROOT / "ml_api" / "models"))
+    import app
+
+    return app
+
+
+FEATURES = ["age", "job", "education", "default", "balance", "housing", "loan", "day", "campaign",
+            "poutcome", "months_since_previous_contact", "n_previous_contacts", "had_contact",
+            "is_single", "uknown_contact"]
+
+
+@pytest.fixture(scope="session")
+def contacted():
+    """Rows whose `n_previous_contacts` is a plain count, and the notebook model's probabilities for them."""
+    data = pd.read_csv(ROOT / "test_data.csv", dtype={"n_previous_contacts": str, "months_since_previous_contact": str})
+    rows = data[data["n_previous_contacts"].str.isdigit()].head(50)[FEATURES].reset_index(drop=True)
+    expected = joblib.load(ROOT / "model_1mvp.pkl").predict_proba(rows)[:, 1]
+    return rows, expected
+
+
+def fit(remainder="drop", num_step=None):
+    """A small scaler/one-hot/logreg pipeline shaped like the bank model, and its training frame."""
+    rng = np.random.default_rng(0)
+    n = 400
+    X = pd.DataFrame({
+        "age": rng.integers(18, 90, n),
+        "balance": rng.normal(1000, 3000, n),
+        "job": rng.choice(["admin.", "technician", "retired"], n),
+        "had_contact": rng.random(n) < 0.3,
+        "is_single": rng.random(n) < 0.5,
+    })
+    y = (X["balance"] / 3000 + X["had_contact"] * 1.5 + rng.normal(0, 1, n) > 0.5).astype(int)
+    preprocessor = ColumnTransformer([
+        ("num", num_step or Pipeline([("scaler", StandardScaler())]), ["age", "balance"]),
+        ("cat", OneHotEncoder(handle_unknown="ignore"), ["job"]),
+    ], remainder=remainder)
+    pipeline = Pipeline([("preprocessor", preprocessor), ("classifier", LogisticRegression())])
+    return pipeline.fit(X, y), X
@@ -0,0 +1,28 @@
+import json
+
+import pandas as pd
+import pytest
+
+import batch_score
+from conftest import ROOT
+
+
+def write_input(rows, path):
+    typed = rows.astype({"n_previous_contacts": "int64"})
+    if path.suffix == ".parquet":
+        typed.to_parquet(path, index=False)
+    else:
+        path.write_text("".join(json.dumps(record) + "\n" for record in typed.to_dict(orient="records")))
+
+
+@pytest.mark.parametrize("name", ["rows.parquet", "rows.ndjson"])
+def test_numeric_categoricals_score_as_strings(tmp_path, contacted, name):
+    rows, expected = contacted
+    path = tmp_path / name
+    write_input(rows, path)
+    output = tmp_path / "scored.csv"
+
+    batch_score.main([str(path), str(output), "--model", str(ROOT / "model_1mvp.pkl"),
+                      "--workers", "1", "--shards", "2", "--chunk-rows", "20"])
+
+    assert pd.read_csv(output)["probability"].tolist() == pytest.approx(expected)
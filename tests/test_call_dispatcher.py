@@ -0,0 +1,74 @@
+import sys
+import threading
+
+import pytest
+
+from bench_dispatcher import drain, scored_customers
+from call_dispatcher import CallDispatcher
+
+
+@pytest.fixture
+def frequent_switches():
+    """Switch threads every microsecond, so agents interleave inside the dispatcher as often as possible."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_concurrent_agents_never_share_a_customer(frequent_switches):
+    items = scored_customers(5000)
+    dispatcher = CallDispatcher()
+    dispatcher.extend(items)
+
+    _, handed_out = drain(dispatcher, agents=8)
+
+    assert sorted(handed_out) == list(range(len(items)))
+    assert dispatcher.stats() == {"waiting": 0, "assigned_now": 0, "pushed": 5000, "assigned": 5000,
+                                  "completed": 5000, "released": 0, "heap_size": 0}
+
+
+def test_concurrent_assign_release_and_push(frequent_switches):
+    dispatcher = CallDispatcher()
+    dispatcher.extend(scored_customers(2000))
+    held, duplicates = {}, []
+    lock = threading.Lock()
+
+    def agent(k):
+        for i in range(300):
+            call = dispatcher.assign(k)
+            if call is None:
+                return
+            with lock:
+                if call.customer_id in held:
+                    duplicates.append(call.customer_id)
+                held[call.customer_id] = k
+            if i % 3 == 0:  # call not made: back in line
+                with lock:
+                    del held[call.customer_id]
+                dispatcher.release(call.customer_id)
+            dispatcher.push(("new", k, i), 0.0)
+
+    threads = [threading.Thread(target=agent, args=(k,)) for k in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not duplicates
+    assigned = {call.customer_id for k in range(6) for call in dispatcher.assigned_to(k)}
+    assert assigned == set(held)
+    assert len(dispatcher) + len(assigned) == 2000 + 6 * 300
+
+
+def test_highest_value_first_ties_in_queue_order():
+    dispatcher = CallDispatcher()
+    dispatcher.extend([("a", 1.0, None), ("b", 3.0, None), ("c", 1.0, None)])
+    dispatcher.push("d", 3.0)
+    dispatcher.push("a", 0.5)  # re-scored while waiting
+
+    order = []
+    while (call := dispatcher.assign("x")) is not None:
+        order.append(call.customer_id)
+
+    assert order == ["b", "d", "c", "a"]
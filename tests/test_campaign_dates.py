@@ -0,0 +1,71 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from campaign_dates import MONTHS, add_dates, time_split
+
+# Rows per (year, month) of bank-full.csv, in file order, as the notebooks'
+# year_month summary shows them (no September 2008).
+BLOCKS = [
+    (2008, 5, 7957), (2008, 6, 4486), (2008, 7, 6380), (2008, 8, 5215), (2008, 10, 80),
+    (2008, 11, 3598), (2008, 12, 13), (2009, 1, 1176), (2009, 2, 2296), (2009, 3, 258),
+    (2009, 4, 2718), (2009, 5, 5575), (2009, 6, 642), (2009, 7, 207), (2009, 8, 772),
+    (2009, 9, 282), (2009, 10, 438), (2009, 11, 297), (2009, 12, 201), (2010, 1, 227),
+    (2010, 2, 353), (2010, 3, 219), (2010, 4, 214), (2010, 5, 234), (2010, 6, 213),
+    (2010, 7, 308), (2010, 8, 260), (2010, 9, 297), (2010, 10, 220), (2010, 11, 75),
+]
+
+
+@pytest.fixture
+def bank_calendar():
+    """`month` / `day` columns with the real block sequence, days ascending within each month."""
+    rng = np.random.default_rng(0)
+    months, days = [], []
+    for _, month, n in BLOCKS:
+        months += [MONTHS[month - 1]] * n
+        days.append(np.sort(rng.integers(1, 29, n)))
+    return pd.DataFrame({"month": months, "day": np.concatenate(days)})
+
+
+def test_years_match_the_notebook_summary(bank_calendar):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        df = add_dates(bank_calendar, start_year=2008, max_year=2010)
+
+    counts = df["year_month"].value_counts().sort_index()
+    assert [(ym.year, ym.month, n) for ym, n in counts.items()] == BLOCKS
+
+
+def test_time_split_sizes_match_the_notebook(bank_calendar):
+    df = add_dates(bank_calendar, max_year=2010)
+    df = df[df["year_month"] < "2009-11-01"]
+
+    split = time_split(df["year_month"])
+
+    assert [len(df.iloc[part]) for part in split] == [31201, 2976, 7916]
+
+
+def test_days_going_backwards_warn_by_default(bank_calendar):
+    shuffled = bank_calendar.copy()
+    first_may_2009 = sum(n for _, _, n in BLOCKS[:11])
+    shuffled.loc[first_may_2009, "day"] = 28  # the next row is back at the start of the month
+
+    with pytest.warns(RuntimeWarning, match="may 2009"):
+        df = add_dates(shuffled, max_year=2010)
+    assert (df["year"].to_numpy() == add_dates(bank_calendar)["year"].to_numpy()).all()
+
+    with pytest.raises(ValueError, match="out of order"):
+        add_dates(shuffled, max_year=2010, check_order=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        add_dates(shuffled, max_year=2010, check_order=False)
+
+
+def test_misplaced_block_exceeds_max_year(bank_calendar):
+    # A block of May rows after June adds a spurious rollover
+    misplaced = pd.concat([bank_calendar.iloc[:8000], bank_calendar.iloc[:50], bank_calendar.iloc[8000:]])
+
+    with pytest.raises(ValueError, match="inferred year reaches 2011"):
+        add_dates(misplaced, max_year=2010, check_order=False)
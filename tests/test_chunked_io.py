@@ -0,0 +1,28 @@
+import asyncio
+
+from chunked_io import iter_text_frames, missing_values
+
+
+def frames(body, fmt):
+    async def stream():
+        yield body
+
+    async def run():
+        return [frame async for frame in iter_text_frames(stream(), fmt, chunk_rows=100)]
+
+    return asyncio.run(run())
+
+
+def test_ndjson_nulls_stay_missing():
+    body = b'{"job": "admin.", "n_previous_contacts": 0, "age": 30}\n{"job": null, "n_previous_contacts": null, "age": 40}\n'
+    (frame,) = frames(body, "ndjson")
+
+    assert frame["job"].tolist() == ["admin.", None]
+    assert frame["n_previous_contacts"].tolist() == ["0", None]
+    assert missing_values(frame, ["age", "job", "n_previous_contacts"]) == {"job": 1, "n_previous_contacts": 1}
+
+
+def test_csv_empty_cells_are_missing():
+    (frame,) = frames(b"age,job\n30,admin.\n40,\n", "csv")
+
+    assert missing_values(frame, ["age", "job"]) == {"job": 1}
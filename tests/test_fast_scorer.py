@@ -0,0 +1,72 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import FunctionTransformer
+
+from conftest import ROOT, fit
+from fast_scorer import CompiledScorer
+
+
+@pytest.mark.parametrize("remainder", ["drop", "passthrough"])
+def test_compiled_scorer_matches_pipeline(remainder):
+    pipeline, X = fit(remainder)
+    scorer = CompiledScorer.from_pipeline(pipeline)
+
+    assert scorer.verify(pipeline) < 1e-9
+    assert scorer.verify(pipeline, X) < 1e-9
+
+
+def test_passthrough_remainder_is_compiled_not_dropped():
+    pipeline, X = fit("passthrough")
+    scorer = CompiledScorer.from_pipeline(pipeline)
+    assert {"had_contact", "is_single"} <= set(scorer.numeric_features)
+
+    # Without their weights the probe frame no longer matches the pipeline
+    scorer.numeric_weights[[scorer.numeric_features.index(f) for f in ("had_contact", "is_single")]] = 0
+    with pytest.raises(ValueError, match="disagrees"):
+        scorer.verify(pipeline)
+
+
+def test_unsupported_transformer_is_rejected():
+    pipeline, _ = fit(num_step=FunctionTransformer(np.tanh))
+    with pytest.raises(ValueError, match="Cannot compile"):
+        CompiledScorer.from_pipeline(pipeline)
+
+
+@pytest.fixture(scope="module")
+def notebook_model():
+    """The notebook's pipeline, its test set and the probabilities it gives."""
+    model = joblib.load(ROOT / "model_1mvp.pkl")
+    X = pd.read_csv(ROOT / "test_data.csv", dtype={"n_previous_contacts": str, "months_since_previous_contact": str})
+    X = X.drop(columns="y")
+    return model, X, model.predict_proba(X)[:, 1]
+
+
+def test_saved_scorer_matches_notebook_model(tmp_path, notebook_model):
+    model, X, expected = notebook_model
+    CompiledScorer.from_pipeline(model).save(tmp_path / "compiled")
+
+    preds, probs = CompiledScorer.load(tmp_path / "compiled", mmap=True).score(X)
+
+    np.testing.assert_allclose(probs, expected, rtol=0, atol=1e-12)
+    assert (preds == model.predict(X)).all()
+
+
+@pytest.mark.parametrize("export", sorted((ROOT / "ml_api" / "models").glob("*/compiled")), ids=lambda p: p.parent.name)
+def test_committed_exports_match_notebook_model(export, notebook_model):
+    model, X, expected = notebook_model
+    _, probs = CompiledScorer.load(export, mmap=True).score(X)
+
+    np.testing.assert_allclose(probs, expected, rtol=0, atol=1e-12)
+
+
+def test_save_replaces_an_export_in_one_piece(tmp_path):
+    first, X = fit()
+    second, _ = fit("passthrough")
+    out = tmp_path / "compiled"
+    CompiledScorer.from_pipeline(first).save(out)
+    CompiledScorer.from_pipeline(second).save(out)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["compiled"]
+    assert CompiledScorer.load(out).verify(second, X) < 1e-9
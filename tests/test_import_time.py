@@ -0,0 +1,11 @@
+import pytest
+
+from check_import_time import BUDGET_MS, SERVICES, measure
+
+
+@pytest.mark.parametrize("service", SERVICES)
+def test_app_import_stays_within_budget(service):
+    total_ms, eager, _ = measure(service)
+
+    assert not eager, f"{service} imports {', '.join(eager)} at startup; they should load lazily"
+    assert total_ms <= BUDGET_MS, f"{service}: import app took {total_ms:.0f} ms, budget {BUDGET_MS} ms"
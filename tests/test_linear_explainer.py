@@ -0,0 +1,40 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+import shap
+
+from conftest import ROOT, fit
+from ml_api_extended.linear_explainer import LinearShapExplainer, load_background
+
+
+def notebook_model():
+    X = load_background(ROOT / "test_data.csv").head(100).drop(columns="y")
+    return joblib.load(ROOT / "model_1mvp.pkl"), X
+
+
+@pytest.mark.parametrize("make", [notebook_model, lambda: fit("passthrough")], ids=["notebook", "passthrough"])
+def test_batch_background_reproduces_shap_explainer(make):
+    pipeline, X = make()
+    X = X.head(100)  # shap.Explainer samples larger backgrounds down to 100 rows
+    explainer = LinearShapExplainer(pipeline, X.head(50))
+
+    X_transformed, values = explainer.explain(X, background="batch")
+
+    expected = shap.Explainer(pipeline.named_steps["classifier"], X_transformed)(X_transformed).values
+    np.testing.assert_allclose(values, expected, atol=1e-10)
+
+
+def test_reason_codes_cover_passthrough_columns():
+    pipeline, X = fit("passthrough")
+    explainer = LinearShapExplainer(pipeline, X)
+
+    assert explainer.original_features == ["age", "balance", "job", "had_contact", "is_single"]
+    assert explainer.grouping.shape == (len(explainer.feature_names), 5)
+    # Every transformed column belongs to exactly one input feature, so nothing is lost when grouping
+    _, values = explainer.explain(X)
+    np.testing.assert_allclose((values @ explainer.grouping).sum(axis=1), values.sum(axis=1))
+
+    probabilities, rows = explainer.reason_codes(X, top_k=5)
+    np.testing.assert_allclose(probabilities, pipeline.predict_proba(X)[:, 1])
+    assert {r["feature"] for r in rows[0]} == set(explainer.original_features)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from sklearn.calibration import calibration_curve
+from sklearn.metrics import auc, brier_score_loss, precision_recall_curve, roc_auc_score
+
+from ml_api_extended.metrics_engine import MetricsState, merge_states
+
+
+@pytest.fixture(scope="module")
+def scores():
+    rng = np.random.default_rng(0)
+    y = rng.random(5000) < 0.2
+    # One score per histogram bin (bin centres), so binning loses nothing and sklearn sees the same ties
+    p = np.clip(0.15 + 0.25 * y + rng.normal(0, 0.15, len(y)), 0, 0.999)
+    return y, np.floor(p * 1000) / 1000 + 0.0005
+
+
+def test_merged_chunks_match_one_pass(scores):
+    y, p = scores
+    whole = MetricsState().update(y, p)
+    chunks = [MetricsState().update(y[i:i + 1200], p[i:i + 1200]) for i in range(0, len(y), 1200)]
+
+    # States arrive from workers as dicts as well as objects
+    merged = merge_states([chunks[0].to_dict(), *chunks[1:]])
+
+    for name in ("pos", "neg", "cal_count", "cal_pos"):
+        np.testing.assert_array_equal(getattr(merged, name), getattr(whole, name))
+    np.testing.assert_allclose(merged.cal_prob_sum, whole.cal_prob_sum)
+    assert merged.squared_error == pytest.approx(whole.squared_error)
+    assert merged.roc_auc() == whole.roc_auc() and merged.pr_auc() == whole.pr_auc()
+
+
+def test_metrics_match_sklearn(scores):
+    y, p = scores
+    state = merge_states(MetricsState().update(y[i:i + 700], p[i:i + 700]) for i in range(0, len(y), 700))
+
+    assert state.n_samples == len(y) and state.n_positive == y.sum()
+    assert state.roc_auc() == pytest.approx(roc_auc_score(y, p), abs=1e-12)
+    assert state.brier_score() == pytest.approx(brier_score_loss(y, p), abs=1e-12)
+    precision, recall, _ = precision_recall_curve(y, p)
+    assert state.pr_auc() == pytest.approx(auc(recall, precision), abs=1e-12)
+
+    fraction_positive, mean_predicted = calibration_curve(y, p, n_bins=10)
+    bins = state.calibration()
+    assert [b["fraction_positive"] for b in bins] == pytest.approx(fraction_positive)
+    assert [b["mean_predicted"] for b in bins] == pytest.approx(mean_predicted)
+
+
+def test_merge_rejects_different_bin_layouts():
+    with pytest.raises(ValueError):
+        MetricsState(n_bins=100).merge(MetricsState(n_bins=1000))
@@ -0,0 +1,69 @@
+import asyncio
+import gc
+
+import numpy as np
+
+from micro_batcher import MicroBatcher
+
+
+def echo(key, rows):
+    rows = np.asarray(rows, dtype=float)
+    return rows > 0, rows
+
+
+def test_concurrent_calls_share_a_batch():
+    batcher = MicroBatcher(echo, max_rows=100, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit("m", [i, -i]) for i in range(10)))
+
+    results = asyncio.run(run())
+
+    assert [list(probs) for _, probs in results] == [[i, -i] for i in range(10)]
+    assert batcher.batches == 1 and batcher.requests == 10 and batcher.rows == 20
+
+
+def test_pending_batches_survive_garbage_collection():
+    batcher = MicroBatcher(echo, max_rows=4, max_wait_ms=50)
+
+    async def run():
+        calls = [asyncio.ensure_future(batcher.submit("m", [i])) for i in range(4)]
+        await asyncio.sleep(0)  # the fourth row fills the batch and starts its task
+        assert len(batcher._tasks) == 1
+        gc.collect()
+        return await asyncio.wait_for(asyncio.gather(*calls), 5)
+
+    assert [float(probs[0]) for _, probs in asyncio.run(run())] == [0, 1, 2, 3]
+    assert not batcher._tasks
+
+
+def test_aclose_flushes_waiting_rows():
+    batcher = MicroBatcher(echo, max_rows=100, max_wait_ms=60_000)
+
+    async def run():
+        call = asyncio.ensure_future(batcher.submit("m", [7]))
+        await asyncio.sleep(0)
+        await batcher.aclose()
+        assert call.done()
+        return await call
+
+    assert float(asyncio.run(run())[1][0]) == 7
+
+
+def test_a_failing_request_does_not_fail_its_batch():
+    def score(key, rows):
+        if "bad" in rows:
+            raise ValueError("cannot score 'bad'")
+        return echo(key, rows)
+
+    batcher = MicroBatcher(score, max_rows=100, max_wait_ms=5)
+
+    async def run():
+        calls = [batcher.submit("m", [i]) for i in range(3)] + [batcher.submit("m", ["bad"])]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    *good, bad = asyncio.run(run())
+
+    assert [float(probs[0]) for _, probs in good] == [0, 1, 2]
+    assert isinstance(bad, ValueError)
+    assert batcher.batches == 1 and batcher.retries == 1
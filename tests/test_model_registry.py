@@ -0,0 +1,102 @@
+import shutil
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from model_registry import ModelRegistry
+
+ROOT = Path(__file__).resolve().parent.parent
+
+VERSION = "logreg-1mvp"
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    root = tmp_path / "models"
+    shutil.copytree(ROOT / "ml_api" / "models", root)
+    shutil.copytree(root / VERSION, root / "logreg-copy")
+    return root
+
+
+def test_reload_reaches_every_process(models_dir):
+    # Two registries on one directory stand in for two serve.py workers
+    here, there = ModelRegistry(models_dir, poll_interval=0), ModelRegistry(models_dir, poll_interval=0)
+    before = there.get()
+    invalidated = []
+    there.on_reload(invalidated.append)
+
+    reloaded = here.reload()
+
+    assert here.get() is reloaded
+    after = there.get()
+    assert after is not before and after.generation > before.generation
+    assert invalidated == [VERSION]
+    assert there.get() is after
+
+
+def test_activate_reaches_every_process(models_dir):
+    here, there = ModelRegistry(models_dir, poll_interval=0), ModelRegistry(models_dir, poll_interval=0)
+    assert there.get().version == VERSION
+
+    here.activate("logreg-copy")
+
+    assert there.active_version() == "logreg-copy"
+    assert there.get().version == "logreg-copy"
+
+
+def test_other_processes_switch_on_their_next_poll(models_dir):
+    here, there = ModelRegistry(models_dir, poll_interval=0), ModelRegistry(models_dir, poll_interval=3600)
+    before = there.get()
+
+    here.activate("logreg-copy")
+    here.reload(VERSION)
+
+    # Eventually consistent: nothing changes until `there` polls again
+    assert there.get() is before
+    there._checked_at -= 3600
+    assert there.get().version == "logreg-copy"
+    assert there.get(VERSION) is not before
+
+
+def replace_pickle(models_dir, version):
+    """Overwrite a version's model.pkl with different weights, as retraining would; returns the new pipeline."""
+    path = models_dir / version / "model.pkl"
+    pipeline = joblib.load(path)
+    pipeline[-1].coef_ = pipeline[-1].coef_ * 0.5
+    joblib.dump(pipeline, path)
+    return pipeline
+
+
+def sample(n=200):
+    X = pd.read_csv(ROOT / "test_data.csv", nrows=n,
+                    dtype={"n_previous_contacts": str, "months_since_previous_contact": str})
+    return X.drop(columns="y")
+
+
+def test_reload_re_exports_a_replaced_pickle(models_dir):
+    registry = ModelRegistry(models_dir, poll_interval=0)
+    before = registry.get()
+    assert before.pipeline is None  # served from compiled/
+    pipeline = replace_pickle(models_dir, VERSION)
+
+    after = registry.reload()
+
+    X = sample()
+    np.testing.assert_allclose(after.score(X)[1], pipeline.predict_proba(X)[:, 1], atol=1e-12)
+    assert not np.allclose(before.score(X)[1], after.score(X)[1])
+    # The export was rewritten, so a fresh process loads the new weights from it too
+    fresh = ModelRegistry(models_dir).get()
+    assert registry.artifact_path().name == "compiled" and fresh.pipeline is None
+    np.testing.assert_allclose(fresh.score(X)[1], pipeline.predict_proba(X)[:, 1], atol=1e-12)
+
+
+def test_stale_export_is_not_served(models_dir):
+    pipeline = replace_pickle(models_dir, VERSION)
+    registry = ModelRegistry(models_dir)
+
+    assert registry.artifact_path().name == "model.pkl"
+    X = sample()
+    np.testing.assert_allclose(registry.get().score(X)[1], pipeline.predict_proba(X)[:, 1], atol=1e-12)
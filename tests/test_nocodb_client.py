@@ -0,0 +1,134 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from ml_api_extended import nocodb_client
+from ml_api_extended.nocodb_client import NocoDBClient, fetch_records_sync, retry_after_seconds
+from nocodb_stand_in import ROOT, create_app
+
+TABLE_ROWS = sum(1 for _ in open(ROOT / "test_data.csv")) - 1
+
+
+def records_url(base):
+    return f"{base}/api/v2/tables/local/records"
+
+
+def fetch(client, limit=None, offset=0):
+    async def run():
+        try:
+            return await client.fetch_records(limit, offset)
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+
+def ids(records):
+    return [r["Id"] for r in records]
+
+
+def test_fetch_records_crosses_page_boundaries(serve):
+    app = create_app(max_limit=100)
+    client = NocoDBClient(records_url(serve(app)), page_size=250)
+
+    records = fetch(client, limit=1000, offset=50)
+
+    # The server caps pages at 100 rows; the client notices and pages by 100
+    assert ids(records) == list(range(51, 1051))
+    assert app.state.calls["records"] == 10
+
+
+def test_iter_pages_reads_whole_table(serve):
+    app = create_app(max_limit=1000)
+    client = NocoDBClient(records_url(serve(app)), page_size=1000, max_concurrency=3)
+
+    async def run():
+        pages = [page async for page in client.iter_pages()]
+        await client.aclose()
+        return pages
+
+    pages = asyncio.run(run())
+
+    assert [len(page) for page in pages[:-1]] == [1000] * (len(pages) - 1)
+    assert ids(r for page in pages for r in page) == list(range(1, TABLE_ROWS + 1))
+
+
+def test_concurrency_is_capped(serve):
+    app = create_app(max_limit=50, latency=0.02)
+    client = NocoDBClient(records_url(serve(app)), page_size=50, max_concurrency=3)
+
+    assert len(fetch(client, limit=1000)) == 1000
+    assert app.state.calls["max_in_flight"] == 3
+
+
+@pytest.mark.parametrize("status, retry_after", [
+    (429, "0"),
+    (429, formatdate(time.time() - 60, usegmt=True)),  # HTTP-date form
+    (503, None),
+    (500, None),
+])
+def test_transient_failures_are_retried(serve, status, retry_after):
+    app = create_app(max_limit=100, fail_every=2, fail_status=status, retry_after=retry_after)
+    client = NocoDBClient(records_url(serve(app)), page_size=100, max_concurrency=1, backoff=0.001)
+
+    # Every second request fails: pages 2-5 each need one retry
+    assert ids(fetch(client, limit=500)) == list(range(1, 501))
+    assert app.state.calls["failed"] == 4
+    assert client.stats["retries"] == 4
+
+
+def test_gives_up_after_retries(serve):
+    app = create_app(fail_rate=1.0)
+    client = NocoDBClient(records_url(serve(app)), retries=2, backoff=0.001)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        fetch(client, limit=10)
+    assert app.state.calls["records"] == 3
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds("2.5") == 2.5
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds("nan") is None
+    assert retry_after_seconds(formatdate(time.time() - 60, usegmt=True)) == 0.0
+    assert 25 < retry_after_seconds(formatdate(time.time() + 30, usegmt=True)) <= 30
+
+
+def test_stale_cache_is_revalidated_with_etag(serve, tmp_path):
+    app = create_app(max_limit=100)
+    url = records_url(serve(app))
+
+    first = fetch(NocoDBClient(url, page_size=100, cache_dir=tmp_path, cache_ttl=0), limit=300)
+    client = NocoDBClient(url, page_size=100, cache_dir=tmp_path, cache_ttl=0)
+    second = fetch(client, limit=300)
+
+    assert second == first
+    assert client.stats["not_modified"] == 3
+    assert app.state.calls["not_modified"] == 3
+
+
+def test_fresh_cache_skips_the_server(serve, tmp_path):
+    app = create_app(max_limit=100)
+    url = records_url(serve(app))
+
+    fetch(NocoDBClient(url, page_size=100, cache_dir=tmp_path), limit=300)
+    client = NocoDBClient(url, page_size=100, cache_dir=tmp_path)
+    assert ids(fetch(client, limit=300)) == list(range(1, 301))
+
+    assert client.stats == {"requests": 0, "cache_hits": 3, "not_modified": 0, "retries": 0}
+    assert app.state.calls["records"] == 3
+
+
+def test_fetch_records_sync_reuses_one_client(serve):
+    url = records_url(serve(create_app()))
+
+    assert ids(fetch_records_sync(url, limit=20)) == list(range(1, 21))
+    client = nocodb_client._sync_clients[(url, None, None, ())]
+    session = client._client
+    assert ids(fetch_records_sync(url, limit=20, offset=20)) == list(range(21, 41))
+
+    assert nocodb_client._sync_clients[(url, None, None, ())] is client
+    assert client._client is session
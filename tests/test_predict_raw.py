@@ -0,0 +1,61 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import FEATURES, ROOT
+
+# Raw bank-full.csv rows covering each pdays / previous bin and a balance above the clip bound
+RAW = pd.DataFrame([
+    dict(age=30, job="admin.", marital="single", education="secondary", default="no", balance=25000.0,
+         housing="yes", loan="no", contact="unknown", day=5, campaign=1, pdays=-1, previous=0, poutcome="unknown"),
+    dict(age=45, job="technician", marital="married", education="tertiary", default="no", balance=-300.0,
+         housing="no", loan="yes", contact="cellular", day=17, campaign=3, pdays=100, previous=2, poutcome="failure"),
+    dict(age=61, job="retired", marital="divorced", education="primary", default="no", balance=1200.0,
+         housing="no", loan="no", contact="telephone", day=28, campaign=2, pdays=371, previous=12, poutcome="success"),
+    dict(age=38, job="services", marital="single", education="unknown", default="yes", balance=13164.9,
+         housing="yes", loan="no", contact="cellular", day=9, campaign=6, pdays=240, previous=6, poutcome="other"),
+])
+
+
+def notebook_features(df, upper_bound):
+    """The training notebook's feature engineering, cell by cell."""
+    df = df.copy()
+    df['balance'] = df['balance'].clip(upper=upper_bound)
+    df['months_since_previous_contact'] = pd.cut(
+        df['pdays'],
+        bins=[-2, -1, 150, 230, 310, 380, 1000],
+        labels=["No contact", "0 - 5 months", "5 - 8 months", "8 - 11 months", "Around a year", "More than a year"]
+    )
+    df['n_previous_contacts'] = pd.cut(
+        df['previous'],
+        bins=[-1, 0, 1, 2, 3, 4, 5, 6, 300],
+        labels=["No contact", "1", "2", "3", "4", "5", "6", "More than 6"]
+    )
+    df["had_contact"] = df["months_since_previous_contact"] != "No contact"
+    df["is_single"] = df["marital"] == "single"
+    df["uknown_contact"] = df["contact"] == "unknown"
+    return df[FEATURES]
+
+
+@pytest.fixture(scope="module")
+def balance_upper():
+    metadata = json.loads((ROOT / "ml_api" / "models" / "logreg-1mvp" / "metadata.json").read_text())
+    return metadata["feature_engineering"]["balance_upper"]
+
+
+def test_recorded_clip_bound_is_the_notebooks(balance_upper):
+    # test_data.csv was clipped by the notebook, so its largest balance is the bound
+    assert pd.read_csv(ROOT / "test_data.csv")["balance"].max() == balance_upper
+
+
+def test_predict_raw_matches_notebook_feature_engineering(ml_api, balance_upper):
+    expected = joblib.load(ROOT / "model_1mvp.pkl").predict_proba(notebook_features(RAW, balance_upper))[:, 1]
+    with TestClient(ml_api.app) as client:
+        response = client.post("/predict/raw", json={"data": RAW.to_dict(orient="records")}).json()
+
+    assert "error" not in response, response
+    np.testing.assert_allclose(response["probabilities"], expected, atol=1e-12)
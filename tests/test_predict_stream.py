@@ -0,0 +1,31 @@
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def stream(ml_api, body, fmt):
+    with TestClient(ml_api.app) as client:
+        response = client.post(f"/predict/stream?format={fmt}&chunk_rows=20", content=body)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert all("error" not in line for line in lines), lines
+    return [p for line in lines for p in line["probabilities"]]
+
+
+# float64 is how pandas types an integer column that has nulls elsewhere in the file
+@pytest.mark.parametrize("dtype", ["int64", "float64"])
+def test_parquet_numeric_categoricals_score_as_strings(ml_api, contacted, dtype):
+    rows, expected = contacted
+    body = io.BytesIO()
+    rows.astype({"n_previous_contacts": dtype}).to_parquet(body, index=False)
+
+    assert stream(ml_api, body.getvalue(), "parquet") == pytest.approx(expected)
+
+
+def test_ndjson_integer_categoricals_score_as_strings(ml_api, contacted):
+    rows, expected = contacted
+    records = rows.astype({"n_previous_contacts": "int64"}).to_dict(orient="records")
+    body = "".join(json.dumps(record) + "\n" for record in records).encode()
+
+    assert stream(ml_api, body, "ndjson") == pytest.approx(expected)
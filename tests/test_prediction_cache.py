@@ -0,0 +1,73 @@
+import shutil
+from types import SimpleNamespace
+
+import pytest
+
+import prediction_cache
+from conftest import ROOT
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache
+
+FEATURES = ["age", "job"]
+ROWS = [SimpleNamespace(age=30, job="admin."), SimpleNamespace(age=41, job="retired")]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache, "time", clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    entry = SimpleNamespace(version="v1", generation=1)
+    cache = PredictionCache(max_size=10, ttl=60)
+    keys = cache.keys(entry, ROWS, FEATURES)
+    cache.put_many(keys, [0, 1], [0.2, 0.7])
+
+    clock.now += 59
+    assert cache.get_many(keys) == [(0, 0.2), (1, 0.7)]
+    clock.now += 2
+    assert cache.get_many(keys) == [None, None]
+    assert cache.stats()["expired"] == 2 and cache.stats()["size"] == 0
+
+
+def test_least_recently_used_is_evicted():
+    entry = SimpleNamespace(version="v1", generation=1)
+    cache = PredictionCache(max_size=2)
+    first, second = cache.keys(entry, ROWS, FEATURES)
+    cache.put_many([first, second], [0, 1], [0.2, 0.7])
+    cache.get_many([first])
+
+    third = cache.keys(entry, [SimpleNamespace(age=55, job="services")], FEATURES)[0]
+    cache.put_many([third], [0], [0.1])
+
+    assert cache.get_many([first, second, third]) == [(0, 0.2), None, (0, 0.1)]
+
+
+def test_reload_invalidates_cached_rows(tmp_path):
+    shutil.copytree(ROOT / "ml_api" / "models", tmp_path / "models")
+    registry = ModelRegistry(tmp_path / "models", poll_interval=0)
+    cache = PredictionCache()
+    registry.on_reload(cache.invalidate)
+    before = registry.get()
+    keys = cache.keys(before, ROWS, FEATURES)
+    cache.put_many(keys, [0, 1], [0.2, 0.7])
+    other = cache.keys(SimpleNamespace(version="other", generation=1), ROWS, FEATURES)
+    cache.put_many(other, [0, 1], [0.2, 0.7])
+
+    after = registry.reload()
+
+    assert cache.get_many(keys) == [None, None]
+    assert cache.get_many(other) == [(0, 0.2), (1, 0.7)]  # other versions keep their entries
+    # Rows scored by the reloaded model get new keys, so nothing stale can come back
+    assert set(cache.keys(after, ROWS, FEATURES)).isdisjoint(keys)
+    assert cache.stats()["invalidated"] == 2
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_api_extended.profit_optimizer import C_FN, C_FP, at_thresholds, downsample, optimal_threshold, threshold_curve
+
+
+def expected_return(df, t, c_fp=C_FP, c_fn=C_FN):
+    """The notebook's version: filter, sum, repeat for every threshold."""
+    df_temp = df[df["y_pred_proba"] <= t].copy()
+    total_campaigns = df_temp["campaign"].sum()
+    df_temp["incorrect_pred"] = df_temp["y"] == True  # noqa: E712
+    total_failed = df_temp["incorrect_pred"].sum()
+    return total_campaigns * c_fp - total_failed * c_fn
+
+
+@pytest.fixture(scope="module")
+def scored():
+    rng = np.random.default_rng(1)
+    n = 2000
+    y = rng.random(n) < 0.12
+    # Rounded, so many customers share a score
+    p = np.round(np.clip(0.1 + 0.3 * y + rng.normal(0, 0.15, n), 0.01, 1), 2)
+    return pd.DataFrame({"y": y, "y_pred_proba": p, "campaign": rng.integers(1, 8, n)})
+
+
+def test_curve_matches_notebook_loop(scored):
+    curve = threshold_curve(scored["y"], scored["y_pred_proba"], scored["campaign"])
+
+    brute = [expected_return(scored, t) for t in curve["threshold"]]
+    np.testing.assert_allclose(curve["expected_return"], brute)
+    assert curve["threshold"].iloc[0] == 0 and curve["customers_skipped"].iloc[0] == 0
+    assert (curve["customers_skipped"] + curve["customers_called"] == len(scored)).all()
+
+
+def test_notebook_threshold_grid(scored):
+    curve = threshold_curve(scored["y"], scored["y_pred_proba"], scored["campaign"])
+    thresholds = np.linspace(0, 1, 120)
+
+    brute = np.array([expected_return(scored, t) for t in thresholds])
+    np.testing.assert_allclose(at_thresholds(curve, thresholds)["expected_return"], brute)
+    # The exact optimum is at least as good as the best grid point
+    assert optimal_threshold(curve)["expected_return"] >= brute.max()
+    assert optimal_threshold(curve)["expected_return"] == max(expected_return(scored, t) for t in curve["threshold"])
+
+
+def test_downsample_keeps_ends_and_optimum(scored):
+    curve = threshold_curve(scored["y"], scored["y_pred_proba"], scored["campaign"])
+    small = downsample(curve, n_points=10)
+
+    assert len(small) <= 11
+    assert small["threshold"].iloc[0] == curve["threshold"].iloc[0]
+    assert small["threshold"].iloc[-1] == curve["threshold"].iloc[-1]
+    assert optimal_threshold(curve)["threshold"] in small["threshold"].to_numpy()
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from what_if import BETA_A, BETA_B, _simulate_block, best_thresholds, scenario_grid, simulate
+
+
+def campaign_profit(df, threshold, cost_per_call, value_per_conversion):
+    """The notebook's single-scenario simulation step."""
+    called = df[df['predicted_prob'] >= threshold]
+    n_called = len(called)
+    expected_revenue = called['true_prob'].sum() * value_per_conversion
+    expected_cost = n_called * cost_per_call
+    profit = expected_revenue - expected_cost
+    roi = (profit / expected_cost) if expected_cost > 0 else 0
+    return n_called, profit, roi
+
+
+@pytest.fixture(scope="module")
+def grid():
+    return scenario_grid([0.0, 0.12], [0.0, 0.1, 0.25, 0.999], [0.5, 1.0], [1.0, 4.0])
+
+
+def test_block_matches_notebook_per_scenario(grid):
+    n_customers, n_replicates = 300, 4
+    seed = np.random.SeedSequence(7)
+    args = [grid[c].to_numpy(dtype=float) for c in grid.columns]
+    profit, roi, n_called = _simulate_block(*args, n_customers, n_replicates, seed, BETA_A, BETA_B)
+
+    # Same draws as the block: true probabilities, then one standard-normal noise draw
+    rng = np.random.default_rng(seed)
+    true_probs = rng.beta(BETA_A, BETA_B, size=(n_replicates, n_customers))
+    z = rng.standard_normal(size=(n_replicates, n_customers))
+    for j, scenario in enumerate(grid.itertuples()):
+        called = []
+        for r in range(n_replicates):
+            df = pd.DataFrame({"true_prob": true_probs[r],
+                               "predicted_prob": np.clip(true_probs[r] + scenario.model_noise * z[r], 0, 1)})
+            n, expected_profit, expected_roi = campaign_profit(
+                df, scenario.threshold, scenario.cost_per_call, scenario.value_per_conversion)
+            called.append(n)
+            assert profit[r, j] == pytest.approx(expected_profit, abs=1e-9)
+            assert roi[r, j] == pytest.approx(expected_roi, abs=1e-9)
+        assert n_called[j] == pytest.approx(np.mean(called))
+
+
+def test_results_do_not_depend_on_workers(grid):
+    one = simulate(grid, n_customers=200, n_replicates=60, seed=3)
+    two = simulate(grid, n_customers=200, n_replicates=60, seed=3, workers=2)
+
+    pd.testing.assert_frame_equal(one, two)
+    assert (one["profit_lo"] <= one["profit_mean"]).all() and (one["profit_mean"] <= one["profit_hi"]).all()
+
+
+def test_best_thresholds_pick_the_highest_mean_profit(grid):
+    results = simulate(grid, n_customers=200, n_replicates=30, seed=3)
+    best = best_thresholds(results)
+
+    assert len(best) == 2 * 2 * 2
+    for row in best.itertuples():
+        same = results[(results["model_noise"] == row.model_noise) & (results["cost_per_call"] == row.cost_per_call)
+                       & (results["value_per_conversion"] == row.value_per_conversion)]
+        assert row.profit_mean == same["profit_mean"].max()